@@ -2,12 +2,31 @@
 
 import React, { useState, useEffect, useRef } from 'react';
 import { useRouter } from 'next/navigation';
-import { Search, X, TrendingUp, Clock, Star, ChevronRight } from 'lucide-react';
+import { Search, X, TrendingUp, Clock, ChevronRight } from 'lucide-react';
+import { getSearchSuggestions } from '@/utils/search';
+
+const SUGGESTION_ICONS = {
+  service: '🛠️',
+  category: '📂',
+  profession: '👷',
+  skill: '⭐',
+  city: '📍',
+};
+
+const SUGGESTION_LABELS = {
+  service: 'Service',
+  category: 'Category',
+  profession: 'Professionals',
+  skill: 'Skill',
+  city: 'City',
+};
 
 export default function SearchDropdown({ searchQuery, setSearchQuery, onSearch }) {
   const router = useRouter();
   const [showDropdown, setShowDropdown] = useState(false);
   const [recentSearches, setRecentSearches] = useState([]);
+  const [suggestions, setSuggestions] = useState([]);
+  const [trendingSearches, setTrendingSearches] = useState([]);
   const dropdownRef = useRef(null);
 
   useEffect(() => {
@@ -37,31 +56,36 @@ export default function SearchDropdown({ searchQuery, setSearchQuery, onSearch }
     router.push(`/search?q=${encodeURIComponent(suggestion)}`);
   };
 
+  // Autocomplete: debounced, and a newer keystroke aborts the older request
+  useEffect(() => {
+    if (!showDropdown) return;
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const data = await getSearchSuggestions(searchQuery.trim(), 8, controller.signal);
+        if (searchQuery.trim()) {
+          setSuggestions(data.suggestions);
+        } else {
+          setSuggestions([]);
+          setTrendingSearches(data.suggestions.slice(0, 5).map((s) => s.text));
+        }
+      } catch (error) {
+        if (error.name !== 'AbortError') {
+          console.error('Error fetching suggestions:', error);
+        }
+      }
+    }, 120);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery, showDropdown]);
+
   const clearInput = () => {
     setSearchQuery('');
     setShowDropdown(false);
   };
 
-  // Mock suggestions - Replace with actual API
-  const serviceSuggestions = [
-    { icon: '🔌', name: 'Electrician near you' },
-    { icon: '🚰', name: 'Plumbing service' },
-    { icon: '🧹', name: 'House cleaning' },
-    { icon: '🍳', name: 'Home cooking service' },
-    { icon: '❄️', name: 'AC repair & service' },
-  ];
-
-  const professionalSuggestions = [
-    { name: 'Rahul Das', category: 'Electrician', rating: 4.8, photo: 'https://ui-avatars.com/api/?name=Rahul+Das&size=32&background=1E2A5E&color=fff' },
-    { name: 'Amit Kumar', category: 'Plumber', rating: 4.9, photo: 'https://ui-avatars.com/api/?name=Amit+Kumar&size=32&background=00BFA6&color=fff' },
-  ];
-
-  const trendingSearches = ['Emergency electrician', 'Deep cleaning', 'AC installation'];
-
-  const filteredServices = serviceSuggestions.filter(s => 
-    s.name.toLowerCase().includes(searchQuery.toLowerCase())
-  );
-
   return (
     <div ref={dropdownRef} className="hidden md:flex relative flex-1 max-w-2xl mx-4 lg:mx-8">
       <div className="relative group w-full">
@@ -119,19 +143,20 @@ export default function SearchDropdown({ searchQuery, setSearchQuery, onSearch }
             </div>
           )}
 
-          {/* Service Suggestions */}
-          {filteredServices.length > 0 && (
+          {/* Suggestions */}
+          {searchQuery && suggestions.length > 0 && (
             <div className="p-4">
-              <div className="text-sm font-bold text-gray-700 mb-2">Services</div>
+              <div className="text-sm font-bold text-gray-700 mb-2">Suggestions</div>
               <div className="space-y-1">
-                {filteredServices.slice(0, 5).map((service, index) => (
+                {suggestions.map((suggestion) => (
                   <button
-                    key={index}
-                    onClick={() => handleSuggestionClick(service.name)}
+                    key={`${suggestion.type}:${suggestion.text}`}
+                    onClick={() => handleSuggestionClick(suggestion.text)}
                     className="w-full flex items-center gap-3 p-2 hover:bg-gray-50 rounded-lg transition text-left"
                   >
-                    <span className="text-xl">{service.icon}</span>
-                    <span className="flex-1 text-sm font-medium text-gray-700">{service.name}</span>
+                    <span className="text-xl">{SUGGESTION_ICONS[suggestion.type] || '🔍'}</span>
+                    <span className="flex-1 text-sm font-medium text-gray-700">{suggestion.text}</span>
+                    <span className="text-xs text-gray-400">{SUGGESTION_LABELS[suggestion.type]}</span>
                     <ChevronRight className="w-4 h-4 text-gray-400" />
                   </button>
                 ))}
@@ -139,39 +164,8 @@ export default function SearchDropdown({ searchQuery, setSearchQuery, onSearch }
             </div>
           )}
 
-          {/* Professional Suggestions */}
-          {searchQuery && professionalSuggestions.length > 0 && (
-            <div className="p-4 border-t border-gray-100">
-              <div className="text-sm font-bold text-gray-700 mb-2">Professionals</div>
-              <div className="space-y-2">
-                {professionalSuggestions.slice(0, 3).map((pro, index) => (
-                  <button
-                    key={index}
-                    onClick={() => handleSuggestionClick(pro.name)}
-                    className="w-full flex items-center gap-3 p-2 hover:bg-gray-50 rounded-lg transition"
-                  >
-                    <img
-                      src={pro.photo}
-                      alt={pro.name}
-                      className="w-8 h-8 rounded-full"
-                    />
-                    <div className="flex-1 text-left">
-                      <div className="text-sm font-medium text-gray-700">{pro.name}</div>
-                      <div className="text-xs text-gray-500 flex items-center gap-1">
-                        <span>{pro.category}</span>
-                        <span>•</span>
-                        <Star className="w-3 h-3 fill-yellow-500 text-yellow-500" />
-                        <span>{pro.rating}</span>
-                      </div>
-                    </div>
-                  </button>
-                ))}
-              </div>
-            </div>
-          )}
-
           {/* Trending Searches */}
-          {!searchQuery && (
+          {!searchQuery && trendingSearches.length > 0 && (
             <div className="p-4 border-t border-gray-100">
               <div className="flex items-center gap-2 mb-3">
                 <TrendingUp className="w-4 h-4 text-orange-500" />
@@ -192,7 +186,7 @@ export default function SearchDropdown({ searchQuery, setSearchQuery, onSearch }
           )}
 
           {/* No Results */}
-          {searchQuery && filteredServices.length === 0 && (
+          {searchQuery && suggestions.length === 0 && (
             <div className="p-8 text-center">
               <div className="text-4xl mb-2">🔍</div>
               <div className="text-sm text-gray-500">No suggestions found</div>
@@ -25,6 +25,7 @@ import {
 } from '../../../utils/auth';
 import { createBooking } from '../../../utils/bookings';
 import { checkAcceptedOffer, PriceOffer } from '../../../utils/offers';
+import { getProfessionalAvailability } from '../../../utils/professionals';
 
 // Premium Color Palette
 const colors = {
@@ -364,11 +365,14 @@ export default function BookingFlowPage() {
 
     setCheckingAvailability(true);
     try {
-      // Simulate availability check - replace with actual API call
-      await new Promise(resolve => setTimeout(resolve, 1000));
-      
-      // For demo, randomly determine availability
-      const available = Math.random() > 0.2; // 80% chance of being available
+      // Look the slot up in the professional's calendar ("08:00 AM" -> "08:00")
+      const [clock, meridiem] = selectedTimeSlot.split(' ');
+      const [hours, minutes] = clock.split(':').map(Number);
+      const hours24 = (hours % 12) + (meridiem === 'PM' ? 12 : 0);
+      const slotTime = `${hours24.toString().padStart(2, '0')}:${minutes.toString().padStart(2, '0')}`;
+
+      const [day] = await getProfessionalAvailability(professionalId, selectedDate.toISOString().split('T')[0], 1);
+      const available = !!day?.slots.some((slot) => slot.time === slotTime && slot.available);
       setIsAvailable(available);
       
       if (!available) {
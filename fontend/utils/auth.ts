@@ -285,7 +285,10 @@ export async function refreshToken(): Promise<AuthResponse> {
 // Logout
 export async function logout(): Promise<void> {
   try {
-    await apiRequest('/auth/logout', { method: 'POST' });
+    await apiRequest('/auth/logout', {
+      method: 'POST',
+      body: JSON.stringify({ refresh_token: getRefreshToken() }),
+    });
   } catch (error) {
     // Ignore errors during logout
   } finally {
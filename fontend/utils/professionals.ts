@@ -133,3 +133,36 @@ export const getFeaturedProfessionals = async (limit: number = 10) => {
 
   return response.json();
 };
+
+export interface AvailabilitySlot {
+  time: string; // "HH:MM", 24h
+  available: boolean;
+}
+
+export interface AvailabilityDay {
+  date: string; // YYYY-MM-DD
+  working_day: boolean;
+  slots: AvailabilitySlot[];
+  available_count: number;
+}
+
+/**
+ * Get a professional's free slots, one entry per day starting at startDate
+ */
+export const getProfessionalAvailability = async (
+  professionalId: string,
+  startDate?: string,
+  days: number = 7
+): Promise<AvailabilityDay[]> => {
+  const params = new URLSearchParams({ days: days.toString() });
+  if (startDate) params.append('start_date', startDate);
+
+  const response = await fetch(`${API_BASE_URL}/professionals/${professionalId}/availability?${params}`);
+
+  if (!response.ok) {
+    throw new Error('Failed to fetch availability');
+  }
+
+  const data = await response.json();
+  return data.availability || [];
+};
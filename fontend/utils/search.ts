@@ -0,0 +1,42 @@
+/**
+ * Search autocomplete API
+ */
+
+const API_BASE_URL = 'http://localhost:8000/api';
+
+export type SuggestionType = 'service' | 'category' | 'profession' | 'skill' | 'city';
+
+export interface Suggestion {
+  text: string;
+  type: SuggestionType;
+  score: number;
+}
+
+export interface SuggestResponse {
+  query: string;
+  suggestions: Suggestion[];
+  ready: boolean;
+}
+
+/**
+ * Popular suggestions for what the user has typed so far.
+ * An empty query returns the most popular searches overall.
+ */
+export const getSearchSuggestions = async (
+  query: string,
+  limit: number = 8,
+  signal?: AbortSignal
+): Promise<SuggestResponse> => {
+  const params = new URLSearchParams({ q: query, limit: limit.toString() });
+
+  const response = await fetch(`${API_BASE_URL}/search/suggest?${params}`, {
+    method: 'GET',
+    signal,
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to fetch suggestions');
+  }
+
+  return response.json();
+};
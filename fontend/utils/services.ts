@@ -116,6 +116,12 @@ export interface ServiceStats {
   avg_rating: number;
 }
 
+export interface ServiceFacets {
+  categories: { name: string; count: number }[];
+  price_buckets: { min: number; max: number | null; count: number }[];
+  rating_bands: { min_rating: number; count: number }[];
+}
+
 export interface ServicesResponse {
   total: number;
   services: Service[];
@@ -123,6 +129,10 @@ export interface ServicesResponse {
   limit: number;
   stats?: ServiceStats;
   categories?: string[];
+  facets?: ServiceFacets;
+  // true when a search matched more services than the API paginates
+  total_capped?: boolean;
+  search_matches?: number | null;
   filters_applied?: {
     category: string | null;
     search: string | null;
@@ -327,9 +337,10 @@ export async function getAllServices(params?: {
   min_rating?: number;
   service_area?: string;
   emergency_available?: boolean;
-  sort_by?: 'recommended' | 'price_low' | 'price_high' | 'rating' | 'newest' | 'popular';
+  sort_by?: 'recommended' | 'relevance' | 'price_low' | 'price_high' | 'rating' | 'newest' | 'popular';
   skip?: number;
   limit?: number;
+  facets?: boolean;
 }): Promise<ServicesResponse> {
   const searchParams = new URLSearchParams();
   
@@ -363,6 +374,9 @@ export async function getAllServices(params?: {
   if (params?.limit !== undefined) {
     searchParams.append('limit', String(params.limit));
   }
+  if (params?.facets) {
+    searchParams.append('facets', 'true');
+  }
   
   const queryString = searchParams.toString();
   const endpoint = `/services/${queryString ? `?${queryString}` : ''}`;
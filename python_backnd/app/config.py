@@ -11,6 +11,9 @@ class Settings(BaseSettings):
     # MongoDB
     MONGO_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "electronics_db"
+    # Reconcile indexes in each worker's startup; turn off when a deploy
+    # step runs `python -m app.indexes` instead
+    INDEX_SYNC_ON_STARTUP: bool = True
     
     # JWT Settings
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-in-production"
@@ -18,16 +21,93 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Authenticated user cache (per worker process)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    
+    # Decoded JWT cache (entries live until the token's exp)
+    TOKEN_CACHE_MAX_SIZE: int = 20000
+    
+    # Revoked access tokens are shared through MongoDB, polled per worker
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0
+    
+    # Per-user booking status counters (/api/bookings/my-bookings)
+    BOOKING_COUNTS_CACHE_TTL_SECONDS: int = 30
+    BOOKING_COUNTS_CACHE_MAX_SIZE: int = 10000
+    
+    # Catalog totals and facet counts per filter combination (GET /api/services);
+    # cleared on writes in the same worker, other workers lag by up to the TTL
+    CATALOG_FACET_CACHE_TTL_SECONDS: int = 60
+    CATALOG_FACET_CACHE_MAX_SIZE: int = 2000
+    
+    # Professional availability calendars (per worker process)
+    AVAILABILITY_SLOT_MINUTES: int = 60
+    AVAILABILITY_MAX_DAYS: int = 31
+    AVAILABILITY_INDEX_TTL_SECONDS: int = 300
+    AVAILABILITY_INDEX_MAX_SIZE: int = 5000
+    AVAILABILITY_SYNC_SECONDS: float = 5.0
+    
+    # Background scheduler (jobs persisted in scheduled_jobs)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_POLL_SECONDS: float = 30.0
+    SCHEDULER_BATCH_SIZE: int = 100
+    SCHEDULER_LEASE_SECONDS: float = 300.0
+    SCHEDULER_MAX_ATTEMPTS: int = 5
+    SCHEDULER_RETRY_BASE_SECONDS: float = 30.0
+    OFFER_EXPIRY_SWEEP_SECONDS: int = 300
+    BOOKING_SWEEP_SECONDS: int = 300
+    BOOKING_ESCALATE_AFTER_HOURS: float = 2.0
+    BOOKING_EXPIRE_AFTER_HOURS: float = 24.0
+    BOOKING_REMINDER_MINUTES: int = 60
+    BOOKING_TIMEZONE: str = "Asia/Kolkata"
+    CATALOG_RECONCILE_SECONDS: int = 3600
+    RANK_SCORE_SECONDS: int = 900
+    RANK_WINDOW_DAYS: int = 30
+    RANK_FRESHNESS_HALF_LIFE_DAYS: float = 30.0
+    
+    # Service full-text search (in-process BM25 index per worker)
+    SEARCH_REFRESH_SECONDS: float = 30.0
+    SEARCH_REBUILD_SECONDS: float = 3600.0
+    SEARCH_MAX_RESULTS: int = 1000
+    SUGGEST_REFRESH_SECONDS: float = 300.0
+    FUZZY_REFRESH_SECONDS: float = 120.0
+    FUZZY_MAX_RESULTS: int = 500
+    
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Rate limiting for auth/OTP endpoints ("memory" per worker, or "mongo" shared)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Comma-separated proxy addresses/CIDRs whose X-Forwarded-For is honoured
+    TRUSTED_PROXIES: str = ""
+    
+    # MongoDB query instrumentation; the X-DB-Queries / X-DB-Time headers
+    # expose internals to clients, so they are opt-in (development only)
+    DB_METRICS_ENABLED: bool = True
+    DB_METRICS_HEADERS: bool = False
+    DB_QUERY_BUDGET: int = 20
+    
     # OTP Settings
     OTP_EXPIRE_MINUTES: int = 10
     OTP_LENGTH: int = 6
     
     # Email Settings (for OTP via email)
-    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_HOST: Optional[str] = None  # falls back to SMTP_SERVER
     SMTP_PORT: int = 587
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     EMAIL_FROM: str = "noreply@electronics.com"
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    SMTP_IDLE_SECONDS: float = 60.0
+    
+    # Email outbox (background delivery with retries)
+    EMAIL_OUTBOX_MAX_QUEUE: int = 1000
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 2.0
     
     # Email Notification Settings
     SMTP_SERVER: str = "smtp.gmail.com"
@@ -50,6 +130,14 @@ class Settings(BaseSettings):
     FACEBOOK_APP_SECRET: Optional[str] = None
     FACEBOOK_REDIRECT_URI: str = "http://localhost:3000/auth/callback/facebook"
     
+    # Shared outbound HTTP client (OAuth provider calls)
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_SECONDS: float = 30.0
+    
     # Frontend URL
     FRONTEND_URL: str = "http://localhost:3000"
     
@@ -3,13 +3,19 @@ Database configuration and connection management for MongoDB
 """
 
 import os
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Optional
 
+from app.config import settings
+from app.db_metrics import command_listener
+
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     db = None
+    # Timings of the last connect_to_mongo(), shown on /health/metrics
+    startup: dict = {}
 
 
 db = Database()
@@ -22,13 +28,19 @@ DATABASE_NAME = os.getenv("DATABASE_NAME", "electronics_db")
 
 async def connect_to_mongo():
     """Connect to MongoDB"""
-    db.client = AsyncIOMotorClient(MONGO_URL)
+    started = time.perf_counter()
+    db.client = AsyncIOMotorClient(MONGO_URL, event_listeners=[command_listener])
     db.db = db.client[DATABASE_NAME]
     
-    # Create indexes for better performance
-    await create_indexes()
+    # Create indexes for better performance (skip when a deploy step runs
+    # `python -m app.indexes` instead)
+    if settings.INDEX_SYNC_ON_STARTUP:
+        await create_indexes()
+    else:
+        db.startup["indexes"] = {"skipped": True, "reason": "INDEX_SYNC_ON_STARTUP=false"}
     
-    print(f"Connected to MongoDB: {DATABASE_NAME}")
+    db.startup["connect_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Connected to MongoDB: {DATABASE_NAME} ({db.startup['connect_ms']}ms)")
 
 
 async def close_mongo_connection():
@@ -39,66 +51,18 @@ async def close_mongo_connection():
 
 
 async def create_indexes():
-    """Create database indexes"""
+    """Create any indexes from the catalog (app/indexes.py) that are missing"""
+    from app.indexes import ensure_indexes
+    
     try:
-        # Get existing indexes
-        existing_indexes = await db.db.users.index_information()
-        
-        # User collection indexes - only create if they don't exist
-        if "email_1" not in existing_indexes:
-            await db.db.users.create_index("email", unique=True, sparse=True)
-        
-        if "phone_1" not in existing_indexes:
-            await db.db.users.create_index("phone", unique=True, sparse=True)
-        
-        if "role_1" not in existing_indexes:
-            await db.db.users.create_index("role")
-        
-        # OTP collection indexes with TTL for auto-expiry
-        otp_indexes = await db.db.otps.index_information()
-        if "created_at_1" not in otp_indexes:
-            await db.db.otps.create_index("created_at", expireAfterSeconds=600)  # 10 min expiry
-        
-        if "identifier_1_purpose_1" not in otp_indexes:
-            await db.db.otps.create_index([("identifier", 1), ("purpose", 1)])
-        
-        # Password reset tokens with TTL
-        reset_indexes = await db.db.password_resets.index_information()
-        if "created_at_1" not in reset_indexes:
-            await db.db.password_resets.create_index("created_at", expireAfterSeconds=3600)  # 1 hour expiry
-        
-        # Notification collection indexes
-        notif_indexes = await db.db.notifications.index_information()
-        if "user_id_1" not in notif_indexes:
-            await db.db.notifications.create_index("user_id")
-        if "user_id_1_created_at_-1" not in notif_indexes:
-            await db.db.notifications.create_index([("user_id", 1), ("created_at", -1)])
-        if "user_id_1_is_read_1" not in notif_indexes:
-            await db.db.notifications.create_index([("user_id", 1), ("is_read", 1)])
-        if "expires_at_1" not in notif_indexes:
-            await db.db.notifications.create_index("expires_at", expireAfterSeconds=0)  # TTL index
-        
-        # Message collection indexes
-        msg_indexes = await db.db.messages.index_information()
-        if "conversation_id_1_created_at_-1" not in msg_indexes:
-            await db.db.messages.create_index([("conversation_id", 1), ("created_at", -1)])
-        if "sender_id_1" not in msg_indexes:
-            await db.db.messages.create_index("sender_id")
-        if "status_1" not in msg_indexes:
-            await db.db.messages.create_index("status")
-        
-        # Conversation collection indexes
-        conv_indexes = await db.db.conversations.index_information()
-        if "user_id_1_professional_id_1" not in conv_indexes:
-            await db.db.conversations.create_index([("user_id", 1), ("professional_id", 1)])
-        if "user_id_1_status_1" not in conv_indexes:
-            await db.db.conversations.create_index([("user_id", 1), ("status", 1)])
-        if "professional_id_1_status_1" not in conv_indexes:
-            await db.db.conversations.create_index([("professional_id", 1), ("status", 1)])
-        if "last_message_at_-1" not in conv_indexes:
-            await db.db.conversations.create_index([("last_message_at", -1)])
-        if "booking_id_1" not in conv_indexes:
-            await db.db.conversations.create_index("booking_id", sparse=True)
+        result = await ensure_indexes(db.db)
+        db.startup["indexes"] = result
+        for collection_name, names in result["created"].items():
+            print(f"Created indexes on {collection_name}: {', '.join(names)}")
+        state = "up to date, skipped" if result["skipped"] else "reconciled"
+        if result["drift"]:
+            state = "reconciled with drift, will retry next start"
+        print(f"Index catalog {result['version']} {state} in {result['elapsed_ms']}ms")
     
     except Exception as e:
         print(f"Warning: Error creating indexes: {e}")
@@ -130,6 +94,16 @@ def get_refresh_tokens_collection():
     return db.db.refresh_tokens
 
 
+def get_token_revocations_collection():
+    """Get token revocations collection"""
+    return db.db.token_revocations
+
+
+def get_bookings_collection():
+    """Get bookings collection"""
+    return db.db.bookings
+
+
 def get_verifications_collection():
     """Get verifications collection"""
     return db.db.verifications
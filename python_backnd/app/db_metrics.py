@@ -0,0 +1,89 @@
+"""
+MongoDB command instrumentation
+
+A pymongo CommandListener registered on the Motor client attributes every
+command to the request that issued it through a context variable. Motor
+runs pymongo calls on its executor with a copy of the caller's context,
+so the listener (which fires on that thread) sees the request's
+QueryStats object and updates it in place.
+"""
+
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+
+class QueryStats:
+    """Commands issued while handling one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.failed = 0
+        self.time_ms = 0.0
+        self.docs = 0
+        self.by_command: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, command_key: str, duration_micros: int, docs: int, failed: bool = False):
+        with self._lock:
+            self.queries += 1
+            self.time_ms += duration_micros / 1000
+            self.docs += docs
+            if failed:
+                self.failed += 1
+            self.by_command[command_key] = self.by_command.get(command_key, 0) + 1
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _reply_doc_count(reply: dict) -> int:
+    """Documents returned (reads) or affected (writes) by a command reply"""
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if "value" in reply:
+        # findAndModify
+        return 1 if reply["value"] is not None else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    """Routes command events to the QueryStats of the current request"""
+
+    def __init__(self):
+        self._collections: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.total_queries = 0
+        self.unattributed_queries = 0
+
+    def started(self, event):
+        if current_query_stats.get() is None:
+            return
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            with self._lock:
+                self._collections[event.request_id] = collection
+
+    def _finish(self, event, docs: int, failed: bool):
+        self.total_queries += 1
+        stats = current_query_stats.get()
+        if stats is None:
+            self.unattributed_queries += 1
+            return
+        with self._lock:
+            collection = self._collections.pop(event.request_id, None)
+        key = f"{event.command_name} {collection}" if collection else event.command_name
+        stats.record(key, event.duration_micros, docs, failed)
+
+    def succeeded(self, event):
+        self._finish(event, _reply_doc_count(event.reply), failed=False)
+
+    def failed(self, event):
+        self._finish(event, 0, failed=True)
+
+
+command_listener = RequestCommandListener()
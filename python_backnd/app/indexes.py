@@ -0,0 +1,449 @@
+"""
+Index catalog - every index the routes rely on, declared in one place
+
+INDEX_CATALOG lists the indexes per collection and reconcile_indexes()
+creates whatever is missing, all collections concurrently. The catalog's
+hash is recorded in schema_meta, so workers that start against an
+up-to-date database skip the work entirely. QUERY_SHAPES mirrors the
+filters and sorts the routes actually issue; check_query_plans() explains
+each one and reports any that would scan the whole collection.
+
+    python -m app.indexes                    # one-shot reconcile (deploy step)
+    python -m app.indexes --force            # reconcile even if version matches
+    python -m app.indexes --check            # reconcile, then fail on COLLSCAN
+    python -m app.indexes --check --database electronics_db_ci
+"""
+
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+# Records the catalog version last applied, so workers can skip reconciling
+SCHEMA_META_COLLECTION = "schema_meta"
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index: key pattern plus create_index options"""
+    keys: Tuple[Tuple[str, int], ...]
+    options: Dict = field(default_factory=dict, hash=False)
+
+    @property
+    def name(self) -> str:
+        """Name MongoDB generates for this key pattern"""
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.name, **self.options)
+
+
+def index(*keys, **options) -> IndexSpec:
+    """index("email", unique=True) or index(("user_id", 1), ("created_at", -1))"""
+    normalized = tuple((key, ASCENDING) if isinstance(key, str) else key for key in keys)
+    return IndexSpec(normalized, options)
+
+
+INDEX_CATALOG: Dict[str, List[IndexSpec]] = {
+    "users": [
+        index("email", unique=True, sparse=True),
+        index("phone", unique=True, sparse=True),
+        index("role"),
+        # Professional listings: search, top-rated, professions/cities
+        index(("role", ASCENDING), ("approval_status", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "otps": [
+        index("created_at", expireAfterSeconds=600),  # 10 min expiry
+        # One live OTP per identifier and purpose; create_otp upserts against it
+        # (replaces the old non-unique index of the same name on reconcile)
+        index("identifier", "purpose", unique=True),
+    ],
+    "refresh_tokens": [
+        # _id is the token hash; TTL drops expired tokens
+        index("expires_at", expireAfterSeconds=0),
+        index("user_id"),
+        index("family_id"),
+    ],
+    "token_revocations": [
+        # _id is the user id; entries outlive the oldest access token they revoke
+        index("expires_at", expireAfterSeconds=0),
+    ],
+    "rate_limits": [
+        index("expires_at", expireAfterSeconds=0),
+    ],
+    "password_resets": [
+        index("created_at", expireAfterSeconds=3600),  # 1 hour expiry
+    ],
+    "notifications": [
+        index("user_id"),
+        index(("user_id", ASCENDING), ("created_at", DESCENDING)),
+        index("user_id", "is_read"),
+        index("expires_at", expireAfterSeconds=0),
+    ],
+    "messages": [
+        index(("conversation_id", ASCENDING), ("created_at", DESCENDING)),
+        index("sender_id"),
+        index("status"),
+    ],
+    "conversations": [
+        index("user_id", "professional_id"),
+        index("user_id", "status"),
+        index("professional_id", "status"),
+        index(("last_message_at", DESCENDING)),
+        index("booking_id", sparse=True),
+    ],
+    "bookings": [
+        # my-bookings list (newest first) and status counters
+        index(("user_id", ASCENDING), ("created_at", DESCENDING)),
+        index("user_id", "status"),
+        # professional-bookings list, booking counts per professional
+        index(("professional_id", ASCENDING), ("created_at", DESCENDING)),
+        index("professional_id", "status"),
+        # Scheduler sweep for stale pending requests
+        index("status", "created_at"),
+        # Recent booking history for the recommended ranking job
+        index("created_at"),
+        # Availability sync: bookings changed since the last poll
+        index("updated_at"),
+        # One active booking per professional per slot (slot_key is unset on cancel)
+        index("professional_id", "slot_key", unique=True,
+              partialFilterExpression={"slot_key": {"$exists": True}}),
+    ],
+    "services": [
+        # Professional's own services and public per-professional listing
+        index(("professional_id", ASCENDING), ("created_at", DESCENDING)),
+        # Public catalog: equality on is_active + professional_active, one index per sort order
+        index(("is_active", ASCENDING), ("professional_active", ASCENDING),
+              ("rank_score", DESCENDING), ("rating", DESCENDING)),
+        index(("is_active", ASCENDING), ("professional_active", ASCENDING),
+              ("rating", DESCENDING), ("total_ratings", DESCENDING)),
+        index("is_active", "professional_active", "price"),
+        index(("is_active", ASCENDING), ("professional_active", ASCENDING), ("created_at", DESCENDING)),
+        index("is_active", "professional_active", "category"),
+        # Search index refresh pulls services changed since its last sync
+        index("updated_at"),
+    ],
+    "offers": [
+        index(("user_id", ASCENDING), ("created_at", DESCENDING)),
+        index(("professional_id", ASCENDING), ("created_at", DESCENDING)),
+        index("user_id", "professional_id", "status"),
+        # Scheduler expiry sweeps
+        index("status", "expires_at"),
+        index("status", "accepted_price_valid_until"),
+    ],
+    "scheduled_jobs": [
+        index("status", "run_at"),
+        index("status", "lease_until"),
+    ],
+    "applications": [
+        index(("applied_at", DESCENDING)),
+        index(("stage", ASCENDING), ("applied_at", DESCENDING)),
+        index(("vacancy_id", ASCENDING), ("applied_at", DESCENDING)),
+        index(("user_id", ASCENDING), ("applied_at", DESCENDING)),
+        index("vacancy_id", "email"),
+    ],
+    "vacancies": [
+        index(("status", ASCENDING), ("created_at", DESCENDING)),
+        index(("created_at", DESCENDING)),
+    ],
+    "user_subscriptions": [
+        index("user_id", "status"),
+    ],
+    "payment_history": [
+        index(("user_id", ASCENDING), ("transaction_date", DESCENDING)),
+        index("subscription_id"),
+    ],
+}
+
+
+def catalog_version() -> str:
+    """Short hash of the catalog; changes whenever an index is added or edited"""
+    canonical = [
+        (collection_name, [(spec.keys, sorted(spec.options.items())) for spec in specs])
+        for collection_name, specs in sorted(INDEX_CATALOG.items())
+    ]
+    return hashlib.sha256(repr(canonical).encode()).hexdigest()[:12]
+
+
+def _option_drift(spec: IndexSpec, info: dict) -> Dict:
+    """Options of an existing index that differ from the catalog: {option: actual}"""
+    return {option: info.get(option) for option, expected in spec.options.items()
+            if info.get(option) != expected}
+
+
+async def _reconcile_collection(database, collection_name: str, specs: List[IndexSpec]) -> List[str]:
+    collection = database[collection_name]
+    existing = await collection.index_information()
+
+    missing = []
+    for spec in specs:
+        info = existing.get(spec.name)
+        if info is None:
+            missing.append(spec)
+            continue
+        drift = _option_drift(spec, info)
+        if drift:
+            # Same key pattern, different options (e.g. made unique): the
+            # name is taken, so the old index has to go before the new one
+            print(f"Rebuilding index {collection_name}.{spec.name}: has {drift}, catalog expects {spec.options}")
+            await collection.drop_index(spec.name)
+            missing.append(spec)
+
+    if missing:
+        await collection.create_indexes([spec.model() for spec in missing])
+    return [spec.name for spec in missing]
+
+
+async def reconcile_indexes(database) -> Dict[str, List[str]]:
+    """
+    Create catalog indexes that do not exist yet, all collections at once.
+    Indexes that exist under the same name with different options are
+    dropped and rebuilt. Returns {collection: [created index names]}.
+    """
+    names = list(INDEX_CATALOG)
+    results = await asyncio.gather(*(
+        _reconcile_collection(database, name, INDEX_CATALOG[name]) for name in names
+    ))
+    return {name: created for name, created in zip(names, results) if created}
+
+
+async def find_drift(database) -> List[str]:
+    """Catalog indexes that are still missing or carry different options"""
+    names = list(INDEX_CATALOG)
+    existing = await asyncio.gather(*(database[name].index_information() for name in names))
+    drift = []
+    for collection_name, info in zip(names, existing):
+        for spec in INDEX_CATALOG[collection_name]:
+            if spec.name not in info:
+                drift.append(f"{collection_name}.{spec.name} missing")
+                continue
+            options = _option_drift(spec, info[spec.name])
+            if options:
+                drift.append(f"{collection_name}.{spec.name} has {options}")
+    return drift
+
+
+async def ensure_indexes(database, force: bool = False) -> dict:
+    """
+    Reconcile unless the database already records the current catalog
+    version (another worker or the CLI got there first). The version is
+    only recorded once every catalog index exists with its catalog
+    options; otherwise the drift is returned and the next start retries.
+    """
+    started = time.perf_counter()
+    version = catalog_version()
+    meta = database[SCHEMA_META_COLLECTION]
+
+    if not force:
+        recorded = await meta.find_one({"_id": "indexes"}, {"version": 1})
+        if recorded and recorded.get("version") == version:
+            return {
+                "version": version,
+                "skipped": True,
+                "created": {},
+                "drift": [],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    created = await reconcile_indexes(database)
+    drift = await find_drift(database)
+    if drift:
+        print(f"Warning: index catalog {version} not recorded, indexes still differ: {'; '.join(drift)}")
+    else:
+        await meta.update_one(
+            {"_id": "indexes"},
+            {"$set": {"version": version, "applied_at": datetime.utcnow()}},
+            upsert=True
+        )
+    return {
+        "version": version,
+        "skipped": False,
+        "created": created,
+        "drift": drift,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# ============ QUERY PLAN CHECK ============
+
+@dataclass(frozen=True)
+class QueryShape:
+    """A filter/sort a route issues, with representative values"""
+    route: str
+    collection: str
+    filter: Dict
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+
+
+_USER = "000000000000000000000001"
+_PRO = "000000000000000000000002"
+
+QUERY_SHAPES: List[QueryShape] = [
+    # Bookings
+    QueryShape("GET /api/bookings/my-bookings", "bookings",
+               {"user_id": _USER}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/bookings/my-bookings?status", "bookings",
+               {"user_id": _USER, "status": "pending"}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/bookings/my-bookings (counters)", "bookings",
+               {"user_id": _USER, "status": {"$in": ["pending", "confirmed"]}}),
+    QueryShape("availability calendar load", "bookings",
+               {"professional_id": _PRO, "status": {"$in": ["pending", "confirmed", "accepted", "ongoing", "completed"]},
+                "scheduled_date": {"$gte": "2024-01-01"}}),
+    QueryShape("GET /api/bookings/professional-bookings", "bookings",
+               {"professional_id": _PRO}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/professionals/{id} (booking count)", "bookings",
+               {"professional_id": _PRO, "status": {"$in": ["completed", "confirmed"]}}),
+
+    # Services
+    QueryShape("GET /api/services/my-services", "services",
+               {"professional_id": ObjectId(_PRO)}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/services/professional/{id}", "services",
+               {"professional_id": ObjectId(_PRO), "is_active": True}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/services (recommended)", "services",
+               {"is_active": True, "professional_active": True},
+               (("rank_score", DESCENDING), ("rating", DESCENDING))),
+    QueryShape("GET /api/services (rating)", "services",
+               {"is_active": True, "professional_active": True},
+               (("rating", DESCENDING), ("total_ratings", DESCENDING))),
+    QueryShape("GET /api/services (price_low)", "services",
+               {"is_active": True, "professional_active": True, "price": {"$gte": 100}},
+               (("price", ASCENDING),)),
+    QueryShape("GET /api/services (newest)", "services",
+               {"is_active": True, "professional_active": True}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/services (categories)", "services",
+               {"is_active": True, "professional_active": True, "category": {"$exists": True}}),
+    QueryShape("service search refresh", "services",
+               {"updated_at": {"$gte": datetime(2024, 1, 1)}}),
+    QueryShape("professional_active fan-out", "services",
+               {"professional_id": ObjectId(_PRO), "professional_active": {"$ne": True}}),
+
+    # Offers
+    QueryShape("GET /api/offers/my-offers", "offers",
+               {"user_id": _USER}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/offers/received-offers", "offers",
+               {"professional_id": _PRO}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/offers/check-accepted/{id}", "offers",
+               {"user_id": _USER, "professional_id": _PRO, "status": "accepted"}),
+    QueryShape("scheduler: expire pending offers", "offers",
+               {"status": "pending", "expires_at": {"$lte": datetime(2024, 1, 1)}}),
+
+    # Scheduler
+    QueryShape("scheduler: stale pending bookings", "bookings",
+               {"status": "pending", "created_at": {"$lte": datetime(2024, 1, 1)}}),
+    QueryShape("availability sync", "bookings",
+               {"updated_at": {"$gte": datetime(2024, 1, 1)}}),
+    QueryShape("scheduler: recent bookings for rank_score", "bookings",
+               {"created_at": {"$gte": datetime(2024, 1, 1)}, "service_id": {"$type": "string"}}),
+    QueryShape("scheduler: refill due jobs", "scheduled_jobs",
+               {"status": "scheduled", "run_at": {"$lte": datetime(2024, 1, 1)}}, (("run_at", ASCENDING),)),
+
+    # Careers
+    QueryShape("GET /api/applications/admin/list", "applications",
+               {}, (("applied_at", DESCENDING),)),
+    QueryShape("GET /api/applications/admin/list?stage", "applications",
+               {"stage": "Under Review"}, (("applied_at", DESCENDING),)),
+    QueryShape("GET /api/applications/user/my-applications", "applications",
+               {"user_id": ObjectId(_USER)}, (("applied_at", DESCENDING),)),
+    QueryShape("POST /api/applications (duplicate check)", "applications",
+               {"vacancy_id": ObjectId(_PRO), "email": "a@example.com"}),
+    QueryShape("GET /api/vacancies", "vacancies",
+               {"status": "open"}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/vacancies/admin/list", "vacancies",
+               {}, (("created_at", DESCENDING),)),
+
+    # Subscriptions
+    QueryShape("GET /api/subscriptions/my-subscription", "user_subscriptions",
+               {"user_id": _USER, "status": "active"}),
+    QueryShape("GET /api/subscriptions/payment-history", "payment_history",
+               {"user_id": _USER}, (("transaction_date", DESCENDING),)),
+    QueryShape("GET /api/subscriptions/receipt/{id}", "payment_history",
+               {"subscription_id": _USER}),
+
+    # Users / professionals
+    QueryShape("GET /api/professionals/search", "users",
+               {"role": "professional", "is_active": True, "is_suspended": False, "approval_status": "approved"},
+               (("created_at", DESCENDING),)),
+
+    # Notifications / messages
+    QueryShape("GET /api/notifications", "notifications",
+               {"user_id": _USER}, (("created_at", DESCENDING),)),
+    QueryShape("GET /api/messages/conversations/{id}/messages", "messages",
+               {"conversation_id": _USER}, (("created_at", DESCENDING),)),
+]
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Flatten the stage names of a (possibly nested) query plan"""
+    stages = [plan.get("stage", "")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_shape(database, shape: QueryShape) -> List[str]:
+    """Return the winning plan's stages for a query shape"""
+    find = {"find": shape.collection, "filter": shape.filter, "limit": 20}
+    if shape.sort:
+        find["sort"] = dict(shape.sort)
+
+    result = await database.command({"explain": find, "verbosity": "queryPlanner"})
+    winning = result["queryPlanner"]["winningPlan"]
+    # Slot-based engine (6.0+) nests the classic plan under queryPlan
+    return _plan_stages(winning.get("queryPlan", winning))
+
+
+async def check_query_plans(database) -> List[Tuple[QueryShape, List[str]]]:
+    """Explain every query shape; return those whose plan has a COLLSCAN"""
+    failures = []
+    for shape in QUERY_SHAPES:
+        stages = await explain_shape(database, shape)
+        if "COLLSCAN" in stages:
+            failures.append((shape, stages))
+    return failures
+
+
+async def _main(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.config import settings
+
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    database = client[args.database or settings.DATABASE_NAME]
+    try:
+        result = await ensure_indexes(database, force=args.force)
+        for collection_name, names in result["created"].items():
+            print(f"Created {collection_name}: {', '.join(names)}")
+        state = "already current" if result["skipped"] else "applied"
+        if result["drift"]:
+            state = "NOT applied (drift remains)"
+        print(f"Index catalog {result['version']} {state} in {result['elapsed_ms']}ms")
+        if result["drift"]:
+            return 1
+
+        if not args.check:
+            return 0
+
+        failures = await check_query_plans(database)
+        for shape, stages in failures:
+            print(f"COLLSCAN  {shape.route}  ({shape.collection}: {' <- '.join(stages)})")
+        print(f"{len(QUERY_SHAPES) - len(failures)}/{len(QUERY_SHAPES)} query shapes use an index")
+        return 1 if failures else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the catalog")
+    parser.add_argument("--force", action="store_true", help="reconcile even if the recorded version matches")
+    parser.add_argument("--check", action="store_true", help="explain every route query shape and fail on COLLSCAN")
+    parser.add_argument("--database", help="database name (defaults to DATABASE_NAME)")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
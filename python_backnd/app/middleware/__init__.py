@@ -10,3 +10,5 @@ from app.middleware.rbac import (
     RolePermissions,
     check_permission,
 )
+from app.middleware.rate_limit import RateLimit, rate_limiter, limit_by_ip
+from app.middleware.db_metrics import DBMetricsMiddleware, route_query_totals
@@ -0,0 +1,102 @@
+"""
+Per-request MongoDB query accounting
+
+Sets up a QueryStats for each HTTP request, adds X-DB-Queries / X-DB-Time
+response headers (only when DB_METRICS_HEADERS is set; off by default) and
+warns when a route issues more than DB_QUERY_BUDGET commands.
+"""
+
+from typing import Dict
+
+from app.config import settings
+from app.db_metrics import QueryStats, current_query_stats, command_listener
+
+
+class RouteQueryTotals:
+    """Aggregate query counts per route template for /health/metrics"""
+
+    def __init__(self):
+        self.routes: Dict[str, dict] = {}
+
+    def add(self, route: str, stats: QueryStats):
+        totals = self.routes.get(route)
+        if totals is None:
+            totals = self.routes[route] = {
+                "requests": 0, "queries": 0, "max_queries": 0, "time_ms": 0.0, "over_budget": 0
+            }
+        totals["requests"] += 1
+        totals["queries"] += stats.queries
+        totals["max_queries"] = max(totals["max_queries"], stats.queries)
+        totals["time_ms"] += stats.time_ms
+        if stats.queries > settings.DB_QUERY_BUDGET:
+            totals["over_budget"] += 1
+
+    def stats(self, limit: int = 20) -> dict:
+        """Busiest routes by average queries per request"""
+        ranked = sorted(
+            self.routes.items(),
+            key=lambda item: item[1]["queries"] / item[1]["requests"],
+            reverse=True
+        )[:limit]
+        return {
+            "total_queries": command_listener.total_queries,
+            "unattributed_queries": command_listener.unattributed_queries,
+            "query_budget": settings.DB_QUERY_BUDGET,
+            "routes": {
+                route: {
+                    "requests": totals["requests"],
+                    "avg_queries": round(totals["queries"] / totals["requests"], 2),
+                    "max_queries": totals["max_queries"],
+                    "avg_time_ms": round(totals["time_ms"] / totals["requests"], 2),
+                    "over_budget": totals["over_budget"],
+                }
+                for route, totals in ranked
+            },
+        }
+
+
+route_query_totals = RouteQueryTotals()
+
+
+def _route_name(scope) -> str:
+    # Use the route template so /bookings/{id} is one entry, not one per id
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "(unmatched)"
+    return f"{scope.get('method', '')} {path}"
+
+
+class DBMetricsMiddleware:
+    """ASGI middleware attributing MongoDB commands to the current request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.DB_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DB_METRICS_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                headers.append((b"x-db-time", f"{stats.time_ms:.1f}ms".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+            route = _route_name(scope)
+            route_query_totals.add(route, stats)
+            if stats.queries > settings.DB_QUERY_BUDGET:
+                top = sorted(stats.by_command.items(), key=lambda item: item[1], reverse=True)[:5]
+                breakdown = ", ".join(f"{key} x{count}" for key, count in top)
+                print(
+                    f"WARNING: {route} made {stats.queries} DB queries "
+                    f"({stats.time_ms:.1f}ms, {stats.docs} docs), budget {settings.DB_QUERY_BUDGET}: {breakdown}"
+                )
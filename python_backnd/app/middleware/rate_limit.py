@@ -0,0 +1,213 @@
+"""
+Rate limiting for auth and OTP endpoints
+
+Every worker keeps an in-memory token bucket per key, so a rejected
+request never leaves the process. When RATE_LIMIT_BACKEND is "mongo",
+requests that pass the local bucket are also counted in a shared
+sliding window so limits hold across workers. Behind a reverse proxy,
+list it in TRUSTED_PROXIES so per-IP limits key on the real client.
+"""
+
+import ipaddress
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.database import get_database
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Allow `capacity` requests per `period` seconds, refilled continuously"""
+    capacity: int
+    period: float
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period
+
+
+class MemoryBucketStore:
+    """
+    Token buckets keyed by string. Each bucket is [tokens, updated_at,
+    full_at]; buckets that have refilled completely carry no state and
+    are dropped by periodic compaction.
+    """
+
+    def __init__(self, compact_interval: float = 60.0):
+        self.compact_interval = compact_interval
+        self._buckets: Dict[str, List[float]] = {}
+        self._next_compaction = time.monotonic() + compact_interval
+
+    def consume(self, key: str, rule: RateLimit, now: float) -> float:
+        """Take one token; return 0 if allowed, else seconds until retry"""
+        if now >= self._next_compaction:
+            self.compact(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(rule.capacity)
+        else:
+            tokens = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.refill_rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / rule.refill_rate
+
+        full_at = now + (rule.capacity - tokens) / rule.refill_rate
+        self._buckets[key] = [tokens, now, full_at]
+        return retry_after
+
+    def compact(self, now: float):
+        """Drop buckets that are back to full capacity"""
+        idle = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in idle:
+            del self._buckets[key]
+        self._next_compaction = now + self.compact_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class MongoWindowStore:
+    """
+    Shared sliding-window counter: per-key fixed windows in the
+    rate_limits collection, with the previous window weighted by how much
+    of it still overlaps the sliding window. Expired windows are removed
+    by a TTL index on expires_at.
+    """
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+
+    async def consume(self, key: str, rule: RateLimit, now: float) -> float:
+        """Count one request; return 0 if allowed, else seconds until retry"""
+        collection = get_database()[self.collection_name]
+        window = int(now // rule.period)
+        window_start = window * rule.period
+
+        current = await collection.find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "expires_at": datetime.utcfromtimestamp(window_start + 2 * rule.period)
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        count = current["count"]
+        if count > rule.capacity:
+            return window_start + rule.period - now
+
+        previous = await collection.find_one({"_id": f"{key}:{window - 1}"}, {"count": 1})
+        overlap = 1 - (now - window_start) / rule.period
+        weighted = count + (previous["count"] if previous else 0) * overlap
+        if weighted > rule.capacity:
+            return max(1.0, rule.period * overlap / 2)
+
+        return 0.0
+
+
+class RateLimiter:
+    """Local token buckets, optionally backed by a shared store"""
+
+    def __init__(self, shared_store: Optional[MongoWindowStore] = None):
+        self.local = MemoryBucketStore()
+        self.shared = shared_store
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, scope: str, key: str, rule: RateLimit):
+        """Raise 429 if `key` has exceeded `rule` within `scope`"""
+        if not settings.RATE_LIMIT_ENABLED or not key:
+            return
+
+        full_key = f"{scope}:{key}"
+        retry_after = self.local.consume(full_key, rule, time.monotonic())
+
+        if not retry_after and self.shared is not None:
+            retry_after = await self.shared.consume(full_key, rule, time.time())
+
+        if retry_after:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+        self.allowed += 1
+
+    def stats(self) -> dict:
+        """Return bucket count and allow/reject counters"""
+        return {
+            "backend": "mongo" if self.shared is not None else "memory",
+            "buckets": len(self.local),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+rate_limiter = RateLimiter(
+    shared_store=MongoWindowStore() if settings.RATE_LIMIT_BACKEND == "mongo" else None
+)
+
+
+def _parse_networks(value: str) -> list:
+    networks = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return networks
+
+
+TRUSTED_PROXY_NETWORKS = _parse_networks(settings.TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXY_NETWORKS)
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Client address for per-IP limits. X-Forwarded-For is only believed
+    when the connection comes from a trusted proxy: the hops are walked
+    from the right and the first address that is not a trusted proxy is
+    the client (anything further left is client-supplied and spoofable).
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not TRUSTED_PROXY_NETWORKS or not _is_trusted_proxy(peer):
+        return peer
+
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def limit_by_ip(scope: str, rule: RateLimit):
+    """
+    Dependency that rate limits a route per client IP.
+
+    Usage:
+        @router.post("/login", dependencies=[Depends(limit_by_ip("login", RateLimit(20, 60)))])
+    """
+    async def ip_limiter(request: Request):
+        await rate_limiter.check(f"{scope}:ip", get_client_ip(request), rule)
+
+    return ip_limiter
@@ -6,19 +6,25 @@ from fastapi import HTTPException, status, Depends
 from typing import List
 
 from app.models.user import UserRole
-from app.utils.security import get_current_user
+from app.utils.security import get_current_user, get_current_user_claims
 
 
-def require_roles(allowed_roles: List[UserRole]):
+def require_roles(allowed_roles: List[UserRole], claims_only: bool = False):
     """
     Dependency that checks if the current user has one of the allowed roles.
     
+    With claims_only=True the role is read from the signed access token
+    instead of the user document, skipping the database lookup. The
+    returned user then only carries _id, name, email, role and is_active.
+    
     Usage:
         @router.get("/admin-only")
         async def admin_route(user = Depends(require_roles([UserRole.ADMIN]))):
             return {"message": "Admin access granted"}
     """
-    async def role_checker(current_user: dict = Depends(get_current_user)):
+    user_dependency = get_current_user_claims if claims_only else get_current_user
+    
+    async def role_checker(current_user: dict = Depends(user_dependency)):
         user_role = current_user.get("role", "user")
         
         # Convert string roles to enum for comparison
@@ -178,16 +184,21 @@ class RolePermissions:
         return cls.has_permission(role, "view_reports") or cls.has_permission(role, "view_own_reports")
 
 
-def check_permission(permission: str):
+def check_permission(permission: str, claims_only: bool = False):
     """
     Dependency that checks if user has specific permission.
     
+    With claims_only=True the role is taken from the access token claims
+    (see require_roles).
+    
     Usage:
         @router.get("/reports")
         async def view_reports(user = Depends(check_permission("view_reports"))):
             return {"data": "reports"}
     """
-    async def permission_checker(current_user: dict = Depends(get_current_user)):
+    user_dependency = get_current_user_claims if claims_only else get_current_user
+    
+    async def permission_checker(current_user: dict = Depends(user_dependency)):
         user_role = current_user.get("role", "user")
         
         if not RolePermissions.has_permission(user_role, permission):
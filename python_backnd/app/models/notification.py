@@ -22,6 +22,8 @@ class NotificationType(str, Enum):
     PROFESSIONAL_ON_WAY = "professional_on_way"
     PROFESSIONAL_ARRIVED = "professional_arrived"
     OTP_GENERATED = "otp_generated"
+    BOOKING_REMINDER = "booking_reminder"
+    BOOKING_EXPIRED = "booking_expired"
     
     # Booking related - Professional receives
     NEW_BOOKING_REQUEST = "new_booking_request"
@@ -29,6 +31,7 @@ class NotificationType(str, Enum):
     BOOKING_RESCHEDULED_BY_USER = "booking_rescheduled_by_user"
     USER_SHARED_OTP = "user_shared_otp"
     NEW_REVIEW_RECEIVED = "new_review_received"
+    BOOKING_RESPONSE_OVERDUE = "booking_response_overdue"
     
     # Payment related
     PAYMENT_RECEIVED = "payment_received"
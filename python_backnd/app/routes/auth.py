@@ -2,7 +2,8 @@
 Authentication routes - Signup, Login, OTP, Password Reset
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Body
+from typing import Optional
 from datetime import datetime
 from bson import ObjectId
 
@@ -14,27 +15,42 @@ from app.schemas.auth import (
     ForgotPasswordRequest, ForgotPasswordResponse,
     ResetPasswordRequest, ResetPasswordResponse,
     SetPasswordRequest, SetPasswordResponse,
-    RefreshTokenRequest, TokenResponse,
+    RefreshTokenRequest, TokenResponse, LogoutRequest,
     MessageResponse
 )
 from app.models.user import UserRole, AuthProvider, user_helper
 from app.models.otp import OTPPurpose, OTPType
 from app.utils.security import (
-    hash_password, verify_password, 
+    hash_password_async, verify_password_async,
     create_tokens_for_user, refresh_access_token,
-    get_current_user, get_optional_current_user
+    get_current_user, get_optional_current_user,
+    invalidate_user_cache, revoke_user_tokens
 )
+from app.utils.refresh_tokens import revoke_refresh_token, revoke_user_refresh_tokens
 from app.utils.otp import create_otp, verify_otp, send_otp
+from app.middleware.rate_limit import RateLimit, rate_limiter, limit_by_ip
 
 
 router = APIRouter()
 
+# Rate limits for credential and OTP endpoints (burst capacity per period in seconds)
+LOGIN_IP_LIMIT = RateLimit(capacity=20, period=60)
+LOGIN_IDENTIFIER_LIMIT = RateLimit(capacity=10, period=900)
+OTP_IP_LIMIT = RateLimit(capacity=10, period=60)
+OTP_IDENTIFIER_LIMIT = RateLimit(capacity=5, period=900)
+
 
 # ============ SIGNUP ============
 
-@router.post("/signup", response_model=SignupResponse)
+@router.post(
+    "/signup",
+    response_model=SignupResponse,
+    dependencies=[Depends(limit_by_ip("otp", OTP_IP_LIMIT))]
+)
 async def signup(request: SignupRequest):
     """Register a new user with email/phone and password"""
+    await rate_limiter.check("otp", request.phone, OTP_IDENTIFIER_LIMIT)
+    
     users = get_users_collection()
     print("Users collection:", users)
     print(users)
@@ -64,7 +80,7 @@ async def signup(request: SignupRequest):
         "name": request.name,
         "email": email,
         "phone": request.phone,
-        "hashed_password": hash_password(request.password),
+        "hashed_password": await hash_password_async(request.password),
         "role": UserRole.USER.value,
         "auth_provider": AuthProvider.LOCAL.value,
     }
@@ -147,7 +163,7 @@ async def verify_signup(request: VerifyOTPRequest):
         )
         
         # Generate tokens
-        tokens = create_tokens_for_user(existing_user)
+        tokens = await create_tokens_for_user(existing_user)
         
         return LoginResponse(
             message="Login successful",
@@ -174,7 +190,7 @@ async def verify_signup(request: VerifyOTPRequest):
     user_doc["_id"] = result.inserted_id
     
     # Generate tokens
-    tokens = create_tokens_for_user(user_doc)
+    tokens = await create_tokens_for_user(user_doc)
     
     return LoginResponse(
         message="Account created successfully",
@@ -188,9 +204,15 @@ async def verify_signup(request: VerifyOTPRequest):
 
 # ============ LOGIN ============
 
-@router.post("/login", response_model=LoginResponse)
+@router.post(
+    "/login",
+    response_model=LoginResponse,
+    dependencies=[Depends(limit_by_ip("login", LOGIN_IP_LIMIT))]
+)
 async def login(request: LoginRequest):
     """Login with email/phone and password"""
+    await rate_limiter.check("login", request.identifier, LOGIN_IDENTIFIER_LIMIT)
+    
     users = get_users_collection()
     
     # Find user by email or phone
@@ -213,7 +235,7 @@ async def login(request: LoginRequest):
         )
     
     # Verify password
-    if not verify_password(request.password, user["hashed_password"]):
+    if not await verify_password_async(request.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -259,7 +281,7 @@ async def login(request: LoginRequest):
     )
     
     # Generate tokens
-    tokens = create_tokens_for_user(user)
+    tokens = await create_tokens_for_user(user)
     
     return LoginResponse(
         message="Login successful",
@@ -271,9 +293,15 @@ async def login(request: LoginRequest):
     )
 
 
-@router.post("/login/otp/send", response_model=MessageResponse)
+@router.post(
+    "/login/otp/send",
+    response_model=MessageResponse,
+    dependencies=[Depends(limit_by_ip("otp", OTP_IP_LIMIT))]
+)
 async def send_login_otp(request: LoginWithOTPRequest):
     """Send OTP for login"""
+    await rate_limiter.check("otp", request.identifier, OTP_IDENTIFIER_LIMIT)
+    
     users = get_users_collection()
     
     # Find user by email or phone
@@ -371,7 +399,7 @@ async def verify_login_otp(request: VerifyOTPRequest):
     )
     
     # Generate tokens
-    tokens = create_tokens_for_user(user)
+    tokens = await create_tokens_for_user(user)
     
     return LoginResponse(
         message="Login successful",
@@ -385,9 +413,15 @@ async def verify_login_otp(request: VerifyOTPRequest):
 
 # ============ PASSWORD RESET ============
 
-@router.post("/forgot-password", response_model=ForgotPasswordResponse)
+@router.post(
+    "/forgot-password",
+    response_model=ForgotPasswordResponse,
+    dependencies=[Depends(limit_by_ip("otp", OTP_IP_LIMIT))]
+)
 async def forgot_password(request: ForgotPasswordRequest):
     """Send OTP for password reset"""
+    await rate_limiter.check("otp", request.identifier, OTP_IDENTIFIER_LIMIT)
+    
     users = get_users_collection()
     
     # Find user
@@ -447,7 +481,7 @@ async def reset_password(request: ResetPasswordRequest):
     users = get_users_collection()
     
     # Update password
-    new_hashed_password = hash_password(request.new_password)
+    new_hashed_password = await hash_password_async(request.new_password)
     
     await users.update_one(
         {"_id": ObjectId(user_data["user_id"])},
@@ -458,6 +492,8 @@ async def reset_password(request: ResetPasswordRequest):
             }
         }
     )
+    invalidate_user_cache(user_data["user_id"])
+    await revoke_user_refresh_tokens(user_data["user_id"])
     
     return ResetPasswordResponse(
         message="Password reset successfully",
@@ -467,9 +503,15 @@ async def reset_password(request: ResetPasswordRequest):
 
 # ============ OTP GENERAL ============
 
-@router.post("/otp/send", response_model=MessageResponse)
+@router.post(
+    "/otp/send",
+    response_model=MessageResponse,
+    dependencies=[Depends(limit_by_ip("otp", OTP_IP_LIMIT))]
+)
 async def send_otp_general(request: SendOTPRequest):
     """General OTP sending endpoint"""
+    await rate_limiter.check("otp", request.identifier, OTP_IDENTIFIER_LIMIT)
+    
     otp_type = OTPType.EMAIL if request.otp_type == "email" else OTPType.PHONE
     
     purpose_map = {
@@ -496,7 +538,11 @@ async def send_otp_general(request: SendOTPRequest):
     )
 
 
-@router.post("/otp/resend", response_model=MessageResponse)
+@router.post(
+    "/otp/resend",
+    response_model=MessageResponse,
+    dependencies=[Depends(limit_by_ip("otp", OTP_IP_LIMIT))]
+)
 async def resend_otp(request: ResendOTPRequest):
     """Resend OTP"""
     return await send_otp_general(SendOTPRequest(
@@ -543,7 +589,7 @@ async def set_password(request: SetPasswordRequest):
     verification = await get_users_collection().find_one({"phone": user["phone"]})
     
     # Hash and update password
-    hashed_password = hash_password(request.password)
+    hashed_password = await hash_password_async(request.password)
     
     result = await users.update_one(
         {"_id": user["_id"]},
@@ -555,6 +601,7 @@ async def set_password(request: SetPasswordRequest):
             }
         }
     )
+    invalidate_user_cache(user["_id"])
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -580,11 +627,18 @@ async def refresh_token(request: RefreshTokenRequest):
 # ============ LOGOUT ============
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout(current_user: dict = Depends(get_current_user)):
-    """Logout user (client should discard tokens)"""
-    # In a more complete implementation, you could:
-    # 1. Add the token to a blacklist
-    # 2. Delete refresh token from database
+async def logout(
+    request: Optional[LogoutRequest] = Body(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Logout user - revokes the given refresh token, or every session with all_devices"""
+    user_id = str(current_user["_id"])
+    
+    if request and request.all_devices:
+        await revoke_user_refresh_tokens(user_id)
+        await revoke_user_tokens(user_id)
+    elif request and request.refresh_token:
+        await revoke_refresh_token(request.refresh_token, user_id)
     
     return MessageResponse(
         message="Logged out successfully",
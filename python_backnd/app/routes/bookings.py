@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional, List
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from ..database import db
-from ..utils.security import get_current_user
+from ..utils.security import get_current_user, get_current_user_claims
 from ..socket_manager import (
     emit_booking_confirmed,
     emit_booking_accepted,
@@ -13,6 +15,11 @@ from ..socket_manager import (
     emit_booking_cancelled
 )
 from ..services.notification_service import NotificationService
+from ..services.ratings import record_rating
+from ..services.booking_state import ACTIVE_STATES, TERMINAL_STATES, apply_transition, can_transition
+from ..services.availability import availability_index, parse_date, parse_time, slot_key
+from ..services.jobs import REMINDER_STATES, schedule_booking_reminder
+from ..services.booking_counts import status_counts_cache, status_counts_from_groups, invalidate_status_counts
 import random
 import string
 import asyncio
@@ -123,6 +130,64 @@ def booking_helper(booking, professional=None, service=None, user=None) -> dict:
     return result
 
 
+# ============ ENRICHMENT PIPELINE ============
+
+# Exactly the fields booking_helper renders, so lookups do not drag whole
+# user documents (addresses, favorites, approval_data) over the wire
+BOOKING_FIELDS = {
+    "booking_id_display": 1, "service_type": 1, "service_name": 1, "category": 1,
+    "status": 1, "scheduled_date": 1, "scheduled_time": 1, "address": 1, "price": 1,
+    "payment_status": 1, "payment_method": 1, "otp": 1, "notes": 1, "rating": 1,
+    "review": 1, "cancellation_reason": 1, "cancelled_by": 1, "refund_status": 1,
+    "created_at": 1, "updated_at": 1, "accepted_at": 1, "started_at": 1,
+    "completed_at": 1, "otp_requested_at": 1,
+    "user_id": 1, "professional_id": 1, "service_id": 1,
+}
+PROFESSIONAL_FIELDS = {"name": 1, "profile_image": 1, "rating": 1, "phone": 1, "category": 1}
+SERVICE_FIELDS = {"name": 1, "category": 1, "price": 1, "duration": 1, "image": 1}
+CUSTOMER_FIELDS = {"name": 1, "phone": 1, "email": 1}
+
+
+def _lookup_one(local_field: str, collection: str, fields: dict, as_field: str) -> List[dict]:
+    """Stages joining one document by a string-or-ObjectId id field"""
+    oid_field = f"_{as_field}_oid"
+    return [
+        {"$set": {oid_field: {"$convert": {
+            "input": f"${local_field}", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": collection,
+            "localField": oid_field,
+            "foreignField": "_id",
+            "pipeline": [{"$project": fields}],
+            "as": as_field,
+        }},
+        {"$set": {as_field: {"$first": f"${as_field}"}}},
+        {"$unset": oid_field},
+    ]
+
+
+def booking_enrichment_stages(professional: bool = True, service: bool = True, user: bool = False) -> List[dict]:
+    """
+    Aggregation stages that trim a booking to what booking_helper reads and
+    attach the related professional/service/user as embedded documents.
+    Append after $match/$sort/$limit; render with booking_from_pipeline().
+    """
+    stages = [{"$project": BOOKING_FIELDS}]
+    if professional:
+        stages += _lookup_one("professional_id", "users", PROFESSIONAL_FIELDS, "professional")
+    if service:
+        stages += _lookup_one("service_id", "services", SERVICE_FIELDS, "service")
+    if user:
+        stages += _lookup_one("user_id", "users", CUSTOMER_FIELDS, "user")
+    return stages
+
+
+def booking_from_pipeline(doc: dict) -> dict:
+    """booking_helper for a document produced by booking_enrichment_stages()"""
+    return booking_helper(doc, doc.get("professional"), doc.get("service"), doc.get("user"))
+
+
 def generate_otp():
     """Generate a 5-digit OTP"""
     return ''.join(random.choices(string.digits, k=5))
@@ -140,8 +205,6 @@ async def get_user_bookings(
     """Get all bookings for the current user"""
     try:
         bookings_collection = db.db.get_collection("bookings")
-        users_collection = db.db.get_collection("users")
-        services_collection = db.db.get_collection("services")
         
         user_id = str(current_user["_id"])
         
@@ -161,45 +224,40 @@ async def get_user_bookings(
                 {"service_name": {"$regex": search, "$options": "i"}},
             ]
         
-        # Get total count
-        total = await bookings_collection.count_documents(query)
-        
-        # Get bookings with pagination, sorted by created_at desc
-        cursor = bookings_collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        bookings = await cursor.to_list(length=limit)
-        
-        # Enrich with professional and service details
-        result_bookings = []
-        for booking in bookings:
-            professional = None
-            service = None
-            
-            # Get professional details
-            if booking.get("professional_id"):
-                try:
-                    professional = await users_collection.find_one({"_id": ObjectId(booking["professional_id"])})
-                except:
-                    pass
-            
-            # Get service details
-            if booking.get("service_id"):
-                try:
-                    service = await services_collection.find_one({"_id": ObjectId(booking["service_id"])})
-                except:
-                    pass
-            
-            result_bookings.append(booking_helper(booking, professional, service))
-        
-        # Get counts by status
-        status_counts = {
-            "all": total,
-            "pending": await bookings_collection.count_documents({"user_id": user_id, "status": "pending"}),
-            "confirmed": await bookings_collection.count_documents({"user_id": user_id, "status": "confirmed"}),
-            "upcoming": await bookings_collection.count_documents({"user_id": user_id, "status": {"$in": ["pending", "confirmed"]}}),
-            "ongoing": await bookings_collection.count_documents({"user_id": user_id, "status": "ongoing"}),
-            "completed": await bookings_collection.count_documents({"user_id": user_id, "status": "completed"}),
-            "cancelled": await bookings_collection.count_documents({"user_id": user_id, "status": "cancelled"}),
+        # One aggregation returns the enriched page and its total; on a
+        # counter cache miss it also groups all of the user's bookings by status
+        counts = status_counts_cache.get(user_id)
+        if counts is None:
+            filters = {key: value for key, value in query.items() if key != "user_id"}
+            pipeline = [{"$match": {"user_id": user_id}}]
+            page_match = [{"$match": filters}] if filters else []
+        else:
+            pipeline = [{"$match": query}]
+            page_match = []
+        
+        facets = {
+            "page": page_match + [
+                {"$sort": {"created_at": -1}}, {"$skip": skip}, {"$limit": limit},
+                *booking_enrichment_stages(professional=True, service=True),
+            ],
+            "total": page_match + [{"$count": "n"}],
         }
+        if counts is None:
+            facets["by_status"] = [{"$group": {"_id": "$status", "n": {"$sum": 1}}}]
+        pipeline.append({"$facet": facets})
+        
+        result = (await bookings_collection.aggregate(pipeline).to_list(length=1))[0]
+        bookings = result["page"]
+        total = result["total"][0]["n"] if result["total"] else 0
+        
+        if counts is None:
+            counts = status_counts_from_groups(result["by_status"])
+            status_counts_cache.set(user_id, counts)
+        
+        result_bookings = [booking_from_pipeline(booking) for booking in bookings]
+        
+        # Counts by status ("all" follows the current filters)
+        status_counts = {"all": total, **counts}
         
         return {
             "bookings": result_bookings,
@@ -220,14 +278,14 @@ async def get_booking_details(
     """Get detailed information about a specific booking"""
     try:
         bookings_collection = db.db.get_collection("bookings")
-        users_collection = db.db.get_collection("users")
-        services_collection = db.db.get_collection("services")
         
         user_id = str(current_user["_id"])
         user_role = current_user.get("role", "user")
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
+        # Find booking with professional, service and customer in one round trip
+        pipeline = [{"$match": {"_id": ObjectId(booking_id)}}, *booking_enrichment_stages(user=True)]
+        found = await bookings_collection.aggregate(pipeline).to_list(length=1)
+        booking = found[0] if found else None
         
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -237,32 +295,12 @@ async def get_booking_details(
             if user_role not in ["admin", "manager"]:
                 raise HTTPException(status_code=403, detail="Access denied")
         
-        # Get professional details
-        professional = None
-        if booking.get("professional_id"):
-            try:
-                professional = await users_collection.find_one({"_id": ObjectId(booking["professional_id"])})
-            except:
-                pass
-        
-        # Get service details
-        service = None
-        if booking.get("service_id"):
-            try:
-                service = await services_collection.find_one({"_id": ObjectId(booking["service_id"])})
-            except:
-                pass
-        
-        # Get user details (for professional view)
-        user = None
-        if booking.get("user_id") and booking.get("professional_id") == user_id:
-            try:
-                user = await users_collection.find_one({"_id": ObjectId(booking["user_id"])})
-            except:
-                pass
+        # User details are only shown in the professional's view
+        if booking.get("professional_id") != user_id:
+            booking["user"] = None
         
         return {
-            "booking": booking_helper(booking, professional, service, user)
+            "booking": booking_from_pipeline(booking)
         }
     except HTTPException:
         raise
@@ -294,25 +332,30 @@ async def create_booking(
         if not professional:
             raise HTTPException(status_code=404, detail="Professional not found")
         
-        # Check for existing active booking with same professional at same date/time
-        existing_booking = await bookings_collection.find_one({
-            "user_id": user_id,
-            "professional_id": booking_data["professional_id"],
-            "scheduled_date": booking_data["scheduled_date"],
-            "scheduled_time": booking_data["scheduled_time"],
-            "status": {"$in": ["pending", "confirmed", "accepted", "ongoing"]}
-        })
-        if existing_booking:
-            raise HTTPException(
-                status_code=400, 
-                detail="You already have an active booking with this professional at this time slot"
-            )
-        
         # Get service details if provided
         service = None
         if booking_data.get("service_id"):
             service = await services_collection.find_one({"_id": ObjectId(booking_data["service_id"])})
         
+        # Check the professional's calendar (no bookings scan)
+        calendar = await availability_index.calendar(booking_data["professional_id"])
+        day = parse_date(booking_data["scheduled_date"])
+        start = parse_time(booking_data["scheduled_time"])
+        if calendar is None:
+            raise HTTPException(status_code=404, detail="Professional not found")
+        if day is None or start is None:
+            raise HTTPException(status_code=400, detail="Invalid booking date or time")
+        if not calendar.is_working(day, start):
+            raise HTTPException(status_code=400, detail="Professional is not working at this time")
+        conflict = await availability_index.conflict(booking_data["professional_id"], day.isoformat(), start)
+        if conflict:
+            if conflict[3] == user_id:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="You already have an active booking with this professional at this time slot"
+                )
+            raise HTTPException(status_code=409, detail="This time slot is no longer available")
+        
         # Generate OTP for verification
         otp = generate_otp()
         
@@ -334,13 +377,26 @@ async def create_booking(
             "status": "pending",
             "otp": otp,
             "notes": booking_data.get("notes", ""),
+            "slot_key": slot_key(booking_data["scheduled_date"], booking_data["scheduled_time"]),
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
         
-        # Insert booking
-        result = await bookings_collection.insert_one(booking_doc)
-        booking_doc["_id"] = result.inserted_id
+        # Hold the slot in this worker's calendar before the insert yields,
+        # so concurrent requests here see it; the unique slot index covers
+        # requests handled by other workers
+        booking_doc["_id"] = ObjectId()
+        availability_index.hold(booking_doc)
+        try:
+            result = await bookings_collection.insert_one(booking_doc)
+        except DuplicateKeyError:
+            availability_index.release(booking_doc, inserted=False)
+            raise HTTPException(status_code=409, detail="This time slot is no longer available")
+        except Exception:
+            availability_index.release(booking_doc, inserted=False)
+            raise
+        availability_index.release(booking_doc, inserted=True)
+        invalidate_status_counts(user_id)
         
         # Generate display ID
         category_prefix = {
@@ -453,13 +509,62 @@ async def update_booking(
             elif is_admin and key in allowed_admin_fields:
                 update_fields[key] = value
         
-        # Update booking
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": update_fields}
-        )
+        # Status changes follow the transition table (admins may override)
+        current_status = booking.get("status", "pending")
+        new_status = update_fields.get("status", current_status)
+        if not is_admin and not can_transition(current_status, new_status):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot change booking status from {current_status} to {new_status}"
+            )
         
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
+        update = {"$set": update_fields}
+        releases_slot = new_status in TERMINAL_STATES and current_status not in TERMINAL_STATES
+        if releases_slot:
+            update["$unset"] = {"slot_key": ""}
+        elif is_rescheduled and current_status in ACTIVE_STATES:
+            # Moving an active booking: the new slot must be free in the
+            # professional's calendar, and the slot key moves with it
+            day, start = parse_date(new_date), parse_time(new_time)
+            if day is None or start is None:
+                raise HTTPException(status_code=400, detail="Invalid booking date or time")
+            calendar = await availability_index.calendar(booking.get("professional_id"))
+            if calendar is not None:
+                if not calendar.is_working(day, start):
+                    raise HTTPException(status_code=400, detail="Professional is not working at this time")
+                conflict = await availability_index.conflict(
+                    booking.get("professional_id"), day.isoformat(), start, ignore=booking_id
+                )
+                if conflict:
+                    raise HTTPException(status_code=409, detail="This time slot is no longer available")
+            update_fields["slot_key"] = slot_key(new_date, new_time)
+            update["$unset"] = {"reminder_sent_at": ""}
+        
+        # Update only if nobody changed the status since it was read
+        try:
+            updated_booking = await bookings_collection.find_one_and_update(
+                {"_id": ObjectId(booking_id), "status": booking.get("status")},
+                update,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="This time slot is no longer available")
+        if not updated_booking:
+            raise HTTPException(
+                status_code=409,
+                detail="Booking was updated by another request, please refresh and try again"
+            )
+        if "status" in update_fields:
+            invalidate_status_counts(booking.get("user_id"))
+        if releases_slot:
+            availability_index.booking_removed(updated_booking)
+        elif "slot_key" in update_fields:
+            availability_index.booking_added(updated_booking)
+            if updated_booking.get("status") in REMINDER_STATES:
+                try:
+                    await schedule_booking_reminder(updated_booking)
+                except Exception as e:
+                    print(f"Error scheduling booking reminder: {e}")
         
         # If user rescheduled, notify professional
         if is_owner and is_rescheduled and booking.get("professional_id"):
@@ -492,51 +597,28 @@ async def cancel_booking(
 ):
     """Cancel a booking"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         user_id = str(current_user["_id"])
-        user_role = current_user.get("role", "user")
-        
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
         
-        # Check if user owns the booking or is the professional
-        is_owner = booking.get("user_id") == user_id
-        is_professional = booking.get("professional_id") == user_id
-        
-        if not (is_owner or is_professional):
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check if booking can be cancelled
-        if booking.get("status") in ["completed", "cancelled"]:
-            raise HTTPException(status_code=400, detail="Booking cannot be cancelled")
-        
-        # Calculate refund
-        refund_status = ""
-        if booking.get("payment_status") == "paid":
-            refund_status = f"Refund of ₹{booking.get('price', 0)} initiated"
-        
-        cancelled_by = "professional" if is_professional else "user"
-        
-        # Update booking
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "status": "cancelled",
-                    "cancellation_reason": cancellation_reason or f"Cancelled by {cancelled_by}",
-                    "cancelled_by": cancelled_by,
-                    "refund_status": refund_status,
-                    "cancelled_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
+        # Cancel by either party; who cancelled and the refund are worked
+        # out from the document inside the same atomic update
+        is_professional = {"$eq": ["$professional_id", user_id]}
+        booking = await apply_transition(
+            booking_id, "cancel", user_id,
+            computed={
+                "cancelled_by": {"$cond": [is_professional, "professional", "user"]},
+                "cancellation_reason": {"$literal": cancellation_reason} if cancellation_reason else {
+                    "$cond": [is_professional, "Cancelled by professional", "Cancelled by user"]
+                },
+                "refund_status": {"$cond": [
+                    {"$eq": ["$payment_status", "paid"]},
+                    {"$concat": ["Refund of ₹", {"$toString": {"$ifNull": ["$price", 0]}}, " initiated"]},
+                    ""
+                ]},
             }
         )
-        
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
+        invalidate_status_counts(booking.get("user_id"))
+        cancelled_by = booking.get("cancelled_by")
+        refund_status = booking.get("refund_status", "")
         
         # Emit real-time cancellation notification
         asyncio.create_task(emit_booking_cancelled(
@@ -547,11 +629,6 @@ async def cancel_booking(
             reason=cancellation_reason
         ))
         
-        # Get user and professional details for notifications
-        users_collection = db.db.get_collection("users")
-        booking_user = await users_collection.find_one({"_id": ObjectId(booking.get("user_id"))})
-        professional = await users_collection.find_one({"_id": ObjectId(booking.get("professional_id"))}) if booking.get("professional_id") else None
-        
         # Create persistent notification for the other party
         if cancelled_by == "user" and booking.get("professional_id"):
             # Notify professional that user cancelled
@@ -559,7 +636,7 @@ async def cancel_booking(
                 professional_id=booking.get("professional_id"),
                 booking_id=booking_id,
                 service_name=booking.get("service_name") or booking.get("service_type", "Service"),
-                customer_name=booking_user.get("name", "Customer") if booking_user else "Customer",
+                customer_name=current_user.get("name", "Customer"),
                 date=booking.get("scheduled_date", ""),
                 time=booking.get("scheduled_time", ""),
                 reason=cancellation_reason
@@ -570,13 +647,13 @@ async def cancel_booking(
                 user_id=booking.get("user_id"),
                 booking_id=booking_id,
                 service_name=booking.get("service_name") or booking.get("service_type", "Service"),
-                professional_name=professional.get("name", "Professional") if professional else "Professional",
+                professional_name=current_user.get("name", "Professional"),
                 reason=cancellation_reason
             ))
         
         return {
             "message": "Booking cancelled successfully",
-            "booking": booking_helper(updated_booking),
+            "booking": booking_helper(booking),
             "refund_status": refund_status,
         }
     except HTTPException:
@@ -595,7 +672,6 @@ async def rate_booking(
     """Rate a completed booking"""
     try:
         bookings_collection = db.db.get_collection("bookings")
-        users_collection = db.db.get_collection("users")
         
         user_id = str(current_user["_id"])
         
@@ -617,9 +693,9 @@ async def rate_booking(
         if booking.get("rating"):
             raise HTTPException(status_code=400, detail="Booking already rated")
         
-        # Update booking with rating
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
+        # Update booking with rating (guarded so a double submit cannot count twice)
+        updated_booking = await bookings_collection.find_one_and_update(
+            {"_id": ObjectId(booking_id), "rating": None},
             {
                 "$set": {
                     "rating": rating,
@@ -627,45 +703,27 @@ async def rate_booking(
                     "rated_at": datetime.utcnow(),
                     "updated_at": datetime.utcnow(),
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
+        if not updated_booking:
+            raise HTTPException(status_code=400, detail="Booking already rated")
         
-        # Update professional's average rating
+        # Add to the professional's and service's rating aggregates
+        try:
+            await record_rating(booking.get("professional_id"), booking.get("service_id"), rating)
+        except Exception as e:
+            print(f"Error updating rating aggregates: {e}")
+        
+        # Notify professional about the new review
         if booking.get("professional_id"):
-            try:
-                professional_id = booking["professional_id"]
-                
-                # Get all rated bookings for this professional
-                rated_bookings = await bookings_collection.find({
-                    "professional_id": professional_id,
-                    "rating": {"$exists": True, "$ne": None}
-                }).to_list(length=1000)
-                
-                if rated_bookings:
-                    avg_rating = sum(b.get("rating", 0) for b in rated_bookings) / len(rated_bookings)
-                    
-                    await users_collection.update_one(
-                        {"_id": ObjectId(professional_id)},
-                        {
-                            "$set": {
-                                "rating": round(avg_rating, 2),
-                                "total_ratings": len(rated_bookings),
-                            }
-                        }
-                    )
-                
-                # Notify professional about the new review
-                asyncio.create_task(NotificationService.new_review_received(
-                    professional_id=professional_id,
-                    booking_id=booking_id,
-                    customer_name=current_user.get("name", "Customer"),
-                    rating=rating,
-                    review=review
-                ))
-            except Exception as e:
-                print(f"Error updating professional rating: {e}")
-        
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
+            asyncio.create_task(NotificationService.new_review_received(
+                professional_id=booking["professional_id"],
+                booking_id=booking_id,
+                customer_name=current_user.get("name", "Customer"),
+                rating=rating,
+                review=review
+            ))
         
         return {
             "message": "Rating submitted successfully",
@@ -682,13 +740,11 @@ async def get_professional_bookings(
     status: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_claims)
 ):
     """Get all bookings for the current professional"""
     try:
         bookings_collection = db.db.get_collection("bookings")
-        users_collection = db.db.get_collection("users")
-        services_collection = db.db.get_collection("services")
         
         professional_id = str(current_user["_id"])
         
@@ -705,31 +761,16 @@ async def get_professional_bookings(
         # Get total count
         total = await bookings_collection.count_documents(query)
         
-        # Get bookings
-        cursor = bookings_collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        bookings = await cursor.to_list(length=limit)
-        
-        # Enrich with user and service details
-        result_bookings = []
-        for booking in bookings:
-            user = None
-            service = None
-            
-            # Get user details
-            if booking.get("user_id"):
-                try:
-                    user = await users_collection.find_one({"_id": ObjectId(booking["user_id"])})
-                except:
-                    pass
-            
-            # Get service details
-            if booking.get("service_id"):
-                try:
-                    service = await services_collection.find_one({"_id": ObjectId(booking["service_id"])})
-                except:
-                    pass
-            
-            result_bookings.append(booking_helper(booking, None, service, user))
+        # Get bookings with user and service details joined in
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"created_at": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            *booking_enrichment_stages(professional=False, service=True, user=True),
+        ]
+        bookings = await bookings_collection.aggregate(pipeline).to_list(length=limit)
+        result_bookings = [booking_from_pipeline(booking) for booking in bookings]
         
         return {
             "bookings": result_bookings,
@@ -751,42 +792,15 @@ async def start_booking(
 ):
     """Start a booking (professional verifies OTP)"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         professional_id = str(current_user["_id"])
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Check if professional owns the booking
-        if booking.get("professional_id") != professional_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check booking status
-        if booking.get("status") not in ["pending", "confirmed", "accepted"]:
-            raise HTTPException(status_code=400, detail="Booking cannot be started")
-        
-        # Verify OTP
-        if booking.get("otp") != otp:
-            raise HTTPException(status_code=400, detail="Invalid OTP")
-        
-        # Update booking status
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "status": "ongoing",
-                    "started_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            }
+        # Start only if the OTP matches (checked in the same update)
+        booking = await apply_transition(
+            booking_id, "start", professional_id,
+            guard={"otp": otp}, guard_error="Invalid OTP"
         )
-        
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        booking_response = booking_helper(updated_booking)
+        invalidate_status_counts(booking.get("user_id"))
+        booking_response = booking_helper(booking)
         
         # Emit real-time work started notification
         asyncio.create_task(emit_work_started(
@@ -821,38 +835,12 @@ async def complete_booking(
 ):
     """Complete a booking (professional marks as done)"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         professional_id = str(current_user["_id"])
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Check if professional owns the booking
-        if booking.get("professional_id") != professional_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check booking status
-        if booking.get("status") != "ongoing":
-            raise HTTPException(status_code=400, detail="Only ongoing bookings can be completed")
-        
-        # Update booking status
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "status": "completed",
-                    "completed_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            }
-        )
-        
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        booking_response = booking_helper(updated_booking)
+        # Complete (owner and status checked atomically)
+        booking = await apply_transition(booking_id, "complete", professional_id)
+        invalidate_status_counts(booking.get("user_id"))
+        booking_response = booking_helper(booking)
         
         # Emit real-time work completed notification
         asyncio.create_task(emit_work_completed(
@@ -901,42 +889,22 @@ async def accept_booking(
 ):
     """Accept a booking (professional accepts the job)"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         professional_id = str(current_user["_id"])
         
         # Check if user is a professional
         if current_user.get("role") != "professional":
             raise HTTPException(status_code=403, detail="Only professionals can accept bookings")
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Check if professional owns the booking
-        if booking.get("professional_id") != professional_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check booking status
-        if booking.get("status") not in ["pending", "confirmed"]:
-            raise HTTPException(status_code=400, detail="Booking cannot be accepted")
-        
-        # Update booking status
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "status": "accepted",
-                    "accepted_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            }
-        )
+        # Accept (owner and status checked atomically)
+        booking = await apply_transition(booking_id, "accept", professional_id)
+        invalidate_status_counts(booking.get("user_id"))
+        booking_response = booking_helper(booking)
         
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        booking_response = booking_helper(updated_booking)
+        # Pre-appointment reminder for both sides
+        try:
+            await schedule_booking_reminder(booking)
+        except Exception as e:
+            print(f"Error scheduling booking reminder: {e}")
         
         # Emit real-time booking accepted notification
         asyncio.create_task(emit_booking_accepted(
@@ -974,43 +942,21 @@ async def reject_booking(
 ):
     """Reject a booking (professional rejects the job)"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         professional_id = str(current_user["_id"])
         
         # Check if user is a professional
         if current_user.get("role") != "professional":
             raise HTTPException(status_code=403, detail="Only professionals can reject bookings")
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Check if professional owns the booking
-        if booking.get("professional_id") != professional_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check booking status
-        if booking.get("status") not in ["pending", "confirmed"]:
-            raise HTTPException(status_code=400, detail="Booking cannot be rejected")
-        
-        # Update booking status
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "status": "cancelled",
-                    "cancellation_reason": rejection_reason or "Rejected by professional",
-                    "cancelled_by": "professional",
-                    "rejected_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
+        # Reject (owner and status checked atomically)
+        booking = await apply_transition(
+            booking_id, "reject", professional_id,
+            fields={
+                "cancellation_reason": rejection_reason or "Rejected by professional",
+                "cancelled_by": "professional",
             }
         )
-        
-        updated_booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
+        invalidate_status_counts(booking.get("user_id"))
         
         # Emit real-time cancellation notification
         asyncio.create_task(emit_booking_cancelled(
@@ -1032,7 +978,7 @@ async def reject_booking(
         
         return {
             "message": "Booking rejected",
-            "booking": booking_helper(updated_booking),
+            "booking": booking_helper(booking),
         }
     except HTTPException:
         raise
@@ -1047,38 +993,14 @@ async def send_otp_request(
 ):
     """Send OTP request to user (professional arrived at location)"""
     try:
-        bookings_collection = db.db.get_collection("bookings")
-        
         professional_id = str(current_user["_id"])
         
         # Check if user is a professional
         if current_user.get("role") != "professional":
             raise HTTPException(status_code=403, detail="Only professionals can send OTP requests")
         
-        # Find booking
-        booking = await bookings_collection.find_one({"_id": ObjectId(booking_id)})
-        
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Check if professional owns the booking
-        if booking.get("professional_id") != professional_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check booking status
-        if booking.get("status") not in ["pending", "confirmed", "accepted"]:
-            raise HTTPException(status_code=400, detail="Cannot request OTP for this booking")
-        
-        # Update booking with OTP request timestamp
-        await bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {
-                "$set": {
-                    "otp_requested_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            }
-        )
+        # Record the OTP request (owner and status checked atomically)
+        booking = await apply_transition(booking_id, "request_otp", professional_id)
         
         # Emit real-time OTP request notification to user
         asyncio.create_task(emit_otp_sent(
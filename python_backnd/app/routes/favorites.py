@@ -7,6 +7,7 @@ from typing import List, Optional
 from bson import ObjectId
 from app.database import get_users_collection
 from app.routes.auth import get_current_user, get_optional_current_user
+from app.utils.security import invalidate_user_cache
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
@@ -63,6 +64,7 @@ async def toggle_favorite(
             {"_id": ObjectId(user_id)},
             {"$pull": {"favorite_professionals": professional_id}}
         )
+        invalidate_user_cache(user_id)
         return {
             "success": True,
             "message": "Professional removed from favorites",
@@ -74,6 +76,7 @@ async def toggle_favorite(
             {"_id": ObjectId(user_id)},
             {"$addToSet": {"favorite_professionals": professional_id}}
         )
+        invalidate_user_cache(user_id)
         return {
             "success": True,
             "message": "Professional added to favorites",
@@ -172,6 +175,7 @@ async def clear_favorites(
         {"_id": ObjectId(user_id)},
         {"$set": {"favorite_professionals": []}}
     )
+    invalidate_user_cache(user_id)
     
     return {
         "success": True,
@@ -2,7 +2,7 @@
 OAuth routes - Google and Facebook authentication
 """
 
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Depends
 from fastapi.responses import RedirectResponse
 from datetime import datetime
 import httpx
@@ -13,6 +13,7 @@ from app.database import get_users_collection
 from app.schemas.auth import LoginResponse
 from app.models.user import UserRole, AuthProvider, user_helper
 from app.utils.security import create_tokens_for_user
+from app.utils.http_client import get_http_client, send_checked
 
 
 router = APIRouter()
@@ -42,7 +43,10 @@ async def google_login():
 
 
 @router.get("/google/callback")
-async def google_callback(code: str = Query(...)):
+async def google_callback(
+    code: str = Query(...),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """Handle Google OAuth callback"""
     if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
         raise HTTPException(
@@ -51,8 +55,8 @@ async def google_callback(code: str = Query(...)):
         )
     
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
+    token_response = await send_checked(
+        client.post(
             "https://oauth2.googleapis.com/token",
             data={
                 "client_id": settings.GOOGLE_CLIENT_ID,
@@ -61,7 +65,9 @@ async def google_callback(code: str = Query(...)):
                 "grant_type": "authorization_code",
                 "redirect_uri": settings.GOOGLE_REDIRECT_URI
             }
-        )
+        ),
+        "Failed to exchange code for token"
+    )
     
     if token_response.status_code != 200:
         raise HTTPException(
@@ -73,11 +79,13 @@ async def google_callback(code: str = Query(...)):
     access_token = token_data.get("access_token")
     
     # Get user info
-    async with httpx.AsyncClient() as client:
-        user_response = await client.get(
+    user_response = await send_checked(
+        client.get(
             "https://www.googleapis.com/oauth2/v2/userinfo",
             headers={"Authorization": f"Bearer {access_token}"}
-        )
+        ),
+        "Failed to get user info from Google"
+    )
     
     if user_response.status_code != 200:
         raise HTTPException(
@@ -137,7 +145,7 @@ async def google_callback(code: str = Query(...)):
         user = user_doc
     
     # Generate tokens
-    tokens = create_tokens_for_user(user)
+    tokens = await create_tokens_for_user(user)
     
     # Redirect to frontend with tokens
     redirect_url = (
@@ -171,7 +179,10 @@ async def facebook_login():
 
 
 @router.get("/facebook/callback")
-async def facebook_callback(code: str = Query(...)):
+async def facebook_callback(
+    code: str = Query(...),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """Handle Facebook OAuth callback"""
     if not settings.FACEBOOK_APP_ID or not settings.FACEBOOK_APP_SECRET:
         raise HTTPException(
@@ -180,8 +191,8 @@ async def facebook_callback(code: str = Query(...)):
         )
     
     # Exchange code for token
-    async with httpx.AsyncClient() as client:
-        token_response = await client.get(
+    token_response = await send_checked(
+        client.get(
             "https://graph.facebook.com/v18.0/oauth/access_token",
             params={
                 "client_id": settings.FACEBOOK_APP_ID,
@@ -189,7 +200,9 @@ async def facebook_callback(code: str = Query(...)):
                 "code": code,
                 "redirect_uri": settings.FACEBOOK_REDIRECT_URI
             }
-        )
+        ),
+        "Failed to exchange code for token"
+    )
     
     if token_response.status_code != 200:
         raise HTTPException(
@@ -201,14 +214,16 @@ async def facebook_callback(code: str = Query(...)):
     access_token = token_data.get("access_token")
     
     # Get user info
-    async with httpx.AsyncClient() as client:
-        user_response = await client.get(
+    user_response = await send_checked(
+        client.get(
             "https://graph.facebook.com/me",
             params={
                 "fields": "id,name,email,picture.type(large)",
                 "access_token": access_token
             }
-        )
+        ),
+        "Failed to get user info from Facebook"
+    )
     
     if user_response.status_code != 200:
         raise HTTPException(
@@ -281,7 +296,7 @@ async def facebook_callback(code: str = Query(...)):
         user = user_doc
     
     # Generate tokens
-    tokens = create_tokens_for_user(user)
+    tokens = await create_tokens_for_user(user)
     
     # Redirect to frontend with tokens
     redirect_url = (
@@ -9,6 +9,7 @@ from pydantic import BaseModel
 
 from app.database import db
 from app.middleware.rbac import get_current_user
+from app.utils.loader import Loaders, get_loaders
 from app.models.offer import offer_helper
 from app.socket_manager import emit_new_offer, emit_offer_accepted, emit_offer_rejected, emit_offer_cancelled, emit_offer_revoked
 
@@ -81,12 +82,12 @@ async def create_price_offer(
 @router.get("/my-offers")
 async def get_my_offers(
     status: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get all offers made by current user"""
     try:
         offers_collection = db.db.get_collection("offers")
-        users_collection = db.db.get_collection("users")
         
         user_id = str(current_user["_id"])
         
@@ -95,12 +96,14 @@ async def get_my_offers(
         if status:
             query["status"] = status
         
+        offer_docs = await offers_collection.find(query).sort("created_at", -1).to_list(None)
+        professionals = await loaders.users.load_many(offer["professional_id"] for offer in offer_docs)
+        
         offers = []
-        async for offer in offers_collection.find(query).sort("created_at", -1):
+        for offer, professional in zip(offer_docs, professionals):
             offer_dict = offer_helper(offer)
             
-            # Get professional details
-            professional = await users_collection.find_one({"_id": ObjectId(offer["professional_id"])})
+            # Add professional details
             if professional:
                 offer_dict["professional_name"] = professional.get("name")
                 offer_dict["professional_image"] = professional.get("profile_image")
@@ -115,12 +118,12 @@ async def get_my_offers(
 @router.get("/received-offers")
 async def get_received_offers(
     status: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get all offers received by professional"""
     try:
         offers_collection = db.db.get_collection("offers")
-        users_collection = db.db.get_collection("users")
         
         professional_id = str(current_user["_id"])
         
@@ -133,12 +136,14 @@ async def get_received_offers(
         if status:
             query["status"] = status
         
+        offer_docs = await offers_collection.find(query).sort("created_at", -1).to_list(None)
+        users = await loaders.users.load_many(offer["user_id"] for offer in offer_docs)
+        
         offers = []
-        async for offer in offers_collection.find(query).sort("created_at", -1):
+        for offer, user in zip(offer_docs, users):
             offer_dict = offer_helper(offer)
             
-            # Get user details
-            user = await users_collection.find_one({"_id": ObjectId(offer["user_id"])})
+            # Add user details
             if user:
                 offer_dict["user_name"] = user.get("name")
                 offer_dict["user_image"] = user.get("profile_image")
@@ -6,10 +6,16 @@ Similar to Zomato/Flipkart search functionality
 from fastapi import APIRouter, Query, Depends, HTTPException, status
 from typing import Optional, List
 from bson import ObjectId
-from app.database import get_users_collection
+from app.database import get_users_collection, get_bookings_collection
 from app.routes.auth import get_current_user
+from app.services.ratings import rating_summary
+from app.services.availability import availability_index, parse_date
+from app.services.fuzzy import professional_fuzzy
+from app.services.search import rank, words
+from app.config import settings
+import asyncio
 import re
-from datetime import datetime
+from datetime import datetime, date
 
 router = APIRouter(prefix="/professionals", tags=["professionals"])
 
@@ -40,13 +46,17 @@ async def search_professionals(
         "approval_status": "approved"
     }
     
-    # Text search
-    if query:
+    # Text search (typo-tolerant) narrows the filter to the best-ranked candidates
+    ranked = None
+    if query and words(query):
+        ranked = await professional_fuzzy.search(query)
+        search_filter["_id"] = {"$in": [ObjectId(professional_id) for professional_id, _ in ranked]}
+    elif query:
+        # Only stop words or very short tokens ("a", "the"): match the text as before
+        pattern = {"$regex": re.escape(query.strip()), "$options": "i"}
         search_filter["$or"] = [
-            {"name": {"$regex": query, "$options": "i"}},
-            {"approval_data.profession": {"$regex": query, "$options": "i"}},
-            {"approval_data.skills": {"$regex": query, "$options": "i"}},
-            {"approval_data.bio": {"$regex": query, "$options": "i"}}
+            {field: pattern}
+            for field in ("name", "approval_data.profession", "approval_data.skills", "approval_data.bio")
         ]
     
     # Profession filter
@@ -85,9 +95,6 @@ async def search_professionals(
     # Calculate pagination
     skip = (page - 1) * limit
     
-    # Get total count
-    total_count = await users_collection.count_documents(search_filter)
-    
     # Get user's favorites if authenticated
     user_favorites = []
     if current_user:
@@ -95,10 +102,23 @@ async def search_professionals(
         user_favorites = user.get("favorite_professionals", []) if user else []
     
     # Fetch professionals
-    professionals = []
-    cursor = users_collection.find(search_filter).sort(sort_field, sort_direction).skip(skip).limit(limit)
+    if ranked is not None and sort_by == "relevance":
+        # Page the ranked ids that pass the filters, best match first
+        matching = await users_collection.find(search_filter, {"_id": 1}).to_list(None)
+        ordered = rank((str(professional["_id"]) for professional in matching), ranked)
+        total_count = len(ordered)
+        page_ids = [ObjectId(professional_id) for professional_id in ordered[skip:skip + limit]]
+        by_id = {
+            professional["_id"]: professional
+            for professional in await users_collection.find({"_id": {"$in": page_ids}}).to_list(None)
+        }
+        page_docs = [by_id[professional_id] for professional_id in page_ids if professional_id in by_id]
+    else:
+        total_count = await users_collection.count_documents(search_filter)
+        page_docs = await users_collection.find(search_filter).sort(sort_field, sort_direction).skip(skip).limit(limit).to_list(None)
     
-    async for professional in cursor:
+    professionals = []
+    for professional in page_docs:
         approval_data = professional.get("approval_data", {})
         prof_id = str(professional["_id"])
         
@@ -120,8 +140,7 @@ async def search_professionals(
             "languages": approval_data.get("languages", []),
             "is_verified": professional.get("is_verified", False),
             "is_favorited": prof_id in user_favorites,
-            "rating": 4.5,  # Placeholder - implement rating system later
-            "total_reviews": 0  # Placeholder
+            **rating_summary(professional)
         })
     
     # Calculate pagination info
@@ -192,6 +211,68 @@ async def get_cities():
     }
 
 
+def _availability_start(start_date: Optional[str]) -> date:
+    if not start_date:
+        return date.today()
+    day = parse_date(start_date)
+    if day is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be YYYY-MM-DD"
+        )
+    return day
+
+
+@router.get("/availability/slots")
+async def get_bulk_availability(
+    professional_ids: str = Query(..., description="Comma-separated professional IDs"),
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, defaults to today"),
+    days: int = Query(7, ge=1, le=settings.AVAILABILITY_MAX_DAYS)
+):
+    """Free slots for several professionals over a date range"""
+    ids = list(dict.fromkeys(pid.strip() for pid in professional_ids.split(",") if pid.strip()))
+    if not ids or len(ids) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide between 1 and 50 professional IDs"
+        )
+    start = _availability_start(start_date)
+    
+    calendars = await asyncio.gather(*(availability_index.free_slots(pid, start, days) for pid in ids))
+    
+    return {
+        "success": True,
+        "start_date": start.isoformat(),
+        "days": days,
+        "slot_minutes": settings.AVAILABILITY_SLOT_MINUTES,
+        "availability": {pid: slots for pid, slots in zip(ids, calendars) if slots is not None}
+    }
+
+
+@router.get("/{professional_id}/availability")
+async def get_professional_availability(
+    professional_id: str,
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, defaults to today"),
+    days: int = Query(7, ge=1, le=settings.AVAILABILITY_MAX_DAYS)
+):
+    """Free slots for one professional, one entry per day"""
+    start = _availability_start(start_date)
+    slots = await availability_index.free_slots(professional_id, start, days)
+    
+    if slots is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Professional not found"
+        )
+    
+    return {
+        "success": True,
+        "professional_id": professional_id,
+        "slot_minutes": settings.AVAILABILITY_SLOT_MINUTES,
+        "availability": slots
+    }
+
+
 @router.get("/{professional_id}")
 async def get_professional_detail(
     professional_id: str,
@@ -229,7 +310,6 @@ async def get_professional_detail(
         is_favorited = professional_id in user_favorites
     
     # Calculate total bookings from bookings collection
-    from app.database import get_bookings_collection
     bookings_collection = get_bookings_collection()
     total_bookings = await bookings_collection.count_documents({
         "professional_id": professional_id,
@@ -269,8 +349,7 @@ async def get_professional_detail(
             "created_at": professional.get("created_at"),
             "member_since": professional.get("created_at"),
             "total_bookings": total_bookings,
-            "rating": 4.5,  # TODO: Calculate from reviews
-            "total_reviews": 0  # TODO: Calculate from reviews
+            **rating_summary(professional)
         }
     }
 
@@ -312,7 +391,8 @@ async def get_featured_professionals(
             "profile_image": professional.get("profile_image"),
             "is_verified": True,
             "is_favorited": prof_id in user_favorites,
-            "rating": 4.5
+            "rating": professional.get("rating", 0.0) or 0.0,
+            "total_reviews": professional.get("total_ratings", 0) or 0
         })
     
     return {
@@ -0,0 +1,26 @@
+"""
+Search autocomplete routes
+Answered from the in-memory suggest index - no database round trip
+"""
+
+from fastapi import APIRouter, Query
+
+from app.services.suggest import TOP_K, suggest_index
+
+router = APIRouter()
+
+
+@router.get("/suggest")
+async def suggest(
+    q: str = Query("", max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=TOP_K, description="Maximum suggestions")
+):
+    """
+    Popular services, categories, professions, skills and cities with a
+    word starting with `q`. An empty `q` returns the most popular overall.
+    """
+    return {
+        "query": q,
+        "suggestions": suggest_index.suggest(q, limit),
+        "ready": suggest_index.ready
+    }
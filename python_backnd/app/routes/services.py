@@ -3,15 +3,21 @@ Service routes - CRUD operations for professional services
 Like Urban Company / Zomato style service listings
 """
 
+import re
+
 from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
 
-from app.database import get_database, get_users_collection
+from app.database import get_database
 from app.models.service import ServiceCreate, ServiceUpdate, service_helper
 from app.models.user import UserRole
+from app.services.catalog import NEW_SERVICE_RANK_SCORE, catalog_facets_cache, professional_active
+from app.services.search import service_search, words
+from app.services.suggest import suggest_index
 from app.utils.security import get_current_user
+from app.utils.loader import Loaders, get_loaders
 from app.middleware.rbac import require_roles
 
 
@@ -24,14 +30,6 @@ async def get_services_collection():
     return db["services"]
 
 
-async def get_professional_data(professional_id):
-    """Get professional user data"""
-    users = get_users_collection()
-    if isinstance(professional_id, str):
-        professional_id = ObjectId(professional_id)
-    return await users.find_one({"_id": professional_id})
-
-
 # ============ CREATE SERVICE ============
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -68,6 +66,8 @@ async def create_service(
         "professional_rating": approval_data.get("rating"),
         "professional_experience": approval_data.get("experience"),
         "professional_verified": current_user.get("is_verified", False),
+        "professional_active": professional_active(current_user),
+        "rank_score": NEW_SERVICE_RANK_SCORE,
         "bookings_count": 0,
         "rating": 0.0,
         "total_ratings": 0,
@@ -80,6 +80,9 @@ async def create_service(
     # Insert service
     result = await services.insert_one(service_doc)
     service_doc["_id"] = result.inserted_id
+    service_search.service_saved(service_doc)
+    suggest_index.service_changed(None, service_doc)
+    catalog_facets_cache.clear()
     
     return {
         "message": "Service created successfully",
@@ -172,6 +175,63 @@ async def get_my_services(
 
 # ============ GET ALL SERVICES (PUBLIC) ============
 
+# Catalog facets (bucket lower bounds); the last bucket is open-ended
+PRICE_BUCKETS = [0, 250, 500, 1000, 2000, 5000]
+RATING_BANDS = [4.5, 4.0, 3.5, 3.0]
+
+
+def _facet_stages(facet_filters: dict) -> dict:
+    """Facet pipelines; each one applies every filter except its own"""
+    def others(field):
+        return {"$match": {key: value for key, value in facet_filters.items() if key != field}}
+
+    return {
+        "total": [{"$match": facet_filters}, {"$count": "count"}],
+        "categories": [
+            others("category"),
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+        "price": [
+            others("price"),
+            {"$bucket": {"groupBy": "$price", "boundaries": PRICE_BUCKETS, "default": "above",
+                         "output": {"count": {"$sum": 1}}}},
+        ],
+        "rating": [
+            others("rating"),
+            {"$bucket": {"groupBy": {"$ifNull": ["$rating", 0]}, "boundaries": [0] + RATING_BANDS[::-1],
+                         "default": "top", "output": {"count": {"$sum": 1}}}},
+        ],
+    }
+
+
+def _facet_summary(result: dict) -> dict:
+    """Shape the raw $facet output: total, category counts, price buckets, rating bands"""
+    price_counts = {bucket["_id"]: bucket["count"] for bucket in result["price"]}
+    price_buckets = [
+        {"min": low, "max": high, "count": price_counts.get(low, 0)}
+        for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])
+    ]
+    price_buckets.append({"min": PRICE_BUCKETS[-1], "max": None, "count": price_counts.get("above", 0)})
+
+    # Bands are cumulative ("4.0+" includes 4.5+), matching the min_rating filter
+    rating_counts = {bucket["_id"]: bucket["count"] for bucket in result["rating"]}
+    rating_bands, running = [], rating_counts.get("top", 0)
+    for band in RATING_BANDS:
+        running += rating_counts.get(band, 0)
+        rating_bands.append({"min_rating": band, "count": running})
+
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "categories": [
+            {"name": group["_id"], "count": group["count"]}
+            for group in result["categories"] if group["_id"]
+        ],
+        "price_buckets": price_buckets,
+        "rating_bands": rating_bands,
+    }
+
+
 @router.get("/", response_model=dict)
 async def get_all_services(
     category: Optional[str] = None,
@@ -182,97 +242,128 @@ async def get_all_services(
     professional_id: Optional[str] = None,
     service_area: Optional[str] = None,
     emergency_available: Optional[bool] = None,
-    sort_by: Optional[str] = "recommended",  # recommended, price_low, price_high, rating, newest
+    sort_by: Optional[str] = "recommended",  # recommended, relevance, price_low, price_high, rating, newest
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    facets: bool = False,
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """Get all active services (public - for customers) - Urban Company style"""
+    """
+    Get all active services (public - for customers) - Urban Company style
+
+    One round trip: a $facet returns the page, the total and the facet
+    counts together (facets=true includes category counts, price buckets
+    and rating bands in the response); when the counts for these filters
+    are cached, only the page is queried.
+    """
     services = await get_services_collection()
-    users = get_users_collection()
-    
-    # First, get all non-suspended professional IDs
-    non_suspended_pros = await users.find(
-        {
-            "role": "professional",
-            "is_suspended": {"$ne": True}
-        },
-        {"_id": 1}
-    ).to_list(None)
-    non_suspended_pro_ids = [pro["_id"] for pro in non_suspended_pros]
     
     # Build query - only show active services from non-suspended professionals
-    query = {
+    # (professional_active is kept in sync by app.services.catalog)
+    base_query = {
         "is_active": True,
-        "professional_id": {"$in": non_suspended_pro_ids}
+        "professional_active": True
     }
     
-    if category:
-        query["category"] = {"$regex": category, "$options": "i"}
-    
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}},
-            {"category": {"$regex": search, "$options": "i"}},
-            {"tags": {"$regex": search, "$options": "i"}}
-        ]
-    
-    if min_price is not None:
-        query["price"] = {"$gte": min_price}
-    
-    if max_price is not None:
-        if "price" in query:
-            query["price"]["$lte"] = max_price
-        else:
-            query["price"] = {"$lte": max_price}
-    
-    if min_rating is not None:
-        query["rating"] = {"$gte": min_rating}
+    # Full-text search narrows the query to the best-ranked candidates
+    ranked = None
+    search_matches = None
+    if search and words(search):
+        ranked, search_matches = await service_search.search_counted(search)
+        base_query["_id"] = {"$in": [ObjectId(service_id) for service_id, _ in ranked]}
+    elif search:
+        # Only stop words ("the", "for a"): nothing to rank, match the text as before
+        pattern = {"$regex": re.escape(search.strip()), "$options": "i"}
+        base_query["$or"] = [{field: pattern} for field in ("name", "description", "category", "tags")]
     
     if professional_id and ObjectId.is_valid(professional_id):
-        query["professional_id"] = ObjectId(professional_id)
+        base_query["professional_id"] = ObjectId(professional_id)
     
     if service_area:
-        query["service_area"] = {"$regex": service_area, "$options": "i"}
+        base_query["service_area"] = {"$regex": service_area, "$options": "i"}
     
     if emergency_available is not None:
-        query["emergency_available"] = emergency_available
+        base_query["emergency_available"] = emergency_available
     
-    # Get total count
-    total = await services.count_documents(query)
+    # Filters that are also facets (each facet ignores its own filter)
+    facet_filters = {}
+    if category:
+        facet_filters["category"] = {"$regex": category, "$options": "i"}
+    
+    price_filter = {}
+    if min_price is not None:
+        price_filter["$gte"] = min_price
+    if max_price is not None:
+        price_filter["$lte"] = max_price
+    if price_filter:
+        facet_filters["price"] = price_filter
+    
+    if min_rating is not None:
+        facet_filters["rating"] = {"$gte": min_rating}
     
     # Sort options
     sort_options = {
-        "recommended": [("rating", -1), ("bookings_count", -1)],
+        # rank_score is precomputed by app.services.catalog.recompute_rank_scores
+        "recommended": [("rank_score", -1), ("rating", -1)],
         "price_low": [("price", 1)],
         "price_high": [("price", -1)],
         "rating": [("rating", -1), ("total_ratings", -1)],
         "newest": [("created_at", -1)],
         "popular": [("bookings_count", -1)]
     }
-    sort_order = sort_options.get(sort_by, sort_options["recommended"])
-    
-    # Get services
-    cursor = services.find(query).sort(sort_order).skip(skip).limit(limit)
-    service_list = []
-    
-    async for service in cursor:
-        # Get professional details if not already in service
-        professional = None
-        if not service.get("professional_image") or not service.get("professional_verified"):
-            professional = await get_professional_data(service.get("professional_id"))
-        
-        service_list.append(service_helper(service, professional))
     
-    # Get unique categories for filtering
-    categories = await services.distinct("category", {"is_active": True})
+    window = [{"$skip": skip}, {"$limit": limit}]
+    if ranked is not None and sort_by in ("recommended", "relevance"):
+        # Search results default to relevance order (position in the ranking)
+        ranked_ids = base_query["_id"]["$in"]
+        order = [
+            {"$addFields": {"_rank": {"$indexOfArray": [ranked_ids, "$_id"]}}},
+            {"$sort": {"_rank": 1}},
+        ]
+        window.append({"$unset": "_rank"})
+    else:
+        order = [{"$sort": dict(sort_options.get(sort_by, sort_options["recommended"]))}]
+    
+    facet_key = (category, search, min_price, max_price, min_rating, professional_id,
+                 service_area, emergency_available)
+    summary = catalog_facets_cache.get(facet_key)
+    if summary is None:
+        pipeline = [
+            {"$match": base_query},
+            *order,
+            {"$facet": {"page": [{"$match": facet_filters}, *window], **_facet_stages(facet_filters)}},
+        ]
+        result = (await services.aggregate(pipeline).to_list(1))[0]
+        summary = _facet_summary(result)
+        catalog_facets_cache.set(facet_key, summary)
+        service_docs = result["page"]
+    else:
+        pipeline = [{"$match": {**base_query, **facet_filters}}, *order, *window]
+        service_docs = await services.aggregate(pipeline).to_list(None)
+    
+    # Get professional details if not already in service (one $in query)
+    professionals = await loaders.users.load_many(
+        service.get("professional_id")
+        if not service.get("professional_image") or not service.get("professional_verified")
+        else None
+        for service in service_docs
+    )
+    service_list = [
+        service_helper(service, professional)
+        for service, professional in zip(service_docs, professionals)
+    ]
     
-    return {
-        "total": total,
+    response = {
+        "total": summary["total"],
         "services": service_list,
         "skip": skip,
         "limit": limit,
-        "categories": sorted(categories),
+        # Categories available under the other active filters
+        "categories": sorted(group["name"] for group in summary["categories"]),
+        # Only the best-ranked SEARCH_MAX_RESULTS search matches are paginated;
+        # when capped, search_matches is the full count before other filters
+        "total_capped": search_matches is not None and search_matches > len(ranked),
+        "search_matches": search_matches,
         "filters_applied": {
             "category": category,
             "search": search,
@@ -284,6 +375,13 @@ async def get_all_services(
             "sort_by": sort_by
         }
     }
+    if facets:
+        response["facets"] = {
+            "categories": summary["categories"],
+            "price_buckets": summary["price_buckets"],
+            "rating_bands": summary["rating_bands"]
+        }
+    return response
 
 
 # ============ GET SERVICE BY ID ============
@@ -357,6 +455,9 @@ async def update_service(
     
     # Get updated service
     updated_service = await services.find_one({"_id": ObjectId(service_id)})
+    service_search.service_saved(updated_service)
+    suggest_index.service_changed(existing_service, updated_service)
+    catalog_facets_cache.clear()
     
     return {
         "message": "Service updated successfully",
@@ -407,6 +508,9 @@ async def toggle_service_status(
     
     # Get updated service
     updated_service = await services.find_one({"_id": ObjectId(service_id)})
+    service_search.service_saved(updated_service)
+    suggest_index.service_changed(existing_service, updated_service)
+    catalog_facets_cache.clear()
     
     return {
         "message": f"Service {'activated' if new_status else 'deactivated'} successfully",
@@ -449,6 +553,9 @@ async def delete_service(
     
     # Delete service
     await services.delete_one({"_id": ObjectId(service_id)})
+    service_search.service_deleted(service_id)
+    suggest_index.service_changed(existing_service, None)
+    catalog_facets_cache.clear()
     
     return {"message": "Service deleted successfully"}
 
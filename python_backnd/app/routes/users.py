@@ -29,10 +29,15 @@ from app.schemas.auth import MessageResponse
 from app.models.user import UserRole, user_helper
 from app.models.otp import OTPPurpose, OTPType
 from app.utils.security import (
-    hash_password, verify_password, get_current_user
+    hash_password_async, verify_password_async, get_current_user,
+    invalidate_user_cache, revoke_user_tokens
 )
 from app.utils.otp import create_otp, verify_otp, send_otp
+from app.utils.refresh_tokens import revoke_user_refresh_tokens
 from app.middleware.rbac import require_roles
+from app.services.availability import availability_index
+from app.services.catalog import sync_professional_services
+from app.services.suggest import suggest_index
 
 
 router = APIRouter()
@@ -93,6 +98,7 @@ async def upload_profile_image(
         {"_id": current_user["_id"]},
         {"$set": {"profile_image": image_url, "updated_at": datetime.utcnow()}}
     )
+    invalidate_user_cache(current_user["_id"])
     
     # Fetch updated user
     updated_user = await users.find_one({"_id": current_user["_id"]})
@@ -135,6 +141,7 @@ async def delete_profile_image(current_user: dict = Depends(get_current_user)):
         {"_id": current_user["_id"]},
         {"$set": {"profile_image": None, "updated_at": datetime.utcnow()}}
     )
+    invalidate_user_cache(current_user["_id"])
     
     return {"message": "Profile image deleted successfully"}
 
@@ -175,6 +182,7 @@ async def update_user_profile(
             {"_id": current_user["_id"]},
             {"$set": update_data}
         )
+        invalidate_user_cache(current_user["_id"])
     
     # Fetch updated user
     updated_user = await users.find_one({"_id": current_user["_id"]})
@@ -201,6 +209,7 @@ async def update_profile(
             {"_id": current_user["_id"]},
             {"$set": update_data}
         )
+        invalidate_user_cache(current_user["_id"])
     
     # Fetch updated user
     updated_user = await users.find_one({"_id": current_user["_id"]})
@@ -214,7 +223,7 @@ async def change_password(
 ):
     """Change user password"""
     # Verify current password
-    if not verify_password(request.current_password, current_user.get("hashed_password", "")):
+    if not await verify_password_async(request.current_password, current_user.get("hashed_password", "")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -234,11 +243,13 @@ async def change_password(
         {"_id": current_user["_id"]},
         {
             "$set": {
-                "hashed_password": hash_password(request.new_password),
+                "hashed_password": await hash_password_async(request.new_password),
                 "updated_at": datetime.utcnow()
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
+    await revoke_user_refresh_tokens(current_user["_id"])
     
     return MessageResponse(
         message="Password changed successfully",
@@ -304,6 +315,7 @@ async def verify_email(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return MessageResponse(
         message="Email verified successfully",
@@ -369,6 +381,7 @@ async def verify_phone(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return MessageResponse(
         message="Phone verified successfully",
@@ -410,6 +423,7 @@ async def update_professional_profile(
     
     # Get existing approval_data or create new
     approval_data = current_user.get("approval_data", {})
+    previous_data = {**approval_data, "skills": list(approval_data.get("skills") or [])}
     
     # Update business profile fields
     if bio is not None:
@@ -450,6 +464,11 @@ async def update_professional_profile(
         {"_id": current_user["_id"]},
         {"$set": {"approval_data": approval_data, "updated_at": datetime.utcnow()}}
     )
+    invalidate_user_cache(current_user["_id"])
+    if working_hours_start is not None or working_hours_end is not None or working_days is not None:
+        availability_index.hours_changed(current_user["_id"], approval_data)
+    if (skills is not None or city is not None) and current_user.get("approval_status") == "approved":
+        suggest_index.professional_changed(previous_data, approval_data)
     
     # Fetch updated user
     updated_user = await users.find_one({"_id": current_user["_id"]})
@@ -638,6 +657,8 @@ async def update_user_role(
             }
         }
     )
+    await revoke_user_tokens(user_id)
+    await sync_professional_services(user_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -676,6 +697,8 @@ async def update_user_status(
             }
         }
     )
+    await revoke_user_tokens(user_id)
+    await sync_professional_services(user_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -742,6 +765,8 @@ async def suspend_user(
             }
         }
     )
+    await revoke_user_tokens(user_id)
+    await sync_professional_services(user_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -802,6 +827,8 @@ async def unsuspend_user(
             }
         }
     )
+    await revoke_user_tokens(user_id)
+    await sync_professional_services(user_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -866,6 +893,7 @@ async def add_user_address(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return AddressResponse(**address_data)
 
@@ -934,6 +962,7 @@ async def update_address(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return AddressResponse(**addresses[address_index])
 
@@ -969,6 +998,7 @@ async def delete_address(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return {"message": "Address deleted successfully"}
 
@@ -1007,5 +1037,6 @@ async def set_default_address(
             }
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return {"message": "Default address updated successfully"}
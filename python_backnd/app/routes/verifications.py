@@ -11,7 +11,10 @@ from pydantic import BaseModel, Field
 
 from app.database import get_users_collection, get_database
 from app.models.user import UserRole, user_helper
-from app.utils.security import get_current_user, hash_password
+from app.services.catalog import sync_professional_services
+from app.utils.security import (
+    get_current_user, hash_password_async, invalidate_user_cache, revoke_user_tokens
+)
 
 
 router = APIRouter()
@@ -117,7 +120,7 @@ async def register_professional(request: ProfessionalRegistrationRequest):
         "name": request.name,
         "email": email,
         "phone": request.phone,
-        "hashed_password": hash_password(request.password),
+        "hashed_password": await hash_password_async(request.password),
         "role": UserRole.PROFESSIONAL.value,
         "is_verified": False,  # Will be True after manager approval
         "is_active": False,    # Will be True after manager approval
@@ -188,7 +191,7 @@ async def register_shop(request: ShopRegistrationRequest):
         "name": request.owner_name,
         "email": email,
         "phone": request.phone,
-        "hashed_password": hash_password(request.password),
+        "hashed_password": await hash_password_async(request.password),
         "role": UserRole.SHOPKEEPER.value,
         "is_verified": False,
         "is_active": False,
@@ -493,6 +496,8 @@ async def update_verification(
         {"_id": ObjectId(verification_id)},
         {"$set": update_data}
     )
+    await revoke_user_tokens(verification_id)
+    await sync_professional_services(verification_id)
     
     # Fetch updated user
     updated_user = await users.find_one({"_id": ObjectId(verification_id)})
@@ -528,4 +533,7 @@ async def delete_verification(verification_id: str, current_user: dict = Depends
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Registration not found")
     
+    invalidate_user_cache(verification_id)
+    await sync_professional_services(verification_id)
+    
     return {"message": "Registration deleted successfully"}
@@ -14,6 +14,7 @@ from app.schemas.auth import (
     ResetPasswordResponse,
     TokenData,
     RefreshTokenRequest,
+    LogoutRequest,
     TokenResponse,
     MessageResponse,
     ErrorResponse,
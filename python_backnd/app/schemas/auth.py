@@ -158,6 +158,11 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None  # Revokes this session's token family
+    all_devices: bool = False  # Revokes every session of the user
+
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -0,0 +1,359 @@
+"""
+Professional availability engine
+
+Each worker keeps a calendar per professional: working hours/days from
+approval_data plus a sorted list of busy intervals per date, loaded once
+from the bookings collection and then kept current by the booking routes
+(create, reschedule, cancel/reject). Free-slot queries and the
+double-booking check at create time read only the calendar.
+
+Bookings written by other workers reach this one through a poll: every
+AVAILABILITY_SYNC_SECONDS the bookings changed since the last poll drop
+their professionals' calendars, which reload on next use (calendars also
+expire after AVAILABILITY_INDEX_TTL_SECONDS). A conflict found in a
+cached calendar is re-checked against a fresh load before a request is
+rejected, and the unique (professional_id, slot_key) index on bookings
+catches exact-start collisions that race past both.
+"""
+
+import asyncio
+import re
+from bisect import bisect_left, insort
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import db
+from app.utils.cache import TTLCache
+
+# Booking statuses that occupy the professional's time (completing or
+# cancelling a booking releases its slot)
+BUSY_STATES = ("pending", "confirmed", "accepted", "ongoing")
+
+DEFAULT_WORKING_HOURS = ("09:00", "18:00")
+DEFAULT_WORKING_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+_TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?m?\.?$", re.IGNORECASE)
+
+
+def parse_time(value) -> Optional[int]:
+    """Minutes since midnight for "14:00", "02:00 PM", "2pm" or "9:00 AM - 10:00 AM" """
+    if not isinstance(value, str):
+        return None
+    match = _TIME_RE.match(value.split("-")[0].strip())
+    if not match:
+        return None
+
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == "p" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_date(value) -> Optional[date]:
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def slot_key(scheduled_date, scheduled_time) -> Optional[str]:
+    """Normalised slot identifier stored on active bookings ("2024-06-01T14:00")"""
+    day, start = parse_date(scheduled_date), parse_time(scheduled_time)
+    if day is None or start is None:
+        return None
+    return f"{day.isoformat()}T{format_time(start)}"
+
+
+def scheduled_at(scheduled_date, scheduled_time) -> Optional[datetime]:
+    """Naive UTC datetime of a booking's local (BOOKING_TIMEZONE) date and time"""
+    day, start = parse_date(scheduled_date), parse_time(scheduled_time)
+    if day is None or start is None:
+        return None
+    local = datetime.combine(day, time(start // 60, start % 60), tzinfo=ZoneInfo(settings.BOOKING_TIMEZONE))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ProfessionalCalendar:
+    """
+    Working hours plus busy intervals per date for one professional.
+
+    Every booking lasts one slot, so intervals sorted by start are also
+    sorted by end and an overlap check only needs the nearest earlier one.
+    """
+
+    def __init__(self, approval_data: Optional[dict] = None):
+        self.slot_minutes = settings.AVAILABILITY_SLOT_MINUTES
+        self._busy: Dict[str, List[Tuple[int, int, str, str]]] = {}
+        self._where: Dict[str, Tuple[str, int]] = {}
+        self.set_hours(approval_data or {})
+
+    def set_hours(self, approval_data: dict):
+        start = parse_time(approval_data.get("working_hours_start"))
+        end = parse_time(approval_data.get("working_hours_end"))
+        self.work_start = parse_time(DEFAULT_WORKING_HOURS[0]) if start is None else start
+        self.work_end = parse_time(DEFAULT_WORKING_HOURS[1]) if end is None else end
+        days = approval_data.get("working_days") or DEFAULT_WORKING_DAYS
+        self.working_days = {str(day).lower() for day in days}
+
+    def add(self, booking_id: str, user_id: str, day: str, start: int):
+        self.remove(booking_id)
+        insort(self._busy.setdefault(day, []), (start, start + self.slot_minutes, booking_id, user_id))
+        self._where[booking_id] = (day, start)
+
+    def remove(self, booking_id: str) -> bool:
+        where = self._where.pop(booking_id, None)
+        if where is None:
+            return False
+        day, start = where
+        intervals = self._busy.get(day, [])
+        for i in range(bisect_left(intervals, (start,)), len(intervals)):
+            if intervals[i][2] == booking_id:
+                del intervals[i]
+                break
+        if not intervals:
+            self._busy.pop(day, None)
+        return True
+
+    def conflict(self, day: str, start: int) -> Optional[Tuple[int, int, str, str]]:
+        """The busy interval overlapping [start, start + slot), if any"""
+        intervals = self._busy.get(day)
+        if not intervals:
+            return None
+        i = bisect_left(intervals, (start + self.slot_minutes,))
+        if i and intervals[i - 1][1] > start:
+            return intervals[i - 1]
+        return None
+
+    def is_working(self, day: date, start: int) -> bool:
+        return (
+            day.strftime("%A").lower() in self.working_days
+            and self.work_start <= start
+            and start + self.slot_minutes <= self.work_end
+        )
+
+    def free_slots(self, day: date) -> dict:
+        """Every slot of one day with its availability"""
+        key = day.isoformat()
+        working = day.strftime("%A").lower() in self.working_days
+        slots = []
+        if working:
+            intervals = self._busy.get(key, [])
+            i = 0
+            for start in range(self.work_start, self.work_end - self.slot_minutes + 1, self.slot_minutes):
+                end = start + self.slot_minutes
+                # Skip intervals that finish before this slot starts
+                while i < len(intervals) and intervals[i][1] <= start:
+                    i += 1
+                busy = i < len(intervals) and intervals[i][0] < end
+                slots.append({"time": format_time(start), "available": not busy})
+        return {
+            "date": key,
+            "working_day": working,
+            "slots": slots,
+            "available_count": sum(slot["available"] for slot in slots),
+        }
+
+
+class AvailabilityIndex:
+    """Per-worker calendars, loaded on first use and maintained incrementally"""
+
+    def __init__(self):
+        self._calendars = TTLCache(
+            maxsize=settings.AVAILABILITY_INDEX_MAX_SIZE,
+            ttl=settings.AVAILABILITY_INDEX_TTL_SECONDS
+        )
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._stale = set()
+        self._held: Dict[str, dict] = {}        # booking id -> booking being inserted here
+        self._task: Optional[asyncio.Task] = None
+        self._synced_at: Optional[datetime] = None
+        self.loads = 0
+        self.reloads = 0
+        self.syncs = 0
+
+    async def calendar(self, professional_id: str) -> Optional[ProfessionalCalendar]:
+        """The professional's calendar, or None if there is no such professional"""
+        professional_id = str(professional_id)
+        calendar = self._calendars.get(professional_id)
+        if calendar is not None:
+            return calendar
+
+        # Concurrent requests for the same professional share one load
+        task = self._loading.get(professional_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(professional_id))
+            self._loading[professional_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(professional_id, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, professional_id: str) -> Optional[ProfessionalCalendar]:
+        if not ObjectId.is_valid(professional_id):
+            return None
+        self.loads += 1
+
+        professional, bookings = await asyncio.gather(
+            db.db.users.find_one(
+                {"_id": ObjectId(professional_id), "role": "professional"},
+                {"approval_data.working_hours_start": 1, "approval_data.working_hours_end": 1,
+                 "approval_data.working_days": 1}
+            ),
+            db.db.bookings.find(
+                {
+                    "professional_id": professional_id,
+                    "status": {"$in": list(BUSY_STATES)},
+                    "scheduled_date": {"$gte": date.today().isoformat()},
+                },
+                {"user_id": 1, "scheduled_date": 1, "scheduled_time": 1}
+            ).to_list(None),
+        )
+        if not professional:
+            return None
+
+        calendar = ProfessionalCalendar(professional.get("approval_data"))
+        # Slots held by inserts still in flight in this worker are not in MongoDB yet
+        held = [booking for booking in self._held.values() if str(booking.get("professional_id")) == professional_id]
+        for booking in bookings + held:
+            day, start = parse_date(booking.get("scheduled_date")), parse_time(booking.get("scheduled_time"))
+            if day is not None and start is not None:
+                calendar.add(str(booking["_id"]), booking.get("user_id", ""), day.isoformat(), start)
+
+        # A booking changed while we were reading: serve this result but
+        # let the next request load a fresh copy
+        if professional_id in self._stale:
+            self._stale.discard(professional_id)
+        else:
+            self._calendars.set(professional_id, calendar)
+        return calendar
+
+    async def reload(self, professional_id: str) -> Optional[ProfessionalCalendar]:
+        """Drop the cached calendar and read it again from MongoDB"""
+        self.reloads += 1
+        self._forget(professional_id)
+        return await self._load(str(professional_id))
+
+    def _forget(self, professional_id):
+        professional_id = str(professional_id)
+        self._calendars.invalidate(professional_id)
+        if professional_id in self._loading:
+            self._stale.add(professional_id)
+
+    def _touch(self, professional_id: str) -> Optional[ProfessionalCalendar]:
+        professional_id = str(professional_id)
+        if professional_id in self._loading:
+            self._stale.add(professional_id)
+        return self._calendars.get(professional_id)
+
+    # ============ Incremental maintenance ============
+
+    def booking_added(self, booking: dict):
+        """Occupy the booking's slot (create, reschedule)"""
+        calendar = self._touch(booking.get("professional_id"))
+        if calendar is None:
+            return
+        day, start = parse_date(booking.get("scheduled_date")), parse_time(booking.get("scheduled_time"))
+        if day is None or start is None:
+            calendar.remove(str(booking["_id"]))
+            return
+        calendar.add(str(booking["_id"]), booking.get("user_id", ""), day.isoformat(), start)
+
+    def hold(self, booking: dict):
+        """Occupy a new booking's slot before its insert, surviving reloads until release()"""
+        self._held[str(booking["_id"])] = booking
+        self.booking_added(booking)
+
+    def release(self, booking: dict, inserted: bool):
+        """The insert finished; free the slot again if it failed"""
+        self._held.pop(str(booking["_id"]), None)
+        if not inserted:
+            self.booking_removed(booking)
+
+    def booking_removed(self, booking: dict):
+        """Free the booking's slot (cancel, reject)"""
+        calendar = self._touch(booking.get("professional_id"))
+        if calendar is not None:
+            calendar.remove(str(booking["_id"]))
+
+    def hours_changed(self, professional_id, approval_data: dict):
+        """Apply new working hours/days from the business profile"""
+        calendar = self._touch(professional_id)
+        if calendar is not None:
+            calendar.set_hours(approval_data or {})
+
+    # ============ Cross-worker sync ============
+
+    async def start(self):
+        if self._task is None:
+            self._synced_at = datetime.utcnow()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.AVAILABILITY_SYNC_SECONDS)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Availability sync failed: {e}")
+
+    async def sync(self):
+        """Drop the calendars of professionals whose bookings changed anywhere"""
+        now = datetime.utcnow()
+        # Overlap one interval so writes stamped by a worker with a slightly
+        # slow clock are not missed
+        since = self._synced_at - timedelta(seconds=settings.AVAILABILITY_SYNC_SECONDS)
+        professional_ids = await db.db.bookings.distinct("professional_id", {"updated_at": {"$gte": since}})
+        for professional_id in professional_ids:
+            if professional_id:
+                self._forget(professional_id)
+        self._synced_at = now
+        self.syncs += 1
+
+    # ============ Queries ============
+
+    async def conflict(self, professional_id, day: str, start: int,
+                       ignore: Optional[str] = None) -> Optional[Tuple[int, int, str, str]]:
+        """
+        The busy interval overlapping the slot (other than booking `ignore`).
+        A conflict in the cached calendar is confirmed against a fresh load,
+        since the booking behind it may have moved in another worker.
+        """
+        for load in (self.calendar, self.reload):
+            calendar = await load(professional_id)
+            hit = calendar.conflict(day, start) if calendar is not None else None
+            if hit is None or hit[2] == ignore:
+                return None
+        return hit
+
+    async def free_slots(self, professional_id: str, start: date, days: int) -> Optional[List[dict]]:
+        calendar = await self.calendar(professional_id)
+        if calendar is None:
+            return None
+        return [calendar.free_slots(start + timedelta(days=offset)) for offset in range(days)]
+
+    def stats(self) -> dict:
+        return {**self._calendars.stats(), "loads": self.loads, "reloads": self.reloads, "syncs": self.syncs}
+
+
+availability_index = AvailabilityIndex()
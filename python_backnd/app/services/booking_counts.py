@@ -0,0 +1,36 @@
+"""
+Per-user booking status counters for /api/bookings/my-bookings
+
+Cached per worker and dropped whenever one of the user's bookings is
+created or changes status, from the routes or the scheduler sweeps.
+"""
+
+from typing import List
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+status_counts_cache = TTLCache(
+    maxsize=settings.BOOKING_COUNTS_CACHE_MAX_SIZE,
+    ttl=settings.BOOKING_COUNTS_CACHE_TTL_SECONDS
+)
+
+
+def status_counts_from_groups(groups: List[dict]) -> dict:
+    """Turn $group-by-status rows into the status_counts payload"""
+    by_status = {row["_id"]: row["n"] for row in groups}
+    return {
+        "pending": by_status.get("pending", 0),
+        "confirmed": by_status.get("confirmed", 0),
+        "upcoming": by_status.get("pending", 0) + by_status.get("confirmed", 0),
+        "ongoing": by_status.get("ongoing", 0),
+        "completed": by_status.get("completed", 0),
+        "cancelled": by_status.get("cancelled", 0),
+    }
+
+
+def invalidate_status_counts(*user_ids):
+    """Forget the cached booking counters of every given user"""
+    for user_id in user_ids:
+        if user_id:
+            status_counts_cache.invalidate(str(user_id))
@@ -0,0 +1,155 @@
+"""
+Booking state machine
+
+Every status change goes through one guarded find_one_and_update: the
+filter carries the booking id, the acting party and the allowed source
+states, and the updated document comes back in the same round trip. If
+nothing matched, one projected read works out why (missing, not yours,
+illegal from the current state, or lost a race) so routes can answer
+with the right error.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from app.database import db
+from app.services.availability import availability_index
+
+ACTIVE_STATES = ("pending", "confirmed", "accepted", "ongoing")
+TERMINAL_STATES = ("completed", "cancelled")
+
+
+@dataclass(frozen=True)
+class Transition:
+    """One edge set of the booking lifecycle"""
+    source: Tuple[str, ...]
+    target: Optional[str]       # None keeps the current status (e.g. send-otp)
+    actor: str                  # "professional", "user" or "party" (either side)
+    timestamp: str              # field stamped with the transition time
+    error: str                  # detail when the current status does not allow it
+    releases_slot: bool = False  # frees the professional's time slot
+
+
+TRANSITIONS: Dict[str, Transition] = {
+    "accept": Transition(("pending", "confirmed"), "accepted", "professional", "accepted_at",
+                         "Booking cannot be accepted"),
+    "reject": Transition(("pending", "confirmed"), "cancelled", "professional", "rejected_at",
+                         "Booking cannot be rejected", releases_slot=True),
+    "request_otp": Transition(("pending", "confirmed", "accepted"), None, "professional", "otp_requested_at",
+                              "Cannot request OTP for this booking"),
+    "start": Transition(("pending", "confirmed", "accepted"), "ongoing", "professional", "started_at",
+                        "Booking cannot be started"),
+    "complete": Transition(("ongoing",), "completed", "professional", "completed_at",
+                           "Only ongoing bookings can be completed", releases_slot=True),
+    "cancel": Transition(ACTIVE_STATES, "cancelled", "party", "cancelled_at",
+                         "Booking cannot be cancelled", releases_slot=True),
+    # Scheduler sweep: only a booking still pending may lapse, so one the
+    # professional accepts while the sweep runs is left alone
+    "expire": Transition(("pending",), "cancelled", "party", "cancelled_at",
+                         "Only pending bookings can expire", releases_slot=True),
+}
+
+
+def allowed_targets(current: str) -> set:
+    """Statuses reachable from `current` through the transition table"""
+    return {t.target for t in TRANSITIONS.values() if t.target and current in t.source}
+
+
+def can_transition(current: str, target: str) -> bool:
+    return current == target or target in allowed_targets(current)
+
+
+def _actor_filter(actor: str, actor_id: Optional[str]) -> dict:
+    if actor_id is None:
+        return {}
+    if actor == "party":
+        return {"$or": [{"user_id": actor_id}, {"professional_id": actor_id}]}
+    return {f"{actor}_id": actor_id}
+
+
+async def apply_transition(
+    booking_id: str,
+    name: str,
+    actor_id: Optional[str],
+    fields: Optional[dict] = None,
+    computed: Optional[dict] = None,
+    guard: Optional[dict] = None,
+    guard_error: str = "Booking cannot be updated",
+) -> dict:
+    """
+    Atomically apply TRANSITIONS[name] and return the updated booking.
+
+    fields are set as literal values; computed are aggregation expressions
+    evaluated against the document being updated (e.g. a refund message
+    built from its price). guard adds extra match conditions such as an
+    OTP; guard_error is reported when only the guard failed. actor_id=None
+    skips the ownership check (system jobs).
+    """
+    transition = TRANSITIONS[name]
+    if not ObjectId.is_valid(booking_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+
+    now = datetime.utcnow()
+    query = {
+        "_id": ObjectId(booking_id),
+        "status": {"$in": list(transition.source)},
+        **_actor_filter(transition.actor, actor_id),
+        **(guard or {}),
+    }
+    update = {transition.timestamp: now, "updated_at": now}
+    if transition.target:
+        update["status"] = transition.target
+    update.update(fields or {})
+
+    # Pipeline form so computed fields can read the current document;
+    # literals are wrapped so user text starting with "$" stays text
+    stage = {key: {"$literal": value} for key, value in update.items()}
+    stage.update(computed or {})
+
+    pipeline = [{"$set": stage}]
+    if transition.releases_slot:
+        pipeline.append({"$unset": "slot_key"})
+
+    booking = await db.db.bookings.find_one_and_update(
+        query, pipeline, return_document=ReturnDocument.AFTER
+    )
+    if booking is not None:
+        if transition.releases_slot:
+            availability_index.booking_removed(booking)
+        return booking
+
+    await _raise_rejection(booking_id, transition, actor_id, guard, guard_error)
+
+
+async def _raise_rejection(booking_id, transition: Transition, actor_id, guard, guard_error):
+    """Explain a transition that matched nothing; always raises"""
+    projection = {"status": 1, "user_id": 1, "professional_id": 1, **{key: 1 for key in (guard or {})}}
+    current = await db.db.bookings.find_one({"_id": ObjectId(booking_id)}, projection)
+
+    if not current:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+
+    if actor_id is not None:
+        if transition.actor == "party":
+            is_party = actor_id in (current.get("user_id"), current.get("professional_id"))
+        else:
+            is_party = current.get(f"{transition.actor}_id") == actor_id
+        if not is_party:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+
+    if current.get("status") not in transition.source:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=transition.error)
+
+    if guard and any(current.get(key) != value for key, value in guard.items()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=guard_error)
+
+    # Everything checks out now, so another request changed it in between
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Booking was updated by another request, please refresh and try again"
+    )
@@ -0,0 +1,174 @@
+"""
+Denormalized catalog state on service documents
+
+Every service carries professional_active (its professional exists, is a
+professional, is active and is not suspended), so the public catalog is
+a single indexed query instead of a $in over every visible professional.
+Admin routes that change a professional's role, status or suspension
+call sync_professional_services(); reconcile_professional_flags() fixes
+any drift (it also runs as a scheduled job).
+
+Every service also carries rank_score, the "recommended" sort key, which
+recompute_rank_scores() rebuilds from ratings and recent booking history
+every RANK_SCORE_SECONDS. Both jobs can be run by hand:
+
+    python -m app.services.catalog
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import db
+from app.utils.cache import TTLCache
+
+# Total + facet counts per filter combination for GET /api/services; pages
+# are always fetched fresh, so a hit turns the catalog into a single
+# indexed query. Writes clear it in the worker that made them; other
+# workers see their counts for up to CATALOG_FACET_CACHE_TTL_SECONDS.
+catalog_facets_cache = TTLCache(
+    maxsize=settings.CATALOG_FACET_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_FACET_CACHE_TTL_SECONDS
+)
+
+# rank_score = weighted sum of four signals, each in [0, 1]
+RANK_WEIGHTS = {"quality": 0.4, "velocity": 0.3, "reliability": 0.2, "freshness": 0.1}
+PRIOR_RATING = 3.5          # few ratings pull the quality signal towards this
+PRIOR_RATINGS = 5
+VELOCITY_MIDPOINT = 10      # bookings in the window that score 0.5 on velocity
+PRIOR_BOOKINGS = 5          # smooths the cancellation rate of rarely booked services
+
+# What a brand-new service scores: prior rating, no bookings, fresh
+NEW_SERVICE_RANK_SCORE = round(
+    RANK_WEIGHTS["quality"] * PRIOR_RATING / 5 + RANK_WEIGHTS["reliability"] + RANK_WEIGHTS["freshness"], 4
+)
+
+def professional_active(user: dict) -> bool:
+    return (
+        bool(user)
+        and user.get("role") == "professional"
+        and user.get("is_suspended") is not True
+        and user.get("is_active") is not False
+    )
+
+
+async def sync_professional_services(user_id) -> int:
+    """Fan the professional's current state out to their services"""
+    if not ObjectId.is_valid(str(user_id)):
+        return 0
+    oid = ObjectId(str(user_id))
+    user = await db.db.users.find_one({"_id": oid}, {"role": 1, "is_suspended": 1, "is_active": 1})
+    active = professional_active(user)
+
+    result = await db.db.services.update_many(
+        {"professional_id": oid, "professional_active": {"$ne": active}},
+        {"$set": {"professional_active": active}}
+    )
+    if result.modified_count:
+        catalog_facets_cache.clear()
+    return result.modified_count
+
+
+async def reconcile_professional_flags():
+    """Recompute professional_active for every service, server-side"""
+    pipeline = [
+        {"$project": {"professional_id": 1, "professional_active": 1}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "professional_id",
+            "foreignField": "_id",
+            "as": "professional",
+        }},
+        {"$project": {
+            "current": "$professional_active",
+            # A missing professional leaves $$pro unset, so the role check fails
+            "professional_active": {"$let": {
+                "vars": {"pro": {"$arrayElemAt": ["$professional", 0]}},
+                "in": {"$and": [
+                    {"$eq": ["$$pro.role", "professional"]},
+                    {"$ne": ["$$pro.is_suspended", True]},
+                    {"$ne": ["$$pro.is_active", False]},
+                ]},
+            }},
+        }},
+        {"$match": {"$expr": {"$ne": ["$current", "$professional_active"]}}},
+        {"$project": {"professional_active": 1}},
+        {"$merge": {"into": "services", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]
+    await db.db.services.aggregate(pipeline).to_list(None)
+    catalog_facets_cache.clear()
+
+
+async def recompute_rank_scores():
+    """
+    Rebuild rank_score for every service, server-side, in two passes:
+    booking counts per service over the last RANK_WINDOW_DAYS are merged
+    into services.rank_stats, then one pipeline scores every service.
+    """
+    now = datetime.utcnow()
+    since = now - timedelta(days=settings.RANK_WINDOW_DAYS)
+
+    # Cancellations by the professional or by expiry count against a
+    # service; a customer changing their mind does not
+    await db.db.bookings.aggregate([
+        {"$match": {"created_at": {"$gte": since}, "service_id": {"$type": "string"}}},
+        {"$group": {
+            "_id": "$service_id",
+            "bookings": {"$sum": 1},
+            "cancelled": {"$sum": {"$cond": [
+                {"$and": [{"$eq": ["$status", "cancelled"]}, {"$ne": ["$cancelled_by", "user"]}]}, 1, 0
+            ]}},
+        }},
+        {"$project": {"_id": {"$convert": {"input": "$_id", "to": "objectId", "onError": None}},
+                      "rank_stats": {"bookings": "$bookings", "cancelled": "$cancelled", "at": now}}},
+        {"$match": {"_id": {"$ne": None}}},
+        {"$merge": {"into": "services", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]).to_list(None)
+
+    # Stats not stamped by this run belong to services with no bookings in the window
+    current = {"$eq": ["$rank_stats.at", now]}
+    recent = {"$cond": [current, "$rank_stats.bookings", 0]}
+    cancelled = {"$cond": [current, "$rank_stats.cancelled", 0]}
+    ratings = {"$ifNull": ["$total_ratings", 0]}
+    age_days = {"$divide": [{"$subtract": [now, {"$ifNull": ["$created_at", now]}]}, 86400000]}
+    signals = {
+        "quality": {"$divide": [
+            {"$add": [{"$multiply": [{"$ifNull": ["$rating", 0]}, ratings]}, PRIOR_RATING * PRIOR_RATINGS]},
+            {"$multiply": [{"$add": [ratings, PRIOR_RATINGS]}, 5]},
+        ]},
+        "velocity": {"$divide": [recent, {"$add": [recent, VELOCITY_MIDPOINT]}]},
+        "reliability": {"$subtract": [1, {"$divide": [cancelled, {"$add": [recent, PRIOR_BOOKINGS]}]}]},
+        "freshness": {"$pow": [0.5, {"$divide": [
+            {"$max": [age_days, 0]}, settings.RANK_FRESHNESS_HALF_LIFE_DAYS
+        ]}]},
+    }
+    score = {"$round": [{"$add": [
+        {"$multiply": [weight, signals[name]]} for name, weight in RANK_WEIGHTS.items()
+    ]}, 4]}
+
+    await db.db.services.aggregate([
+        {"$project": {"rank_score": 1, "rank_stats": 1, "rating": 1, "total_ratings": 1, "created_at": 1}},
+        {"$project": {"current": "$rank_score", "rank_score": score}},
+        {"$match": {"$expr": {"$ne": ["$current", "$rank_score"]}}},
+        {"$project": {"rank_score": 1}},
+        {"$merge": {"into": "services", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]).to_list(None)
+
+
+async def _main():
+    from app.database import connect_to_mongo, close_mongo_connection
+
+    await connect_to_mongo()
+    try:
+        await reconcile_professional_flags()
+        print("Reconciled professional_active on services")
+        await recompute_rank_scores()
+        print("Recomputed rank_score on services")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,259 @@
+"""
+Email outbox - background delivery over a reused SMTP connection
+
+Request handlers enqueue a message and return immediately. A single
+worker task drains the queue in batches and sends them from a dedicated
+thread that keeps one SMTP connection open between batches (closing it
+after SMTP_IDLE_SECONDS without mail). Transient failures are retried
+with exponential backoff; permanent ones (rejected recipients) are not.
+
+For local testing run a debugging SMTP server and point the app at it:
+
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false
+"""
+
+import asyncio
+import smtplib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import List, Optional, Tuple
+
+from app.config import settings
+
+
+@dataclass
+class OutboxItem:
+    """A queued message and its delivery bookkeeping"""
+    message: Message
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class EmailOutbox:
+    """
+    Bounded in-process email queue with one delivery worker.
+
+    Usage:
+        email_outbox.enqueue(msg)        # from a request handler
+        await email_outbox.start()       # in the app lifespan
+        await email_outbox.stop()
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        idle_seconds: float
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.idle_seconds = idle_seconds
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # One thread owns the SMTP connection, so it is never shared
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._retry_handles = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.connections_opened = 0
+        self.last_error: Optional[str] = None
+        self._latencies = deque(maxlen=1000)
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    def enqueue(self, message: Message) -> bool:
+        """Queue a message for delivery; False if the outbox is full"""
+        return self._put(OutboxItem(message=message))
+
+    def _put(self, item: OutboxItem) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Email outbox full, dropping message to {item.message['To']}")
+            return False
+
+    async def start(self):
+        """Start the delivery worker"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush what is already queued (up to timeout), then stop the worker"""
+        if self._worker is None:
+            return
+
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Email outbox stopped with {self.queue.qsize()} undelivered messages")
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
+
+    # ============ Worker ============
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                first = await asyncio.wait_for(self.queue.get(), self.idle_seconds)
+            except asyncio.TimeoutError:
+                await loop.run_in_executor(self._executor, self._disconnect)
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                failures = await loop.run_in_executor(self._executor, self._send_batch, batch)
+            except Exception as e:
+                failures = [(item, e, True) for item in batch]
+
+            failed_ids = set()
+            for item, error, retryable in failures:
+                failed_ids.add(id(item))
+                self._handle_failure(item, error, retryable)
+
+            now = time.monotonic()
+            for item in batch:
+                if id(item) not in failed_ids:
+                    self.sent += 1
+                    self._latencies.append(now - item.enqueued_at)
+                self.queue.task_done()
+
+    def _handle_failure(self, item: OutboxItem, error: Exception, retryable: bool):
+        item.attempts += 1
+        self.last_error = str(error)
+
+        if not retryable or item.attempts >= self.max_attempts:
+            self.failed += 1
+            print(f"Failed to send email to {item.message['To']} after {item.attempts} attempts: {error}")
+            return
+
+        self.retried += 1
+        delay = self.retry_base_seconds * (2 ** (item.attempts - 1))
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            self._put(item)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    # ============ SMTP (runs on the smtp thread) ============
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            return self._smtp
+
+        host = settings.SMTP_HOST or settings.SMTP_SERVER
+        smtp = smtplib.SMTP(host, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
+            smtp.starttls()
+        username = settings.SMTP_USER or settings.SMTP_USERNAME
+        if username and settings.SMTP_PASSWORD:
+            smtp.login(username, settings.SMTP_PASSWORD)
+
+        self._smtp = smtp
+        self.connections_opened += 1
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def _send_batch(self, batch: List[OutboxItem]) -> List[Tuple[OutboxItem, Exception, bool]]:
+        """Send a batch; return (item, error, retryable) for each failure"""
+        failures = []
+        for item in batch:
+            try:
+                self._send_one(item.message)
+            except smtplib.SMTPRecipientsRefused as e:
+                failures.append((item, e, False))
+            except (smtplib.SMTPException, OSError) as e:
+                # Connection state is unknown after an error; start fresh
+                self._disconnect()
+                failures.append((item, e, True))
+        return failures
+
+    def _send_one(self, message: Message):
+        try:
+            self._connect().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection; reconnect once
+            self._smtp = None
+            self._connect().send_message(message)
+
+    # ============ Metrics ============
+
+    def stats(self) -> dict:
+        """Return queue depth, delivery counters and latency percentiles"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending_retries": len(self._retry_handles),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "connections_opened": self.connections_opened,
+            "connected": self._smtp is not None,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": round(latencies[-1] * 1000, 1) if latencies else None,
+            "last_error": self.last_error,
+        }
+
+
+email_outbox = EmailOutbox(
+    max_queue=settings.EMAIL_OUTBOX_MAX_QUEUE,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+    idle_seconds=settings.SMTP_IDLE_SECONDS
+)
@@ -0,0 +1,251 @@
+"""
+Typo-tolerant professional search
+
+FuzzyCorpus indexes the words of every visible professional's name,
+profession, skills and bio. Words are stored once in a sorted vocabulary;
+each has a compact posting list (doc numbers in an array('I'), field bits
+in an array('B')), and a trigram table maps each trigram to the ids of
+the words containing it. A query word is matched against the vocabulary
+by shared trigrams, then confirmed with a bounded edit distance, so
+"electrican" finds "electrician" and "plumer" finds "plumber"; words
+typed so far also match as prefixes ("elec").
+
+ProfessionalFuzzyIndex rebuilds the corpus in a worker thread every
+FUZZY_REFRESH_SECONDS and swaps it in, so searches never wait on a
+rebuild. Results are candidates; the route still filters in MongoDB.
+"""
+
+import asyncio
+import bisect
+import heapq
+import time
+from array import array
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.database import db
+from app.services.search import words
+
+# Field bits and weights: a name or profession match outranks a mention in the bio
+NAME, PROFESSION, SKILLS, BIO = 1, 2, 4, 8
+FIELD_WEIGHTS = {NAME: 3.0, PROFESSION: 3.0, SKILLS: 2.0, BIO: 1.0}
+# Best field weight for every combination of field bits
+_BITS_WEIGHT = [max([w for bit, w in FIELD_WEIGHTS.items() if bits & bit], default=0.0) for bits in range(16)]
+
+PREFIX_PENALTY = 0.85        # "elec" -> "electrician" scores a little below an exact word
+MAX_PREFIX_WORDS = 200
+
+VISIBLE_PROFESSIONALS = {
+    "role": "professional",
+    "is_active": True,
+    "is_suspended": False,
+    "approval_status": "approved",
+}
+PROJECTION = {"name": 1, "approval_data.profession": 1, "approval_data.skills": 1, "approval_data.bio": 1}
+
+
+def trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(word: str) -> int:
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 6 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        best = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            best = min(best, value)
+        if best > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _fields(professional: dict) -> Iterable[Tuple[int, str]]:
+    approval_data = professional.get("approval_data") or {}
+    yield NAME, professional.get("name") or ""
+    yield PROFESSION, approval_data.get("profession") or ""
+    skills = approval_data.get("skills") or []
+    yield SKILLS, " ".join(skill for skill in skills if isinstance(skill, str))
+    yield BIO, approval_data.get("bio") or ""
+
+
+class FuzzyCorpus:
+    """Immutable once built; rebuilt and swapped as a whole"""
+
+    def __init__(self):
+        self.ids: List[str] = []                 # doc number -> professional id
+        self.vocabulary: List[str] = []          # word id -> word, sorted
+        self.docs: List[array] = []              # word id -> doc numbers
+        self.bits: List[array] = []              # word id -> field bits, parallel to docs
+        self.trigrams: Dict[str, array] = {}     # trigram -> word ids
+
+    @classmethod
+    def build(cls, professionals: Iterable[dict]) -> "FuzzyCorpus":
+        corpus = cls()
+        postings: Dict[str, Dict[int, int]] = {}
+        for professional in professionals:
+            doc = len(corpus.ids)
+            corpus.ids.append(str(professional["_id"]))
+            for bit, text in _fields(professional):
+                for word in words(text):
+                    posting = postings.setdefault(word, {})
+                    posting[doc] = posting.get(doc, 0) | bit
+
+        corpus.vocabulary = sorted(postings)
+        grams: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(corpus.vocabulary):
+            posting = postings.pop(word)
+            corpus.docs.append(array("I", posting.keys()))
+            corpus.bits.append(array("B", posting.values()))
+            for gram in trigrams(word):
+                grams.setdefault(gram, []).append(word_id)
+        corpus.trigrams = {gram: array("I", ids) for gram, ids in grams.items()}
+        return corpus
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def match_words(self, word: str) -> Dict[int, float]:
+        """Vocabulary words close to `word`: {word_id: similarity in (0, 1]}"""
+        limit = max_edits(word)
+        matches: Dict[int, float] = {}
+
+        query_grams = trigrams(word)
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for word_id in self.trigrams.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+        # One edit destroys at most three of the query's trigrams, a transposition four
+        needed = max(1, len(query_grams) - 4 * limit)
+        for word_id, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(word, self.vocabulary[word_id], limit)
+            if distance <= limit:
+                matches[word_id] = 1.0 - distance / (len(word) + 1)
+
+        if len(word) >= 3:
+            start = bisect.bisect_left(self.vocabulary, word)
+            for word_id in range(start, min(start + MAX_PREFIX_WORDS, len(self.vocabulary))):
+                if not self.vocabulary[word_id].startswith(word):
+                    break
+                matches.setdefault(word_id, PREFIX_PENALTY)
+        return matches
+
+    def _word_scores(self, word: str, within: Optional[dict] = None) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for word_id, similarity in self.match_words(word).items():
+            for doc, bits in zip(self.docs[word_id], self.bits[word_id]):
+                if within is not None and doc not in within:
+                    continue
+                score = similarity * _BITS_WEIGHT[bits]
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, text: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Top `limit` (professional_id, score) pairs. Professionals matching
+        every query word rank on their own; otherwise any-word matches.
+        """
+        query = words(text)
+        if not query or not self.ids:
+            return []
+
+        scores = self._word_scores(query[0])
+        for word in query[1:]:
+            if not scores:
+                break
+            word_scores = self._word_scores(word, within=scores)
+            scores = {doc: score + word_scores[doc] for doc, score in scores.items() if doc in word_scores}
+
+        if not scores and len(query) > 1:
+            for word in query:
+                for doc, score in self._word_scores(word).items():
+                    scores[doc] = scores.get(doc, 0.0) + score
+
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(self.ids[doc], score) for doc, score in top]
+
+
+class ProfessionalFuzzyIndex:
+    """Per-worker FuzzyCorpus, rebuilt in the background"""
+
+    def __init__(self):
+        self._corpus: Optional[FuzzyCorpus] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.searches = 0
+        self.rebuilds = 0
+        self.last_rebuild_ms = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._lock:
+                    await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Professional search index rebuild failed: {e}")
+            await asyncio.sleep(settings.FUZZY_REFRESH_SECONDS)
+
+    async def rebuild(self):
+        started = time.perf_counter()
+        professionals = await db.db.users.find(VISIBLE_PROFESSIONALS, PROJECTION).to_list(None)
+        # Tokenizing and sorting is CPU work; keep it off the event loop
+        self._corpus = await asyncio.to_thread(FuzzyCorpus.build, professionals)
+        self.rebuilds += 1
+        self.last_rebuild_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    async def search(self, text: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        if self._corpus is None:
+            async with self._lock:
+                if self._corpus is None:
+                    await self.rebuild()
+        self.searches += 1
+        return self._corpus.search(text, limit or settings.FUZZY_MAX_RESULTS)
+
+    def stats(self) -> dict:
+        corpus = self._corpus
+        return {
+            "professionals": len(corpus) if corpus else 0,
+            "words": len(corpus.vocabulary) if corpus else 0,
+            "searches": self.searches,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_ms": self.last_rebuild_ms,
+        }
+
+
+professional_fuzzy = ProfessionalFuzzyIndex()
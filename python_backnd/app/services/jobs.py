@@ -0,0 +1,209 @@
+"""
+Scheduled jobs: offer expiry, stale pending bookings, appointment reminders,
+catalog flag reconciliation, recommended ranking
+
+Importing this module registers the handlers with the scheduler. Sweeps
+work in batches of SCHEDULER_BATCH_SIZE; reminders are one job per
+booking, scheduled when it is accepted or rescheduled.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import db
+from app.services.availability import scheduled_at
+from app.services.booking_counts import invalidate_status_counts
+from app.services.booking_state import apply_transition
+from app.services.catalog import reconcile_professional_flags, recompute_rank_scores
+from app.services.notification_service import NotificationService
+from app.services.scheduler import scheduler
+from app.socket_manager import emit_booking_cancelled
+
+# Bounded so one slow sweep cannot hold its lease past SCHEDULER_LEASE_SECONDS
+MAX_BATCHES_PER_SWEEP = 10
+
+REMINDER_STATES = ("accepted", "confirmed")
+
+
+def _service_name(booking: dict) -> str:
+    return booking.get("service_name") or booking.get("service_type", "Service")
+
+
+# ============ Offers ============
+
+@scheduler.handler("expire_offers", every=settings.OFFER_EXPIRY_SWEEP_SECONDS)
+async def expire_offers(jobs: List[dict]):
+    """Expire pending offers past expires_at and accepted prices past their validity"""
+    now = datetime.utcnow()
+    pending, accepted = await asyncio.gather(
+        db.db.offers.update_many(
+            {"status": "pending", "expires_at": {"$lte": now}},
+            {"$set": {"status": "expired", "updated_at": now}}
+        ),
+        db.db.offers.update_many(
+            {"status": "accepted", "accepted_price_valid_until": {"$lte": now}},
+            {"$set": {"status": "expired", "updated_at": now}}
+        ),
+    )
+    if pending.modified_count or accepted.modified_count:
+        print(f"Expired {pending.modified_count} pending and {accepted.modified_count} accepted offers")
+
+
+# ============ Pending bookings ============
+
+async def _escalate_pending_batch(cutoff: datetime) -> int:
+    """Remind professionals once about requests they have not answered"""
+    bookings = await db.db.bookings.find(
+        {"status": "pending", "created_at": {"$lte": cutoff}, "escalated_at": {"$exists": False}},
+        {"professional_id": 1, "service_name": 1, "service_type": 1, "scheduled_date": 1, "scheduled_time": 1}
+    ).limit(settings.SCHEDULER_BATCH_SIZE).to_list(None)
+    if not bookings:
+        return 0
+
+    await db.db.bookings.update_many(
+        {"_id": {"$in": [booking["_id"] for booking in bookings]}},
+        {"$set": {"escalated_at": datetime.utcnow()}}
+    )
+    await asyncio.gather(*(
+        NotificationService.booking_response_overdue(
+            professional_id=booking["professional_id"],
+            booking_id=str(booking["_id"]),
+            service_name=_service_name(booking),
+            date=booking.get("scheduled_date", ""),
+            time=booking.get("scheduled_time", "")
+        )
+        for booking in bookings if booking.get("professional_id")
+    ), return_exceptions=True)
+    return len(bookings)
+
+
+async def _expire_pending_batch(cutoff: datetime) -> int:
+    """Cancel requests nobody accepted in time, through the state machine"""
+    stale = await db.db.bookings.find(
+        {"status": "pending", "created_at": {"$lte": cutoff}}, {"_id": 1}
+    ).limit(settings.SCHEDULER_BATCH_SIZE).to_list(None)
+    if not stale:
+        return 0
+
+    reason = "Not accepted by the professional in time"
+    results = await asyncio.gather(*(
+        apply_transition(
+            str(booking["_id"]), "expire", None,
+            fields={"cancelled_by": "system", "cancellation_reason": reason}
+        )
+        for booking in stale
+    ), return_exceptions=True)
+
+    # Anything that raised was accepted or cancelled in the meantime
+    cancelled = [booking for booking in results if isinstance(booking, dict)]
+    notifications = []
+    for booking in cancelled:
+        booking_id = str(booking["_id"])
+        invalidate_status_counts(booking.get("user_id"), booking.get("professional_id"))
+        notifications.append(emit_booking_cancelled(
+            booking_id=booking_id,
+            user_id=booking.get("user_id"),
+            professional_id=booking.get("professional_id"),
+            cancelled_by="system",
+            reason=reason
+        ))
+        notifications.append(NotificationService.booking_expired_user(
+            user_id=booking.get("user_id"),
+            booking_id=booking_id,
+            service_name=_service_name(booking),
+            date=booking.get("scheduled_date", ""),
+            time=booking.get("scheduled_time", "")
+        ))
+    await asyncio.gather(*notifications, return_exceptions=True)
+    return len(stale)
+
+
+@scheduler.handler("pending_bookings", every=settings.BOOKING_SWEEP_SECONDS)
+async def sweep_pending_bookings(jobs: List[dict]):
+    """Escalate, then cancel, bookings still pending after the configured hours"""
+    now = datetime.utcnow()
+    for batch, cutoff in (
+        (_escalate_pending_batch, now - timedelta(hours=settings.BOOKING_ESCALATE_AFTER_HOURS)),
+        (_expire_pending_batch, now - timedelta(hours=settings.BOOKING_EXPIRE_AFTER_HOURS)),
+    ):
+        for _ in range(MAX_BATCHES_PER_SWEEP):
+            if await batch(cutoff) < settings.SCHEDULER_BATCH_SIZE:
+                break
+
+
+# ============ Reminders ============
+
+async def schedule_booking_reminder(booking: dict):
+    """(Re)schedule the pre-appointment reminder for an accepted booking"""
+    appointment = scheduled_at(booking.get("scheduled_date"), booking.get("scheduled_time"))
+    now = datetime.utcnow()
+    if appointment is None or appointment <= now:
+        return
+
+    run_at = max(appointment - timedelta(minutes=settings.BOOKING_REMINDER_MINUTES), now)
+    await scheduler.schedule("booking_reminder", str(booking["_id"]), run_at, {
+        "booking_id": str(booking["_id"]),
+        "scheduled_date": booking.get("scheduled_date"),
+        "scheduled_time": booking.get("scheduled_time"),
+    })
+
+
+@scheduler.handler("booking_reminder")
+async def send_booking_reminders(jobs: List[dict]):
+    """Notify both sides of every due appointment that is still on"""
+    payloads = {job["payload"].get("booking_id"): job["payload"] for job in jobs}
+    ids = [ObjectId(booking_id) for booking_id in payloads if ObjectId.is_valid(booking_id or "")]
+    bookings = await db.db.bookings.find(
+        {"_id": {"$in": ids}, "status": {"$in": list(REMINDER_STATES)}, "reminder_sent_at": {"$exists": False}},
+        {"user_id": 1, "professional_id": 1, "service_name": 1, "service_type": 1,
+         "scheduled_date": 1, "scheduled_time": 1}
+    ).to_list(None)
+
+    # Skip bookings moved since the job was scheduled (their new job is pending)
+    due = [
+        booking for booking in bookings
+        if payloads[str(booking["_id"])].get("scheduled_date") == booking.get("scheduled_date")
+        and payloads[str(booking["_id"])].get("scheduled_time") == booking.get("scheduled_time")
+    ]
+    if not due:
+        return
+
+    await db.db.bookings.update_many(
+        {"_id": {"$in": [booking["_id"] for booking in due]}},
+        {"$set": {"reminder_sent_at": datetime.utcnow()}}
+    )
+    notifications = []
+    for booking in due:
+        booking_id = str(booking["_id"])
+        details = dict(
+            booking_id=booking_id,
+            service_name=_service_name(booking),
+            date=booking.get("scheduled_date", ""),
+            time=booking.get("scheduled_time", ""),
+        )
+        notifications.append(NotificationService.booking_reminder(
+            user_id=booking.get("user_id"), action_url=f"/booking/{booking_id}", **details
+        ))
+        if booking.get("professional_id"):
+            notifications.append(NotificationService.booking_reminder(
+                user_id=booking["professional_id"], action_url="/professional/bookings/accepted", **details
+            ))
+    await asyncio.gather(*notifications, return_exceptions=True)
+
+
+# ============ Catalog ============
+
+@scheduler.handler("reconcile_professional_flags", every=settings.CATALOG_RECONCILE_SECONDS)
+async def reconcile_catalog(jobs: List[dict]):
+    """Repair services.professional_active drift (and backfill it on first run)"""
+    await reconcile_professional_flags()
+
+
+@scheduler.handler("recompute_rank_scores", every=settings.RANK_SCORE_SECONDS)
+async def recompute_recommended_ranking(jobs: List[dict]):
+    """Rebuild services.rank_score from ratings and recent booking history"""
+    await recompute_rank_scores()
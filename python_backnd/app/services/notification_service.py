@@ -39,6 +39,8 @@ class NotificationService:
             NotificationType.PROFESSIONAL_ON_WAY: "Truck",
             NotificationType.PROFESSIONAL_ARRIVED: "MapPin",
             NotificationType.OTP_GENERATED: "Key",
+            NotificationType.BOOKING_REMINDER: "Clock",
+            NotificationType.BOOKING_EXPIRED: "XCircle",
             
             # Booking - Professional side
             NotificationType.NEW_BOOKING_REQUEST: "Calendar",
@@ -46,6 +48,7 @@ class NotificationService:
             NotificationType.BOOKING_RESCHEDULED_BY_USER: "Calendar",
             NotificationType.USER_SHARED_OTP: "Key",
             NotificationType.NEW_REVIEW_RECEIVED: "Star",
+            NotificationType.BOOKING_RESPONSE_OVERDUE: "AlertCircle",
             
             # Payment
             NotificationType.PAYMENT_RECEIVED: "DollarSign",
@@ -103,6 +106,8 @@ class NotificationService:
         
         warning_types = [
             NotificationType.BOOKING_CANCELLED,
+            NotificationType.BOOKING_EXPIRED,
+            NotificationType.BOOKING_RESPONSE_OVERDUE,
             NotificationType.PAYMENT_FAILED,
             NotificationType.OFFER_EXPIRING,
         ]
@@ -111,6 +116,7 @@ class NotificationService:
             NotificationType.PROFESSIONAL_ON_WAY,
             NotificationType.PROFESSIONAL_ARRIVED,
             NotificationType.BOOKING_STARTED,
+            NotificationType.BOOKING_REMINDER,
             NotificationType.NEW_FEATURE,
         ]
         
@@ -691,6 +697,93 @@ class NotificationService:
             action_text="View Booking"
         )
 
+    
+    # =============================================
+    # SCHEDULED NOTIFICATIONS
+    # =============================================
+    
+    @classmethod
+    async def booking_reminder(
+        cls,
+        user_id: str,
+        booking_id: str,
+        service_name: str,
+        date: str,
+        time: str,
+        action_url: str
+    ):
+        """Remind a customer or professional of an upcoming appointment"""
+        return await cls.create(
+            user_id=user_id,
+            notification_type=NotificationType.BOOKING_REMINDER,
+            title="Upcoming Appointment ⏰",
+            message=f"Reminder: {service_name} is scheduled for {date} at {time}",
+            category=NotificationCategory.BOOKING,
+            priority=NotificationPriority.HIGH,
+            data={
+                "booking_id": booking_id,
+                "service_name": service_name,
+                "date": date,
+                "time": time
+            },
+            action_url=action_url,
+            action_text="View Booking"
+        )
+    
+    @classmethod
+    async def booking_response_overdue(
+        cls,
+        professional_id: str,
+        booking_id: str,
+        service_name: str,
+        date: str,
+        time: str
+    ):
+        """Nudge a professional who has not answered a booking request"""
+        return await cls.create(
+            user_id=professional_id,
+            notification_type=NotificationType.BOOKING_RESPONSE_OVERDUE,
+            title="Booking Request Waiting ⏳",
+            message=f"A {service_name} request for {date} at {time} is still waiting for your response",
+            category=NotificationCategory.BOOKING,
+            priority=NotificationPriority.URGENT,
+            data={
+                "booking_id": booking_id,
+                "service_name": service_name,
+                "date": date,
+                "time": time
+            },
+            action_url=f"/professional/bookings/requests",
+            action_text="Respond Now"
+        )
+    
+    @classmethod
+    async def booking_expired_user(
+        cls,
+        user_id: str,
+        booking_id: str,
+        service_name: str,
+        date: str,
+        time: str
+    ):
+        """Tell the customer their request expired without a response"""
+        return await cls.create(
+            user_id=user_id,
+            notification_type=NotificationType.BOOKING_EXPIRED,
+            title="Booking Request Expired",
+            message=f"Your {service_name} request for {date} at {time} was not accepted in time and has been cancelled",
+            category=NotificationCategory.BOOKING,
+            priority=NotificationPriority.HIGH,
+            data={
+                "booking_id": booking_id,
+                "service_name": service_name,
+                "date": date,
+                "time": time
+            },
+            action_url=f"/service",
+            action_text="Book Again"
+        )
+
 
 # Create singleton instance
 notification_service = NotificationService()
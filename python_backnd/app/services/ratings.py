@@ -0,0 +1,153 @@
+"""
+Rating aggregates for professionals and services
+
+Each rated entity carries rating_sum, rating_count and a per-star
+rating_histogram, updated atomically as ratings arrive, plus the derived
+rating (average, 2 dp) and total_ratings fields the rest of the app
+already reads. reconcile_ratings() rebuilds everything from the bookings
+collection:
+
+    python -m app.services.ratings
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.database import db
+from app.services.catalog import catalog_facets_cache
+
+STARS = ("1", "2", "3", "4", "5")
+
+# Aggregates written by record_rating / reconcile_ratings
+EMPTY_RATING_STATS = {
+    "rating": 0.0,
+    "total_ratings": 0,
+    "rating_sum": 0,
+    "rating_count": 0,
+    "rating_histogram": {star: 0 for star in STARS},
+}
+
+
+def _increment_pipeline(stars: int) -> list:
+    """Update pipeline adding one rating and recomputing the average"""
+    star = str(stars)
+    # Docs rated before rating_sum existed (or seeded with only rating /
+    # total_ratings) start from those fields instead of from zero; the sum
+    # is rebuilt from the rounded average, reconcile_ratings() makes it exact
+    seeded_count = {"$ifNull": ["$total_ratings", 0]}
+    seeded_sum = {"$round": [{"$multiply": [{"$ifNull": ["$rating", 0]}, seeded_count]}, 0]}
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", seeded_sum]}, stars]},
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", seeded_count]}, 1]},
+            f"rating_histogram.{star}": {"$add": [{"$ifNull": [f"$rating_histogram.{star}", 0]}, 1]},
+        }},
+        {"$set": {
+            "rating": {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+            "total_ratings": "$rating_count",
+        }},
+    ]
+
+
+async def record_rating(professional_id: Optional[str], service_id: Optional[str], stars: int):
+    """Add one rating to the professional's and the service's aggregates"""
+    pipeline = _increment_pipeline(stars)
+    updates = []
+
+    if professional_id and ObjectId.is_valid(str(professional_id)):
+        updates.append(db.db.users.update_one({"_id": ObjectId(str(professional_id))}, pipeline))
+    if service_id and ObjectId.is_valid(str(service_id)):
+        updates.append(db.db.services.update_one({"_id": ObjectId(str(service_id))}, pipeline))
+
+    await asyncio.gather(*updates)
+    if service_id:
+        # Rating bands in the catalog facets move with the service's rating
+        catalog_facets_cache.clear()
+
+
+def rating_summary(doc: dict) -> dict:
+    """Rating fields for API responses, read from an already-fetched doc"""
+    histogram = doc.get("rating_histogram") or {}
+    return {
+        "rating": doc.get("rating", 0.0) or 0.0,
+        "total_reviews": doc.get("total_ratings", 0) or 0,
+        "rating_breakdown": {star: histogram.get(star, 0) for star in STARS},
+    }
+
+
+async def _reconcile_collection(collection, group_field: str) -> int:
+    """Rebuild aggregates for every doc referenced by rated bookings"""
+    pipeline = [
+        {"$match": {"rating": {"$gte": 1, "$lte": 5}, group_field: {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {"target": f"${group_field}", "stars": "$rating"},
+            "n": {"$sum": 1},
+        }},
+    ]
+
+    stats: Dict[str, dict] = {}
+    async for row in db.db.bookings.aggregate(pipeline):
+        target = str(row["_id"]["target"])
+        stars = int(row["_id"]["stars"])
+        entry = stats.setdefault(target, {"sum": 0, "count": 0, "histogram": {star: 0 for star in STARS}})
+        entry["sum"] += stars * row["n"]
+        entry["count"] += row["n"]
+        entry["histogram"][str(stars)] += row["n"]
+
+    operations = []
+    rated_ids = []
+    for target, entry in stats.items():
+        if not ObjectId.is_valid(target):
+            continue
+        rated_ids.append(ObjectId(target))
+        operations.append(UpdateOne(
+            {"_id": ObjectId(target)},
+            {"$set": {
+                "rating": round(entry["sum"] / entry["count"], 2),
+                "total_ratings": entry["count"],
+                "rating_sum": entry["sum"],
+                "rating_count": entry["count"],
+                "rating_histogram": entry["histogram"],
+            }}
+        ))
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+
+    # Anything still carrying ratings without rated bookings is reset
+    await collection.update_many(
+        {
+            "_id": {"$nin": rated_ids},
+            "$or": [{"rating_count": {"$gt": 0}}, {"total_ratings": {"$gt": 0}}]
+        },
+        {"$set": EMPTY_RATING_STATS}
+    )
+    return len(operations)
+
+
+async def reconcile_ratings() -> dict:
+    """Recompute every professional's and service's rating aggregates"""
+    professionals, services = await asyncio.gather(
+        _reconcile_collection(db.db.users, "professional_id"),
+        _reconcile_collection(db.db.services, "service_id"),
+    )
+    if services:
+        catalog_facets_cache.clear()
+    return {"professionals": professionals, "services": services}
+
+
+async def _main():
+    from app.database import connect_to_mongo, close_mongo_connection
+
+    await connect_to_mongo()
+    try:
+        result = await reconcile_ratings()
+        print(f"Reconciled ratings: {result['professionals']} professionals, {result['services']} services")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,284 @@
+"""
+In-process job scheduler with jobs persisted in MongoDB
+
+Jobs live in the scheduled_jobs collection ({_id, kind, run_at, payload,
+status}). Each worker keeps a heap of the jobs due within the next poll
+window, sleeps until the earliest one, then claims every due job in one
+update_many with a lease and runs them grouped by kind, so a handler
+always receives a batch. A worker that dies mid-job leaves a lease that
+expires, and whichever worker refills next picks the job up again.
+
+Recurring jobs (sweeps) are stored like any other job and rescheduled
+after each run, so only one worker runs a sweep per interval.
+
+    @scheduler.handler("expire_offers", every=300)
+    async def expire_offers(jobs): ...
+
+    await scheduler.schedule("booking_reminder", booking_id, run_at, {...})
+"""
+
+import asyncio
+import heapq
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database import db
+
+JOBS_COLLECTION = "scheduled_jobs"
+
+Handler = Callable[[List[dict]], Awaitable[None]]
+
+
+class Scheduler:
+    """Heap of upcoming jobs for this worker, backed by scheduled_jobs"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._handlers: Dict[str, Handler] = {}
+        self._every: Dict[str, float] = {}
+        self._heap: List[Tuple[datetime, str]] = []
+        self._queued = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.ran = 0
+        self.failed = 0
+        self.lost_claims = 0
+        self.refills = 0
+
+    @property
+    def collection(self):
+        return db.db[JOBS_COLLECTION]
+
+    def handler(self, kind: str, every: Optional[float] = None):
+        """Register the batch handler for a job kind; every= makes it recurring"""
+        def register(fn: Handler) -> Handler:
+            self._handlers[kind] = fn
+            if every:
+                self._every[kind] = every
+            return fn
+        return register
+
+    # ============ Scheduling ============
+
+    async def schedule(self, kind: str, key: str, run_at: datetime, payload: Optional[dict] = None):
+        """Create or move the job kind:key (scheduling it again replaces it)"""
+        job_id = f"{kind}:{key}"
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "kind": kind, "run_at": run_at, "payload": payload or {},
+                    "status": "scheduled", "attempts": 0, "updated_at": now,
+                },
+                "$unset": {"lease_owner": "", "lease_token": "", "lease_until": "", "error": ""},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True
+        )
+        self._push(run_at, job_id)
+
+    async def cancel(self, kind: str, key: str):
+        await self.collection.delete_one({"_id": f"{kind}:{key}", "status": "scheduled"})
+
+    def _push(self, run_at: datetime, job_id: str):
+        # Jobs beyond the poll window are picked up by a later refill
+        if run_at > datetime.utcnow() + timedelta(seconds=settings.SCHEDULER_POLL_SECONDS):
+            return
+        heapq.heappush(self._heap, (run_at, job_id))
+        self._queued.add(job_id)
+        if self._wake is not None:
+            self._wake.set()
+
+    # ============ Lifecycle ============
+
+    async def start(self):
+        if not settings.SCHEDULER_ENABLED or self._task is not None:
+            return
+        now = datetime.utcnow()
+        if self._every:
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": kind},
+                    {
+                        "$set": {"kind": kind, "every": every},
+                        "$setOnInsert": {"run_at": now, "status": "scheduled", "attempts": 0,
+                                         "payload": {}, "created_at": now},
+                    },
+                    upsert=True
+                )
+                for kind, every in self._every.items()
+            ], ordered=False)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print(f"Scheduler started ({len(self._handlers)} job kinds, owner {self.owner})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        next_refill = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_refill:
+                    await self._refill()
+                    next_refill = time.monotonic() + settings.SCHEDULER_POLL_SECONDS
+
+                due = self._pop_due(settings.SCHEDULER_BATCH_SIZE)
+                if due:
+                    await self._run_batch(due)
+                    continue
+
+                timeout = next_refill - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(timeout, 0.01))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+                await asyncio.sleep(settings.SCHEDULER_POLL_SECONDS)
+
+    async def _refill(self):
+        """Queue jobs due within the poll window, and jobs whose lease expired"""
+        now = datetime.utcnow()
+        horizon = now + timedelta(seconds=settings.SCHEDULER_POLL_SECONDS)
+        cursor = self.collection.find(
+            {"$or": [
+                {"status": "scheduled", "run_at": {"$lte": horizon}},
+                {"status": "running", "lease_until": {"$lte": now}},
+            ]},
+            {"run_at": 1, "status": 1}
+        ).sort("run_at", 1).limit(settings.SCHEDULER_BATCH_SIZE * 10)
+
+        async for job in cursor:
+            if job["_id"] in self._queued:
+                continue
+            run_at = now if job["status"] == "running" else job["run_at"]
+            heapq.heappush(self._heap, (run_at, job["_id"]))
+            self._queued.add(job["_id"])
+        self.refills += 1
+
+    def _pop_due(self, limit: int) -> List[str]:
+        now = datetime.utcnow()
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            _, job_id = heapq.heappop(self._heap)
+            if job_id in self._queued:
+                self._queued.discard(job_id)
+                due.append(job_id)
+        return due
+
+    # ============ Running ============
+
+    async def _run_batch(self, job_ids: List[str]):
+        """Claim the due jobs with one lease and run them grouped by kind"""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        await self.collection.update_many(
+            {
+                "_id": {"$in": job_ids},
+                "$or": [
+                    {"status": "scheduled", "run_at": {"$lte": now}},
+                    {"status": "running", "lease_until": {"$lte": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running", "lease_owner": self.owner, "lease_token": token,
+                    "lease_until": now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            }
+        )
+        jobs = await self.collection.find({"_id": {"$in": job_ids}, "lease_token": token}).to_list(None)
+        self.lost_claims += len(job_ids) - len(jobs)
+
+        by_kind: Dict[str, List[dict]] = {}
+        for job in jobs:
+            by_kind.setdefault(job["kind"], []).append(job)
+        await asyncio.gather(*(self._run_kind(kind, group, token) for kind, group in by_kind.items()))
+
+    async def _run_kind(self, kind: str, jobs: List[dict], token: str):
+        ids = [job["_id"] for job in jobs]
+        handler = self._handlers.get(kind)
+        now = datetime.utcnow()
+        try:
+            if handler is None:
+                raise RuntimeError(f"no handler registered for {kind}")
+            await handler(jobs)
+        except Exception as e:
+            self.failed += len(jobs)
+            print(f"Scheduler job {kind} failed ({len(jobs)} jobs): {e}")
+            await self._retry(jobs, str(e), token)
+            return
+
+        self.ran += len(jobs)
+        # Only finish jobs still under this lease: one rescheduled while it ran
+        # (schedule() clears the lease) or re-claimed by another worker after
+        # the lease expired belongs to someone else now
+        owned = {"_id": {"$in": ids}, "lease_token": token}
+        every = self._every.get(kind)
+        if every:
+            run_at = now + timedelta(seconds=every)
+            await self.collection.update_many(
+                owned,
+                {"$set": {"status": "scheduled", "run_at": run_at, "attempts": 0, "last_run_at": now},
+                 "$unset": {"lease_owner": "", "lease_token": "", "lease_until": "", "error": ""}}
+            )
+            for job_id in ids:
+                self._push(run_at, job_id)
+        else:
+            await self.collection.delete_many(owned)
+
+    async def _retry(self, jobs: List[dict], error: str, token: str):
+        """Back off exponentially; one-shot jobs give up after SCHEDULER_MAX_ATTEMPTS"""
+        now = datetime.utcnow()
+        operations = []
+        for job in jobs:
+            attempts = job.get("attempts", 1)
+            recurring = job["kind"] in self._every
+            if attempts >= settings.SCHEDULER_MAX_ATTEMPTS and not recurring:
+                update = {"$set": {"status": "failed", "error": error, "updated_at": now}}
+            else:
+                delay = settings.SCHEDULER_RETRY_BASE_SECONDS * (2 ** min(attempts - 1, 10))
+                if recurring:
+                    delay = min(delay, self._every[job["kind"]])
+                update = {"$set": {"status": "scheduled", "run_at": now + timedelta(seconds=delay),
+                                   "error": error, "updated_at": now}}
+            update["$unset"] = {"lease_owner": "", "lease_token": "", "lease_until": ""}
+            operations.append(UpdateOne({"_id": job["_id"], "lease_token": token}, update))
+        await self.collection.bulk_write(operations, ordered=False)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "owner": self.owner,
+            "queued": len(self._queued),
+            "ran": self.ran,
+            "failed": self.failed,
+            "lost_claims": self.lost_claims,
+            "refills": self.refills,
+            "kinds": sorted(self._handlers),
+        }
+
+
+scheduler = Scheduler()
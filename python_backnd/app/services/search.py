@@ -0,0 +1,381 @@
+"""
+In-process full-text search over the service catalog
+
+SearchCorpus is an inverted index (term -> {service_id: weighted term
+frequency}) over each active service's name, category, tags and
+description, ranked with BM25. Text is lowercased, stop words dropped and
+light-stemmed; the last query word also matches as a prefix so
+search-as-you-type keeps working.
+
+ServiceSearchIndex keeps one corpus per worker in sync with MongoDB: the
+service routes apply their own writes immediately, and a background task
+pulls other workers' writes by updated_at every SEARCH_REFRESH_SECONDS and
+rebuilds every SEARCH_REBUILD_SECONDS (dropping services deleted
+elsewhere) off the event loop, so no request waits for either. Results are
+candidates only - the catalog query still applies every filter (and
+visibility) in MongoDB.
+"""
+
+import asyncio
+import bisect
+import heapq
+import math
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.database import db
+
+# Field weights: a match in the name counts three times one in the description
+FIELD_WEIGHTS = (("name", 3.0), ("category", 2.0), ("tags", 2.0), ("description", 1.0))
+PROJECTION = {**{field: 1 for field, _ in FIELD_WEIGHTS}, "is_active": 1}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.7      # score factor for words completed from a prefix
+MAX_PREFIX_TERMS = 50
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our the to we with you your".split()
+)
+
+_WORD = re.compile(r"[^\W_]+")
+_VOWELS = set("aeiouy")
+_KEEP_DOUBLE = set("lsz") | _VOWELS
+
+
+# ============ Text analysis ============
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Light English suffix stripping (plumbing/plumber -> plumb, services -> servic)"""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith(("xes", "zes", "ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    for suffix, min_stem in (("ing", 3), ("ed", 3), ("er", 4)):
+        stripped = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stripped) >= min_stem and _VOWELS & set(stripped):
+            word = stripped
+            # fitting -> fit, but keep install / dress / buzz
+            if suffix != "er" and len(word) > 3 and word[-1] == word[-2] and word[-1] not in _KEEP_DOUBLE:
+                word = word[:-1]
+            break
+
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def words(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def analyze(text: str) -> List[str]:
+    return [stem(word) for word in words(text)]
+
+
+def _field_text(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value if item)
+    return str(value) if value else ""
+
+
+def document_terms(service: dict) -> Counter:
+    """Weighted term frequencies for one service document"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for term in analyze(_field_text(service.get(field))):
+            terms[term] += weight
+    return terms
+
+
+# ============ Inverted index ============
+
+class SearchCorpus:
+    """
+    BM25 inverted index keyed by service id (str).
+
+    Postings hold each term's precomputed BM25 term-frequency component
+    ("impact") so a query only multiplies by idf. Impacts use the average
+    document length as of the last reweight(); incremental edits between
+    rebuilds barely move it.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_length: Dict[str, float] = {}
+        self.total_length = 0.0
+        self.average_length = 0.0
+        self.vocabulary: List[str] = []     # sorted, for prefix expansion
+
+    def __len__(self) -> int:
+        return len(self.doc_length)
+
+    @classmethod
+    def build(cls, services: Iterable[dict]) -> "SearchCorpus":
+        """Index a batch of service documents and weight them once"""
+        corpus = cls()
+        for service in services:
+            corpus.add(str(service["_id"]), service)
+        corpus.reweight()
+        return corpus
+
+    def _impact(self, frequency: float, length: float) -> float:
+        average = self.average_length or length
+        return frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average))
+
+    def add(self, service_id: str, service: dict):
+        """Index (or re-index) one service"""
+        self.remove(service_id)
+        terms = document_terms(service)
+        if not terms:
+            return
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            posting[service_id] = self._impact(frequency, length)
+        self.doc_terms[service_id] = terms
+        self.doc_length[service_id] = length
+        self.total_length += length
+
+    def remove(self, service_id: str):
+        terms = self.doc_terms.pop(service_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_length.pop(service_id)
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(service_id, None)
+            if not posting:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+    def reweight(self):
+        """Recompute every impact against the current average length (after a bulk load)"""
+        self.average_length = self.total_length / len(self.doc_length) if self.doc_length else 0.0
+        for service_id, terms in self.doc_terms.items():
+            length = self.doc_length[service_id]
+            for term, frequency in terms.items():
+                self.postings[term][service_id] = self._impact(frequency, length)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        matches = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def _query_slots(self, text: str, prefix_last: bool) -> List[Dict[str, float]]:
+        """One {term: weight} alternative set per query word"""
+        raw = words(text)
+        slots = []
+        for position, word in enumerate(raw):
+            slot = {stem(word): 1.0}
+            if prefix_last and position == len(raw) - 1 and len(word) >= 2:
+                for term in self._prefix_terms(word):
+                    slot.setdefault(term, PREFIX_WEIGHT)
+            slots.append(slot)
+        return slots
+
+    def _slot_scores(self, slot: Dict[str, float], within: Optional[dict] = None) -> Dict[str, float]:
+        """Best score per service for one query word, optionally only for `within`"""
+        count = len(self.doc_length)
+        scores: Dict[str, float] = {}
+        for term, weight in slot.items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            factor = weight * math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            if within is None:
+                matches = posting.items()
+            elif len(within) < len(posting):
+                matches = ((service_id, posting[service_id]) for service_id in within if service_id in posting)
+            else:
+                matches = ((service_id, impact) for service_id, impact in posting.items() if service_id in within)
+            for service_id, impact in matches:
+                score = factor * impact
+                # Best alternative per query word, so prefix completions do not stack up
+                if score > scores.get(service_id, 0.0):
+                    scores[service_id] = score
+        return scores
+
+    def search(self, text: str, limit: int, prefix_last: bool = True) -> List[Tuple[str, float]]:
+        """
+        Top `limit` (service_id, score) pairs. Services matching every query
+        word rank on their own; if none does, any-word matches are returned.
+        """
+        return self.search_counted(text, limit, prefix_last)[0]
+
+    def search_counted(self, text: str, limit: int, prefix_last: bool = True) -> Tuple[List[Tuple[str, float]], int]:
+        """search() plus the number of services that matched before the limit"""
+        slots = self._query_slots(text, prefix_last)
+        if not slots or not self.doc_length:
+            return [], 0
+
+        # Rarest word first, so common words are only scored for the survivors
+        slots.sort(key=lambda slot: sum(len(self.postings.get(term, ())) for term in slot))
+        scores = self._slot_scores(slots[0])
+        for slot in slots[1:]:
+            if not scores:
+                break
+            slot_scores = self._slot_scores(slot, within=scores)
+            scores = {service_id: score + slot_scores[service_id]
+                      for service_id, score in scores.items() if service_id in slot_scores}
+
+        if not scores and len(slots) > 1:
+            for slot in slots:
+                for service_id, score in self._slot_scores(slot).items():
+                    scores[service_id] = scores.get(service_id, 0.0) + score
+
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1)), len(scores)
+
+
+# ============ Worker index ============
+
+class ServiceSearchIndex:
+    """Keeps this worker's SearchCorpus in sync with the services collection"""
+
+    def __init__(self):
+        self._corpus: Optional[SearchCorpus] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._synced_at: Optional[datetime] = None
+        self._next_rebuild = 0.0
+        self.searches = 0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.last_rebuild_ms = 0.0
+
+    async def start(self):
+        """Build and refresh in the background so searches never pay for it"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._lock:
+                    if self._corpus is None or time.monotonic() >= self._next_rebuild:
+                        await self._rebuild()
+                    else:
+                        await self._pull_changes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Service search index sync failed: {e}")
+            await asyncio.sleep(settings.SEARCH_REFRESH_SECONDS)
+
+    # ============ Sync ============
+
+    async def ensure_fresh(self):
+        """Build the corpus if a search arrives before the background task has"""
+        if self._corpus is not None:
+            return
+        async with self._lock:
+            if self._corpus is None:
+                await self._rebuild()
+
+    async def _rebuild(self):
+        started = time.perf_counter()
+        synced_at = datetime.utcnow()
+        services = await db.db.services.find({"is_active": True}, PROJECTION).batch_size(1000).to_list(None)
+        # Tokenizing and BM25 weighting is CPU work; keep it off the event loop.
+        # Searches and write hooks keep using the old corpus meanwhile
+        corpus = await asyncio.to_thread(SearchCorpus.build, services)
+
+        self._corpus = corpus
+        self._synced_at = synced_at
+        self._next_rebuild = time.monotonic() + settings.SEARCH_REBUILD_SECONDS
+        self.rebuilds += 1
+        self.last_rebuild_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"Service search index built: {len(corpus)} services in {self.last_rebuild_ms}ms")
+        # Writes applied to the old corpus during the build
+        await self._pull_changes()
+
+    async def _pull_changes(self):
+        """Apply services created, edited or toggled since the last sync"""
+        synced_at = datetime.utcnow()
+        # Overlap a little so writes committed out of order are not missed
+        since = self._synced_at - timedelta(seconds=settings.SEARCH_REFRESH_SECONDS)
+        cursor = db.db.services.find({"updated_at": {"$gte": since}}, PROJECTION).batch_size(1000)
+        async for service in cursor:
+            self._apply(service)
+        self._synced_at = synced_at
+        self.refreshes += 1
+
+    def _apply(self, service: dict):
+        if service.get("is_active", True):
+            self._corpus.add(str(service["_id"]), service)
+        else:
+            self._corpus.remove(str(service["_id"]))
+
+    # ============ Write hooks ============
+
+    def service_saved(self, service: dict):
+        """Called by the routes after a create, update or toggle"""
+        if self._corpus is not None and service:
+            self._apply(service)
+
+    def service_deleted(self, service_id):
+        if self._corpus is not None:
+            self._corpus.remove(str(service_id))
+
+    # ============ Queries ============
+
+    async def search(self, text: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        return (await self.search_counted(text, limit))[0]
+
+    async def search_counted(self, text: str, limit: Optional[int] = None) -> Tuple[List[Tuple[str, float]], int]:
+        """Top candidates plus how many services matched in total"""
+        await self.ensure_fresh()
+        self.searches += 1
+        return self._corpus.search_counted(text, limit or settings.SEARCH_MAX_RESULTS)
+
+    def stats(self) -> dict:
+        corpus = self._corpus
+        return {
+            "services": len(corpus) if corpus else 0,
+            "terms": len(corpus.postings) if corpus else 0,
+            "searches": self.searches,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "last_rebuild_ms": self.last_rebuild_ms,
+        }
+
+
+def rank(ids: Iterable[str], ranked: List[Tuple[str, float]]) -> List[str]:
+    """Order ids by their position in a search result"""
+    position = {service_id: i for i, (service_id, _) in enumerate(ranked)}
+    return sorted(ids, key=lambda service_id: position.get(service_id, len(position)))
+
+
+service_search = ServiceSearchIndex()
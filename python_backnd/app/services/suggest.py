@@ -0,0 +1,254 @@
+"""
+Prefix autocomplete for the search dropdown
+
+SuggestIndex is a trie over every word start of each suggestion (service
+names, categories, professions, skills and cities), so "rep" finds
+"AC Repair". Each node caches its TOP_K most popular suggestions and is
+recomputed lazily after a change, so a lookup is a walk down the prefix
+plus a slice and never touches MongoDB.
+
+Popularity: an active service adds 1 + its bookings_count to its name and
+category; a visible professional adds 1 to their profession, city and
+each skill. Routes apply their own changes as deltas straight away, and
+every SUGGEST_REFRESH_SECONDS each worker recounts from MongoDB and
+applies only the differences.
+"""
+
+import asyncio
+import heapq
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import db
+
+TOP_K = 20          # suggestions cached per prefix (upper bound for ?limit=)
+MAX_DEPTH = 24      # longer prefixes filter the entries at this depth
+
+Key = Tuple[str, str]   # (kind, normalized text)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text) -> str:
+    return " ".join(_WORD.findall(str(text or "").lower()))
+
+
+class _Node:
+    __slots__ = ("children", "entries", "top", "dirty")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: set = set()
+        self.top: Tuple[Key, ...] = ()
+        self.dirty = True
+
+
+class SuggestIndex:
+    """Popularity-ranked prefix index, one per worker"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._weights: Dict[Key, float] = {}
+        self._labels: Dict[Key, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.lookups = 0
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+
+    # ============ Trie ============
+
+    @staticmethod
+    def _paths(text: str) -> set:
+        words = text.split(" ")
+        return {" ".join(words[i:])[:MAX_DEPTH] for i in range(len(words))}
+
+    def _mark(self, key: Key, link: Optional[bool] = None):
+        """Dirty every node on the key's paths; link=True/False adds/removes the entry"""
+        for path in self._paths(key[1]):
+            node = self._root
+            node.dirty = True
+            for char in path:
+                child = node.children.get(char)
+                if child is None:
+                    if not link:
+                        break
+                    child = node.children[char] = _Node()
+                node = child
+                node.dirty = True
+            else:
+                if link:
+                    node.entries.add(key)
+                elif link is False:
+                    node.entries.discard(key)
+
+    def _rank(self, key: Key):
+        return self._weights[key], -len(key[1]), key[1]
+
+    def _top(self, node: _Node) -> Tuple[Key, ...]:
+        if node.dirty:
+            candidates = set(node.entries)
+            for child in node.children.values():
+                candidates.update(self._top(child))
+            node.top = tuple(heapq.nlargest(TOP_K, candidates, key=self._rank))
+            node.dirty = False
+        return node.top
+
+    def _set(self, key: Key, weight: float, label: str):
+        if weight <= 0:
+            if key in self._weights:
+                del self._weights[key]
+                self._labels.pop(key, None)
+                self._mark(key, link=False)
+            return
+        if key not in self._weights:
+            self._weights[key] = weight
+            self._labels[key] = label
+            self._mark(key, link=True)
+        elif self._weights[key] != weight:
+            self._weights[key] = weight
+            self._mark(key)
+
+    # ============ Change events ============
+
+    def bump(self, kind: str, label, delta: float):
+        """Adjust one suggestion's popularity (no-op until the first refresh)"""
+        text = normalize(label)
+        if not self.ready or not text:
+            return
+        key = (kind, text)
+        self._set(key, self._weights.get(key, 0) + delta, self._labels.get(key) or str(label).strip())
+
+    def service_changed(self, before: Optional[dict], after: Optional[dict]):
+        """Called by the service routes with the document before and after a write"""
+        for service, sign in ((before, -1), (after, 1)):
+            if not service or not service.get("is_active", True) or not service.get("professional_active", True):
+                continue
+            weight = sign * (1 + (service.get("bookings_count") or 0))
+            self.bump("service", service.get("name"), weight)
+            self.bump("category", service.get("category"), weight)
+
+    def professional_changed(self, before: Optional[dict], after: Optional[dict]):
+        """Called with approval_data before and after a profile edit"""
+        for data, sign in ((before, -1), (after, 1)):
+            for kind, label in _professional_labels(data or {}):
+                self.bump(kind, label, sign)
+
+    # ============ Refresh ============
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Suggest index refresh failed: {e}")
+            await asyncio.sleep(settings.SUGGEST_REFRESH_SECONDS)
+
+    async def refresh(self):
+        """Recount popularity from MongoDB and apply the differences"""
+        started = time.perf_counter()
+        counts, labels = await _count_suggestions()
+        self.apply_counts(counts, labels)
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def apply_counts(self, counts: Dict[Key, float], labels: Dict[Key, str]):
+        for key in [key for key in self._weights if key not in counts]:
+            self._set(key, 0, "")
+        for key, weight in counts.items():
+            self._set(key, weight, labels[key])
+        # Recompute the dirty nodes now rather than on the next keystroke
+        self._top(self._root)
+        self.ready = True
+
+    # ============ Queries ============
+
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        """Most popular suggestions with a word starting with `query` (all, if empty)"""
+        self.lookups += 1
+        text = normalize(query)
+        node = self._root
+        for char in text[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if len(text) <= MAX_DEPTH:
+            keys = self._top(node)[:limit]
+        else:
+            matches = [key for key in node.entries if f" {text}" in f" {key[1]}"]
+            keys = heapq.nlargest(limit, matches, key=self._rank)
+        return [{"text": self._labels[key], "type": key[0], "score": self._weights[key]} for key in keys]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "suggestions": len(self._weights),
+            "lookups": self.lookups,
+            "refreshes": self.refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
+
+
+def _professional_labels(approval_data: dict):
+    if approval_data.get("profession"):
+        yield "profession", approval_data["profession"]
+    if approval_data.get("city"):
+        yield "city", approval_data["city"]
+    for skill in approval_data.get("skills") or []:
+        if isinstance(skill, str) and skill:
+            yield "skill", skill
+
+
+async def _count_suggestions() -> Tuple[Dict[Key, float], Dict[Key, str]]:
+    counts: Counter = Counter()
+    labels: Dict[Key, str] = {}
+
+    def add(kind: str, label, weight: float):
+        text = normalize(label)
+        if text:
+            key = (kind, text)
+            counts[key] += weight
+            labels.setdefault(key, str(label).strip())
+
+    services = db.db.services.aggregate([
+        {"$match": {"is_active": True, "professional_active": True}},
+        {"$group": {
+            "_id": {"name": "$name", "category": "$category"},
+            "weight": {"$sum": {"$add": [1, {"$ifNull": ["$bookings_count", 0]}]}},
+        }},
+    ])
+    async for group in services:
+        add("service", group["_id"].get("name"), group["weight"])
+        add("category", group["_id"].get("category"), group["weight"])
+
+    professionals = db.db.users.find(
+        {"role": "professional", "is_active": True, "is_suspended": {"$ne": True}, "approval_status": "approved"},
+        {"approval_data.profession": 1, "approval_data.city": 1, "approval_data.skills": 1}
+    ).batch_size(1000)
+    async for professional in professionals:
+        for kind, label in _professional_labels(professional.get("approval_data") or {}):
+            add(kind, label, 1)
+
+    return counts, labels
+
+
+suggest_index = SuggestIndex()
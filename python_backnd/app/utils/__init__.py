@@ -1,10 +1,13 @@
 from app.utils.security import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
     decode_token,
     get_current_user,
+    get_current_user_claims,
     get_current_active_user,
     create_tokens_for_user,
     refresh_access_token,
@@ -2,7 +2,6 @@
 Email notification utilities
 """
 
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -12,13 +11,10 @@ from typing import Optional
 import os
 
 from app.config import (
-    SMTP_SERVER,
-    SMTP_PORT,
-    SMTP_USERNAME,
-    SMTP_PASSWORD,
     EMAIL_FROM_NAME,
     EMAIL_FROM_ADDRESS
 )
+from app.services.email_outbox import email_outbox
 
 
 def send_email(
@@ -30,7 +26,7 @@ def send_email(
     attachment_name: Optional[str] = None
 ) -> bool:
     """
-    Send email with optional attachment
+    Queue email with optional attachment for background delivery
     
     Args:
         to_email: Recipient email address
@@ -41,7 +37,7 @@ def send_email(
         attachment_name: Name for attachment (optional)
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email was queued, False otherwise
     """
     try:
         # Create message
@@ -70,13 +66,8 @@ def send_email(
                 )
                 msg.attach(part)
         
-        # Send email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        return True
+        # Hand off to the outbox; delivery happens in the background
+        return email_outbox.enqueue(msg)
     
     except Exception as e:
         print(f"Error sending email: {str(e)}")
@@ -314,7 +305,7 @@ def send_application_status_update(
     If status is "Offer Released", send offer letter instead
     
     Returns:
-        bool: True if email sent successfully
+        bool: True if email was queued
     """
     try:
         if new_stage == "Offer Released":
@@ -0,0 +1,71 @@
+"""
+Bounded thread pool for CPU-heavy work that must stay off the event loop
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard cap on queued work.
+
+    Jobs beyond max_pending are rejected immediately with 503 instead of
+    waiting, so a burst sheds load rather than piling up latency for
+    every request on the worker.
+
+    Usage:
+        executor = BoundedExecutor("password", max_workers=4, max_pending=64)
+        hashed = await executor.run(pwd_context.hash, password)
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name
+        )
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in the pool, or raise 503 if the queue is full"""
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Return pool size, queue depth and counters"""
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.max_workers),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,124 @@
+"""
+Shared outbound HTTP client (OAuth provider calls)
+
+One httpx.AsyncClient is created in the app lifespan and reused by every
+request, so provider calls ride pooled keep-alive connections (HTTP/2
+when the h2 package is installed) instead of a new TCP+TLS handshake each
+time. Routes take it via Depends(get_http_client); tests can override
+that dependency or call connect_http_client(transport=...) to point it
+at a mock provider.
+"""
+
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientState:
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.requests = 0
+        self.responses_by_class = {}
+        self.transport_errors = 0
+
+
+http = HTTPClientState()
+
+
+async def _on_request(request: httpx.Request):
+    http.requests += 1
+
+
+async def _on_response(response: httpx.Response):
+    status_class = f"{response.status_code // 100}xx"
+    http.responses_by_class[status_class] = http.responses_by_class.get(status_class, 0) + 1
+
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Build the pooled client from settings (transport is for tests)"""
+    return httpx.AsyncClient(
+        http2=settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(
+            settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_SECONDS
+        ),
+        transport=transport,
+        event_hooks={"request": [_on_request], "response": [_on_response]}
+    )
+
+
+async def connect_http_client(transport: Optional[httpx.AsyncBaseTransport] = None):
+    """Create the shared client (called from the app lifespan)"""
+    http.client = create_http_client(transport)
+    http.http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE and transport is None
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections"""
+    if http.client is not None:
+        await http.client.aclose()
+        http.client = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Dependency returning the shared client"""
+    if http.client is None:
+        # Outside the lifespan (scripts, some test setups): create lazily
+        await connect_http_client()
+    return http.client
+
+
+async def send_checked(request_coro, error_detail: str) -> httpx.Response:
+    """Await a provider request, mapping network errors to 502/504"""
+    try:
+        return await request_coro
+    except httpx.TimeoutException:
+        http.transport_errors += 1
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"{error_detail} (provider timed out)"
+        )
+    except httpx.TransportError:
+        http.transport_errors += 1
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"{error_detail} (provider unreachable)"
+        )
+
+
+def http_client_stats() -> dict:
+    """Request counters and connection pool state of the shared client"""
+    stats = {
+        "http2": http.http2,
+        "requests": http.requests,
+        "responses": dict(http.responses_by_class),
+        "transport_errors": http.transport_errors,
+        "max_connections": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    }
+
+    # httpcore exposes the pool's connections; fall back gracefully if not
+    pool = getattr(getattr(http.client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        stats["pool"] = {
+            "connections": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "http2": sum(1 for c in connections if "HTTP/2" in repr(c)),
+        }
+
+    return stats
@@ -0,0 +1,117 @@
+"""
+Request-scoped batch loaders (DataLoader pattern)
+
+Every load() made in the same event loop tick is collected and resolved
+with a single `{"_id": {"$in": [...]}}` query. Repeated IDs share one
+future, so a page that shows the same professional twenty times fetches
+them once.
+
+Usage:
+    @router.get("/my-bookings")
+    async def my_bookings(loaders: Loaders = Depends(get_loaders)):
+        professionals, services = await asyncio.gather(
+            loaders.users.load_many(b.get("professional_id") for b in bookings),
+            loaders.services.load_many(b.get("service_id") for b in bookings),
+        )
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+from app.database import get_database
+
+
+class BatchLoader:
+    """Batches _id lookups on one collection; IDs may be str or ObjectId"""
+
+    def __init__(self, collection_name: str, projection: Optional[dict] = None):
+        self.collection_name = collection_name
+        self.projection = projection
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+        self._tasks = set()
+        self.batches = 0
+
+    def load(self, doc_id: Any) -> "asyncio.Future[Optional[dict]]":
+        """Future resolving to the document, or None if missing/invalid"""
+        loop = asyncio.get_running_loop()
+        key = str(doc_id) if doc_id is not None else ""
+
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        future = loop.create_future()
+        self._futures[key] = future
+        if not ObjectId.is_valid(key):
+            future.set_result(None)
+            return future
+
+        if not self._queue:
+            # Dispatch once everything already scheduled this tick has queued
+            loop.call_soon(self._schedule_dispatch)
+        self._queue.append(key)
+        return future
+
+    async def load_many(self, doc_ids: Iterable[Any]) -> List[Optional[dict]]:
+        """Documents in the same order as doc_ids (None where missing)"""
+        return list(await asyncio.gather(*(self.load(doc_id) for doc_id in doc_ids)))
+
+    def prime(self, doc: dict):
+        """Seed the loader with a document the caller already has"""
+        key = str(doc["_id"])
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(doc)
+            self._futures[key] = future
+
+    def _schedule_dispatch(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batches += 1
+
+        try:
+            cursor = get_database()[self.collection_name].find(
+                {"_id": {"$in": [ObjectId(key) for key in keys]}},
+                self.projection
+            )
+            found = {str(doc["_id"]): doc async for doc in cursor}
+        except Exception as e:
+            for key in keys:
+                self._futures[key].set_exception(e)
+            return
+
+        for key in keys:
+            self._futures[key].set_result(found.get(key))
+
+
+class Loaders:
+    """Loaders for one request; create through Depends(get_loaders)"""
+
+    def __init__(self):
+        self._loaders: Dict[str, BatchLoader] = {}
+
+    def collection(self, name: str, projection: Optional[dict] = None) -> BatchLoader:
+        loader = self._loaders.get(name)
+        if loader is None:
+            loader = self._loaders[name] = BatchLoader(name, projection)
+        return loader
+
+    @property
+    def users(self) -> BatchLoader:
+        return self.collection("users")
+
+    @property
+    def services(self) -> BatchLoader:
+        return self.collection("services")
+
+
+async def get_loaders() -> Loaders:
+    """Dependency providing fresh loaders per request"""
+    return Loaders()
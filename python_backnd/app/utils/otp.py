@@ -5,11 +5,16 @@ OTP utilities for generation, sending, and verification
 import random
 import string
 from datetime import datetime, timedelta
+from email.mime.text import MIMEText
 from typing import Optional
 
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
 from app.config import settings
 from app.database import get_otps_collection
 from app.models.otp import OTPPurpose, OTPType
+from app.services.email_outbox import email_outbox
 
 
 def generate_otp(length: int = 6) -> str:
@@ -24,21 +29,16 @@ async def create_otp(
     user_data: Optional[dict] = None,
     otp_code: Optional[str] = None
 ) -> str:
-    """Create and store OTP in database"""
+    """Create and store OTP in database (replaces any previous OTP in one write)"""
     otps = get_otps_collection()
     
-    # Delete any existing OTPs for this identifier and purpose
-    await otps.delete_many({
-        "identifier": identifier,
-        "purpose": purpose.value
-    })
-    
     # Generate new OTP or use provided one
     if otp_code is None:
         otp_code = generate_otp(settings.OTP_LENGTH)
-    expires_at = datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
     
-    # Store OTP
+    # Store OTP, replacing the previous one for this identifier and purpose
     otp_doc = {
         "identifier": identifier,
         "otp_type": otp_type.value,
@@ -47,12 +47,18 @@ async def create_otp(
         "is_verified": False,
         "attempts": 0,
         "max_attempts": 3,
-        "created_at": datetime.utcnow(),
+        "created_at": now,
         "expires_at": expires_at,
         "user_data": user_data
     }
     
-    await otps.insert_one(otp_doc)
+    # The unique identifier+purpose index makes concurrent upserts collide
+    # instead of inserting twice; the loser retries and replaces the winner
+    query = {"identifier": identifier, "purpose": purpose.value}
+    try:
+        await otps.replace_one(query, otp_doc, upsert=True)
+    except DuplicateKeyError:
+        await otps.replace_one(query, otp_doc, upsert=True)
     
     return otp_code
 
@@ -62,15 +68,37 @@ async def verify_otp(
     otp_code: str,
     purpose: OTPPurpose
 ) -> dict:
-    """Verify OTP and return result with user_data if valid"""
+    """
+    Verify OTP and return result with user_data if valid.
+    
+    The check and its side effects happen in a single find_one_and_update:
+    a matching, unexpired code with attempts left flips is_verified, a
+    wrong code increments attempts. The pre-update document tells us which
+    branch applied, so concurrent attempts cannot double-spend an OTP or
+    lose an attempt increment.
+    """
     otps = get_otps_collection()
+    now = datetime.utcnow()
     
-    # Find OTP
-    otp_doc = await otps.find_one({
-        "identifier": identifier,
-        "purpose": purpose.value,
-        "is_verified": False
-    })
+    code_matches = {"$eq": ["$otp_code", otp_code]}
+    otp_doc = await otps.find_one_and_update(
+        {
+            "identifier": identifier,
+            "purpose": purpose.value,
+            "is_verified": False
+        },
+        [{
+            "$set": {
+                "is_verified": {"$and": [
+                    code_matches,
+                    {"$lt": ["$attempts", "$max_attempts"]},
+                    {"$gt": ["$expires_at", now]}
+                ]},
+                "attempts": {"$cond": [code_matches, "$attempts", {"$add": ["$attempts", 1]}]}
+            }
+        }],
+        return_document=ReturnDocument.BEFORE
+    )
     
     if not otp_doc:
         return {
@@ -79,8 +107,7 @@ async def verify_otp(
         }
     
     # Check expiry
-    if datetime.utcnow() > otp_doc["expires_at"]:
-        await otps.delete_one({"_id": otp_doc["_id"]})
+    if now >= otp_doc["expires_at"]:
         return {
             "valid": False,
             "error": "OTP has expired"
@@ -88,31 +115,19 @@ async def verify_otp(
     
     # Check attempts
     if otp_doc["attempts"] >= otp_doc["max_attempts"]:
-        await otps.delete_one({"_id": otp_doc["_id"]})
         return {
             "valid": False,
             "error": "Maximum OTP attempts exceeded"
         }
     
-    # Verify OTP code
+    # Wrong code (attempts already incremented)
     if otp_doc["otp_code"] != otp_code:
-        # Increment attempts
-        await otps.update_one(
-            {"_id": otp_doc["_id"]},
-            {"$inc": {"attempts": 1}}
-        )
         remaining = otp_doc["max_attempts"] - otp_doc["attempts"] - 1
         return {
             "valid": False,
             "error": f"Invalid OTP. {remaining} attempts remaining"
         }
     
-    # Mark as verified
-    await otps.update_one(
-        {"_id": otp_doc["_id"]},
-        {"$set": {"is_verified": True}}
-    )
-    
     # Return success with user data
     return {
         "valid": True,
@@ -121,32 +136,16 @@ async def verify_otp(
 
 
 async def send_email_otp(email: str, otp_code: str) -> bool:
-    """Send OTP via email"""
-    # In production, integrate with an email service like SendGrid, AWS SES, etc.
-    # For now, we'll just print it (development mode)
+    """Queue an OTP email for background delivery"""
+    msg = MIMEText(f"Your OTP is: {otp_code}")
+    msg['Subject'] = "Your OTP Code"
+    msg['From'] = settings.EMAIL_FROM
+    msg['To'] = email
     
-    try:
-        # TODO: Implement actual email sending
-        # Example with SMTP:
-        import smtplib
-        from email.mime.text import MIMEText
-        # 
-        msg = MIMEText(f"Your OTP is: {otp_code}")
-        msg['Subject'] = "Your OTP Code"
-        msg['From'] = settings.EMAIL_FROM
-        msg['To'] = email
-        # 
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        print(f"[DEV] Email OTP sent to {email}: {otp_code}")
-        return True
-        
-    except Exception as e:
-        print(f"Failed to send email OTP: {e}")
-        return False
+    queued = email_outbox.enqueue(msg)
+    if queued:
+        print(f"[DEV] Email OTP queued for {email}: {otp_code}")
+    return queued
 
 
 async def send_sms_otp(phone: str, otp_code: str) -> bool:
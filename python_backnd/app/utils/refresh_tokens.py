@@ -0,0 +1,92 @@
+"""
+Refresh token store - rotation, reuse detection and revocation
+
+Each refresh token is stored under the SHA-256 hash of its value (the raw
+token never touches the database), so every lookup is an _id point read.
+Tokens issued from one login share a family_id; rotating a token marks it
+used, and presenting a used token again revokes the whole family.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.database import get_refresh_tokens_collection
+
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and lookup"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def store_refresh_token(token: str, user_id: str, family_id: str):
+    """Persist a newly issued refresh token"""
+    tokens = get_refresh_tokens_collection()
+    now = datetime.utcnow()
+
+    await tokens.insert_one({
+        "_id": hash_refresh_token(token),
+        "user_id": user_id,
+        "family_id": family_id,
+        "created_at": now,
+        "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "used_at": None,
+        "revoked": False
+    })
+
+
+async def consume_refresh_token(token: str) -> Optional[dict]:
+    """
+    Atomically mark a refresh token as used and return its record.
+    Returns None if the token is unknown, revoked or already used; in the
+    reuse case the whole token family is revoked.
+    """
+    tokens = get_refresh_tokens_collection()
+    token_hash = hash_refresh_token(token)
+
+    record = await tokens.find_one_and_update(
+        {"_id": token_hash, "used_at": None, "revoked": False},
+        {"$set": {"used_at": datetime.utcnow()}}
+    )
+    if record:
+        return record
+
+    stale = await tokens.find_one({"_id": token_hash}, {"family_id": 1, "user_id": 1})
+    if stale:
+        print(f"Refresh token reuse detected for user {stale['user_id']}, revoking family")
+        await revoke_token_family(stale["family_id"])
+
+    return None
+
+
+async def revoke_token_family(family_id: str) -> int:
+    """Revoke every refresh token issued from the same login"""
+    tokens = get_refresh_tokens_collection()
+    result = await tokens.update_many(
+        {"family_id": family_id, "revoked": False},
+        {"$set": {"revoked": True}}
+    )
+    return result.modified_count
+
+
+async def revoke_refresh_token(token: str, user_id: str) -> int:
+    """Revoke the family of a refresh token belonging to user_id (logout)"""
+    tokens = get_refresh_tokens_collection()
+    record = await tokens.find_one(
+        {"_id": hash_refresh_token(token), "user_id": user_id},
+        {"family_id": 1}
+    )
+    if not record:
+        return 0
+    return await revoke_token_family(record["family_id"])
+
+
+async def revoke_user_refresh_tokens(user_id: str) -> int:
+    """Revoke every refresh token of a user (logout everywhere, password change)"""
+    tokens = get_refresh_tokens_collection()
+    result = await tokens.update_many(
+        {"user_id": str(user_id), "revoked": False},
+        {"$set": {"revoked": True}}
+    )
+    return result.modified_count
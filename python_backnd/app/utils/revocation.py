@@ -0,0 +1,127 @@
+"""
+Token revocation set for claims-only authorization
+
+Revocations are recorded in the token_revocations collection and mirrored
+in every worker's memory: start() loads the live entries before the
+worker serves requests, then polls every TOKEN_REVOCATION_SYNC_SECONDS,
+so a revocation made in any worker (or before a restart) is honoured
+everywhere within that interval.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class RevocationSet:
+    """
+    Tracks users whose access tokens were invalidated by a role or status
+    change. Each entry holds the lowest token epoch still accepted for the
+    user and is kept only as long as an older access token could still be
+    alive, so the set stays proportional to recent admin actions rather
+    than to the number of users.
+
+    Usage:
+        revocations = RevocationSet(retention_seconds=1800)
+        revocations.revoke(user_id, min_epoch=3)
+        revocations.is_revoked(user_id, token_epoch=2)  # True
+    """
+
+    def __init__(self, retention_seconds: float, sync_seconds: float = 5.0):
+        self.retention_seconds = retention_seconds
+        self.sync_seconds = sync_seconds
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+        self.syncs = 0
+
+    def revoke(self, user_id: str, min_epoch: int, ttl: Optional[float] = None):
+        """Reject every token for user_id carrying an epoch below min_epoch"""
+        self._prune()
+        expires_at = time.monotonic() + (self.retention_seconds if ttl is None else ttl)
+        current = self._entries.get(user_id)
+        if current is not None:
+            min_epoch = max(min_epoch, current[0])
+            expires_at = max(expires_at, current[1])
+        self._entries[user_id] = (min_epoch, expires_at)
+
+    def is_revoked(self, user_id: str, token_epoch: int) -> bool:
+        """Check whether a token with the given epoch was revoked"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+
+        min_epoch, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return False
+
+        return token_epoch < min_epoch
+
+    def load(self, documents: Iterable[dict]):
+        """Merge token_revocations documents ({_id: user_id, min_epoch, expires_at})"""
+        now = datetime.utcnow()
+        for document in documents:
+            ttl = (document["expires_at"] - now).total_seconds()
+            if ttl > 0:
+                self.revoke(str(document["_id"]), document["min_epoch"], ttl=ttl)
+
+    # ============ Persistence ============
+
+    async def record(self, user_id: str, min_epoch: int):
+        """Revoke locally and in the shared collection"""
+        self.revoke(user_id, min_epoch)
+        if self._collection is None:
+            return
+        expires_at = datetime.utcnow() + timedelta(seconds=self.retention_seconds)
+        await self._collection.update_one(
+            {"_id": user_id},
+            {"$max": {"min_epoch": min_epoch, "expires_at": expires_at}},
+            upsert=True
+        )
+
+    async def sync(self):
+        """Pull every live revocation from the shared collection"""
+        documents = await self._collection.find({"expires_at": {"$gt": datetime.utcnow()}}).to_list(None)
+        self.load(documents)
+        self.syncs += 1
+
+    async def start(self, collection):
+        """Load persisted revocations, then keep polling for other workers' writes"""
+        self._collection = collection
+        if self._task is None:
+            await self.sync()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Token revocation sync failed: {e}")
+
+    def _prune(self):
+        """Drop entries older than the longest-lived access token"""
+        now = time.monotonic()
+        expired = [uid for uid, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for uid in expired:
+            del self._entries[uid]
+
+    def stats(self) -> dict:
+        return {"revoked_users": len(self._entries), "syncs": self.syncs}
+
+    def __len__(self) -> int:
+        return len(self._entries)
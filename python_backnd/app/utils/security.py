@@ -2,6 +2,10 @@
 JWT utilities for token creation and verification
 """
 
+import copy
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
@@ -12,15 +16,43 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.database import get_users_collection, get_refresh_tokens_collection
 from app.models.user import UserRole
+from app.utils.cache import TTLCache
+from app.utils.executor import BoundedExecutor
+from app.utils.revocation import RevocationSet
+from app.utils.refresh_tokens import store_refresh_token, consume_refresh_token
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Dedicated pool so bcrypt never blocks the event loop
+password_executor = BoundedExecutor(
+    "password",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 # Bearer token security
 security = HTTPBearer()
 
+# Authenticated user documents keyed by user id, consulted before MongoDB
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Decoded claims keyed by token digest, kept until the token expires
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
+# Users whose access tokens predate a role/status change (shared via
+# the token_revocations collection; started in the app lifespan)
+token_revocations = RevocationSet(
+    retention_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS
+)
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -32,6 +64,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the password pool (use from async routes)"""
+    return await password_executor.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the password pool (use from async routes)"""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -76,14 +118,27 @@ def create_refresh_token(data: dict) -> str:
 
 
 def decode_token(token: str) -> dict:
-    """Decode and verify a JWT token"""
+    """
+    Decode and verify a JWT token.
+    Verified claims are memoized per token until its exp, so repeated
+    requests with the same bearer token skip the signature check.
+    Revocation is checked by the callers on every request, not cached.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         payload = jwt.decode(
             token, 
             settings.JWT_SECRET_KEY, 
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(digest, payload, ttl=remaining)
+        return dict(payload)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,6 +147,30 @@ def decode_token(token: str) -> dict:
         )
 
 
+def invalidate_user_cache(user_id) -> None:
+    """Drop a user from the user cache after their document changes"""
+    user_cache.invalidate(str(user_id))
+
+
+async def get_user_by_id(user_id: str) -> Optional[dict]:
+    """
+    Fetch a user document by id, served from the user cache when possible.
+    Callers get their own copy, so mutating it never leaks into the cache.
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    
+    users = get_users_collection()
+    user = await users.find_one({"_id": ObjectId(user_id)})
+    
+    if user is None:
+        return None
+    
+    user_cache.set(user_id, user)
+    return copy.deepcopy(user)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get the current authenticated user from JWT token"""
     token = credentials.credentials
@@ -119,9 +198,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Could not validate credentials"
         )
     
-    # Fetch user from database
-    users = get_users_collection()
-    user = await users.find_one({"_id": ObjectId(user_id)})
+    if token_revocations.is_revoked(user_id, payload.get("epoch", 0)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Fetch user (cached)
+    user = await get_user_by_id(user_id)
     
     if user is None:
         raise HTTPException(
@@ -138,6 +223,71 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return user
 
 
+async def get_current_user_claims(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Get the current user from signed access token claims alone, without a
+    database read. Only role, identity and status fields are available;
+    use get_current_user when the route needs the full user document.
+    """
+    payload = decode_token(credentials.credentials)
+    user_id: str = payload.get("sub")
+    
+    if user_id is None or not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+    
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type"
+        )
+    
+    if token_revocations.is_revoked(user_id, payload.get("epoch", 0)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not payload.get("is_active", True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User account is deactivated"
+        )
+    
+    return {
+        "_id": ObjectId(user_id),
+        "name": payload.get("name"),
+        "email": payload.get("email"),
+        "role": payload.get("role", "user"),
+        "is_active": True,
+    }
+
+
+async def revoke_user_tokens(user_id) -> int:
+    """
+    Bump a user's token epoch after a role or status change so that
+    claims-only checks in every worker reject access tokens issued before it.
+    Returns the new epoch (0 if the user does not exist).
+    """
+    users = get_users_collection()
+    user = await users.find_one_and_update(
+        {"_id": ObjectId(str(user_id))},
+        {"$inc": {"token_epoch": 1}},
+        projection={"token_epoch": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    invalidate_user_cache(user_id)
+    
+    if user is None:
+        return 0
+    
+    await token_revocations.record(str(user_id), user["token_epoch"])
+    return user["token_epoch"]
+
+
 async def get_current_active_user(current_user: dict = Depends(get_current_user)):
     """Get current active user"""
     if not current_user.get("is_active", True):
@@ -168,9 +318,11 @@ async def get_optional_current_user(
     except JWTError:
         return None
     
-    # Fetch user from database
-    users = get_users_collection()
-    user = await users.find_one({"_id": ObjectId(user_id)})
+    if token_revocations.is_revoked(user_id, payload.get("epoch", 0)):
+        return None
+    
+    # Fetch user (cached)
+    user = await get_user_by_id(user_id)
     
     if user is None or not user.get("is_active", True):
         return None
@@ -178,23 +330,34 @@ async def get_optional_current_user(
     return user
 
 
-def create_tokens_for_user(user: dict) -> dict:
-    """Create both access and refresh tokens for a user"""
+async def create_tokens_for_user(user: dict, family_id: Optional[str] = None) -> dict:
+    """
+    Create both access and refresh tokens for a user.
+    The refresh token is persisted; pass family_id when rotating so the
+    new token stays in the same login family.
+    """
     user_id = str(user["_id"])
+    family_id = family_id or uuid.uuid4().hex
     
     access_token = create_access_token(
         data={
             "sub": user_id,
             "email": user.get("email"),
-            "role": user.get("role", "user")
+            "name": user.get("name"),
+            "role": user.get("role", "user"),
+            "is_active": user.get("is_active", True),
+            "epoch": user.get("token_epoch", 0)
         }
     )
     
     refresh_token = create_refresh_token(
         data={
-            "sub": user_id
+            "sub": user_id,
+            "fam": family_id,
+            "jti": uuid.uuid4().hex
         }
     )
+    await store_refresh_token(refresh_token, user_id, family_id)
     
     return {
         "access_token": access_token,
@@ -204,7 +367,7 @@ def create_tokens_for_user(user: dict) -> dict:
 
 
 async def refresh_access_token(refresh_token: str) -> dict:
-    """Refresh access token using refresh token"""
+    """Rotate a refresh token and issue a new token pair"""
     try:
         payload = decode_token(refresh_token)
         user_id: str = payload.get("sub")
@@ -216,6 +379,14 @@ async def refresh_access_token(refresh_token: str) -> dict:
                 detail="Invalid token type"
             )
         
+        # Mark the token used; unknown, revoked or replayed tokens fail here
+        stored = await consume_refresh_token(refresh_token)
+        if stored is None or stored["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked or already used"
+            )
+        
         # Fetch user
         users = get_users_collection()
         user = await users.find_one({"_id": ObjectId(user_id)})
@@ -226,8 +397,14 @@ async def refresh_access_token(refresh_token: str) -> dict:
                 detail="User not found"
             )
         
-        # Create new tokens
-        return create_tokens_for_user(user)
+        if not user.get("is_active", True):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User account is deactivated"
+            )
+        
+        # Create new tokens in the same family
+        return await create_tokens_for_user(user, family_id=stored["family_id"])
         
     except JWTError:
         raise HTTPException(
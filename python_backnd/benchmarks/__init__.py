@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks against a local MongoDB (run from python_backnd/, e.g.
+python -m benchmarks.otp_verify). Each benchmark uses its own throwaway
+database and drops it afterwards.
+"""
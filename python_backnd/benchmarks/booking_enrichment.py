@@ -0,0 +1,115 @@
+"""
+Booking list enrichment: find_one per row vs the $lookup pipeline
+
+    python -m benchmarks.booking_enrichment [--bookings 5000] [--pages 200]
+
+Seeds professionals with realistic approval_data/addresses/favorites,
+services and bookings, then renders a page of 20 bookings both ways and
+reports round trips and reply bytes per page.
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.database import db
+from app.routes.bookings import booking_helper, booking_enrichment_stages, booking_from_pipeline
+from benchmarks.common import bench_database, Timer, report
+
+PAGE_SIZE = 20
+
+
+async def seed(bookings: int):
+    professionals = [{
+        "_id": ObjectId(),
+        "name": f"Pro {i}",
+        "role": "professional",
+        "email": f"pro{i}@example.com",
+        "phone": f"+9100000{i:05d}",
+        "profile_image": f"/uploads/pro{i}.jpg",
+        "rating": 4.2,
+        "addresses": [{"label": "Home", "line1": "x" * 120, "city": "Kolkata"} for _ in range(3)],
+        "favorite_professionals": [str(ObjectId()) for _ in range(30)],
+        "approval_data": {
+            "profession": "Electrician",
+            "bio": "y" * 1500,
+            "skills": ["wiring", "repairs", "installation", "inverters"],
+            "documents": [{"type": "id", "url": "/uploads/" + "z" * 60} for _ in range(4)],
+        },
+    } for i in range(200)]
+    customers = [{"_id": ObjectId(), "name": f"User {i}", "email": f"user{i}@example.com", "role": "user",
+                  "addresses": [{"line1": "x" * 120} for _ in range(2)]} for i in range(500)]
+    services = [{
+        "_id": ObjectId(),
+        "professional_id": random.choice(professionals)["_id"],
+        "name": f"Service {i}", "category": "Electrical", "price": 499, "duration": "1 hour",
+        "image": "/uploads/service.jpg", "description": "d" * 800, "tags": ["a", "b", "c"],
+    } for i in range(1000)]
+
+    await db.db.users.insert_many(professionals + customers)
+    await db.db.services.insert_many(services)
+
+    now = datetime.utcnow()
+    docs = []
+    for i in range(bookings):
+        service = random.choice(services)
+        docs.append({
+            "user_id": str(random.choice(customers[:50])["_id"]),
+            "professional_id": str(service["professional_id"]),
+            "service_id": str(service["_id"]),
+            "service_name": service["name"], "category": "Electrical", "status": "pending",
+            "scheduled_date": "2024-06-01", "scheduled_time": "10:00", "price": 499,
+            "address": {"house_no": "12", "area": "Salt Lake", "city": "Kolkata"},
+            "created_at": now - timedelta(minutes=i), "updated_at": now,
+        })
+    await db.db.bookings.insert_many(docs)
+    await db.db.bookings.create_index([("user_id", 1), ("created_at", -1)])
+    return list({d["user_id"] for d in docs})
+
+
+async def page_find_one(user_id: str):
+    """Previous approach: page query, then two find_one per booking"""
+    bookings = await db.db.bookings.find({"user_id": user_id}).sort("created_at", -1).limit(PAGE_SIZE).to_list(None)
+    result = []
+    for booking in bookings:
+        professional = await db.db.users.find_one({"_id": ObjectId(booking["professional_id"])})
+        service = await db.db.services.find_one({"_id": ObjectId(booking["service_id"])})
+        result.append(booking_helper(booking, professional, service))
+    return result
+
+
+async def page_pipeline(user_id: str):
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": PAGE_SIZE},
+        *booking_enrichment_stages(professional=True, service=True),
+    ]
+    bookings = await db.db.bookings.aggregate(pipeline).to_list(None)
+    return [booking_from_pipeline(booking) for booking in bookings]
+
+
+async def main(bookings: int, pages: int):
+    async with bench_database("bookings") as counter:
+        user_ids = await seed(bookings)
+        targets = [random.choice(user_ids) for _ in range(pages)]
+
+        # Same rendered output both ways
+        assert await page_find_one(targets[0]) == await page_pipeline(targets[0])
+
+        for label, fn in (("find_one per row", page_find_one), ("$lookup pipeline", page_pipeline)):
+            with Timer(counter) as timer:
+                for user_id in targets:
+                    await fn(user_id)
+            report(label, pages, timer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.pages))
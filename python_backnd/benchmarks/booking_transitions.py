@@ -0,0 +1,100 @@
+"""
+Booking transitions: find/check/update/find vs guarded find_one_and_update
+
+    python -m benchmarks.booking_transitions [--bookings 2000] [--races 500]
+
+Walks bookings through accept -> start -> complete both ways and reports
+transitions/sec and round trips per transition, then races accept against
+a customer cancel on the same booking and counts how often both "win".
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.database import db
+from app.services.booking_state import TRANSITIONS, apply_transition
+from benchmarks.common import bench_database, Timer, report
+
+LIFECYCLE = ("accept", "start", "complete")
+
+
+async def seed(count: int) -> list:
+    docs = [{
+        "_id": ObjectId(),
+        "user_id": f"user{i % 50}",
+        "professional_id": f"pro{i % 20}",
+        "status": "pending",
+        "otp": "12345",
+        "payment_status": "paid",
+        "price": 499,
+        "created_at": datetime.utcnow(),
+    } for i in range(count)]
+    await db.db.bookings.insert_many(docs)
+    return docs
+
+
+async def legacy_transition(booking_id: str, name: str, actor_id: str, fields: dict = None):
+    """Previous route shape: read, check in Python, write, read again"""
+    transition = TRANSITIONS[name]
+    booking = await db.db.bookings.find_one({"_id": ObjectId(booking_id)})
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if actor_id not in (booking.get("user_id"), booking.get("professional_id")):
+        raise HTTPException(status_code=403, detail="Access denied")
+    if booking.get("status") not in transition.source:
+        raise HTTPException(status_code=400, detail=transition.error)
+
+    update = {"status": transition.target, transition.timestamp: datetime.utcnow(), **(fields or {})}
+    await db.db.bookings.update_one({"_id": ObjectId(booking_id)}, {"$set": update})
+    return await db.db.bookings.find_one({"_id": ObjectId(booking_id)})
+
+
+async def new_transition(booking_id: str, name: str, actor_id: str, fields: dict = None):
+    return await apply_transition(booking_id, name, actor_id, fields=fields)
+
+
+async def run_lifecycle(fn, docs: list):
+    for doc in docs:
+        for name in LIFECYCLE:
+            await fn(str(doc["_id"]), name, doc["professional_id"])
+
+
+async def race(fn, docs: list) -> int:
+    """Accept and cancel each booking concurrently; count double successes"""
+    both = 0
+    for doc in docs:
+        booking_id = str(doc["_id"])
+        results = await asyncio.gather(
+            fn(booking_id, "accept", doc["professional_id"]),
+            fn(booking_id, "cancel", doc["user_id"], {"cancelled_by": "user"}),
+            return_exceptions=True,
+        )
+        if not any(isinstance(result, Exception) for result in results):
+            both += 1
+    return both
+
+
+async def main(bookings: int, races: int):
+    async with bench_database("transitions") as counter:
+        for label, fn in (("find/check/update/find", legacy_transition), ("find_one_and_update", new_transition)):
+            docs = await seed(bookings)
+            with Timer(counter) as timer:
+                await run_lifecycle(fn, docs)
+            report(label, bookings * len(LIFECYCLE), timer)
+
+        for label, fn in (("find/check/update/find", legacy_transition), ("find_one_and_update", new_transition)):
+            docs = await seed(races)
+            both = await race(fn, docs)
+            print(f"{label:<28} accept+cancel race: both succeeded on {both}/{races} bookings")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--races", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.races))
@@ -0,0 +1,80 @@
+"""
+Shared helpers for the benchmarks
+"""
+
+import time
+from contextlib import asynccontextmanager
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.config import settings
+from app.database import db
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to MongoDB (one per round trip) and reply bytes"""
+
+    def __init__(self):
+        self.count = 0
+        self.reply_bytes = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        self.reply_bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+@asynccontextmanager
+async def bench_database(name: str):
+    """
+    Point app.database at a throwaway database for the duration of a
+    benchmark and drop it afterwards. Yields the command counter.
+    """
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGO_URL, event_listeners=[counter])
+    database_name = f"{settings.DATABASE_NAME}_bench_{name}"
+
+    previous = (db.client, db.db)
+    db.client = client
+    db.db = client[database_name]
+    try:
+        await client.drop_database(database_name)
+        yield counter
+    finally:
+        await client.drop_database(database_name)
+        db.client, db.db = previous
+        client.close()
+
+
+class Timer:
+    """Wall-clock timer that also captures the command count delta"""
+
+    def __init__(self, counter: CommandCounter):
+        self.counter = counter
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.start_commands = self.counter.count
+        self.start_bytes = self.counter.reply_bytes
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.commands = self.counter.count - self.start_commands
+        self.reply_bytes = self.counter.reply_bytes - self.start_bytes
+
+
+def report(label: str, operations: int, timer: Timer):
+    """Print throughput, round trips and reply size per operation"""
+    rate = operations / timer.elapsed if timer.elapsed else float("inf")
+    print(
+        f"{label:<28} {operations:>7} ops  {timer.elapsed:8.3f}s  "
+        f"{rate:10.1f} ops/s  {timer.commands / operations:5.2f} round trips/op  "
+        f"{timer.reply_bytes / operations / 1024:8.1f} KB/op"
+    )
@@ -0,0 +1,57 @@
+"""
+Index bootstrap time: serial vs concurrent reconcile, and the version skip
+
+    python -m benchmarks.index_bootstrap [--rounds 5]
+
+Cold runs start from an empty database (every index gets built); warm
+runs reconcile a database that already has every index; the skip run is
+what a worker pays when the recorded catalog version is current.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.database import db
+from app.indexes import INDEX_CATALOG, _reconcile_collection, reconcile_indexes, ensure_indexes
+from benchmarks.common import bench_database
+
+
+async def reconcile_serial(database):
+    for name, specs in INDEX_CATALOG.items():
+        await _reconcile_collection(database, name, specs)
+
+
+async def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    await fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main(rounds: int):
+    async with bench_database("indexes") as counter:
+        results = {"cold serial": [], "cold concurrent": [], "warm serial": [], "warm concurrent": []}
+
+        for _ in range(rounds):
+            for mode, fn in (("serial", reconcile_serial), ("concurrent", reconcile_indexes)):
+                for name in INDEX_CATALOG:
+                    await db.db.drop_collection(name)
+                results[f"cold {mode}"].append(await timed(fn, db.db))
+                results[f"warm {mode}"].append(await timed(fn, db.db))
+
+        await ensure_indexes(db.db, force=True)
+        commands_before = counter.count
+        skip_ms = [await timed(ensure_indexes, db.db) for _ in range(rounds)]
+        skip_commands = (counter.count - commands_before) / rounds
+
+        for label, samples in results.items():
+            print(f"{label:<18} {sum(samples) / len(samples):8.1f} ms  (min {min(samples):.1f})")
+        print(f"{'version skip':<18} {sum(skip_ms) / len(skip_ms):8.1f} ms  ({skip_commands:.0f} round trip)")
+        print(f"{len(INDEX_CATALOG)} collections, {sum(len(s) for s in INDEX_CATALOG.values())} indexes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds))
@@ -0,0 +1,115 @@
+"""
+OTP create/verify throughput: previous multi-query flow vs the atomic one
+
+    python -m benchmarks.otp_verify [--otps 2000] [--concurrency 50]
+
+Each OTP gets two wrong guesses followed by the right code, so every
+branch of verify_otp is exercised.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import get_otps_collection
+from app.models.otp import OTPPurpose, OTPType
+from app.utils.otp import create_otp, verify_otp, generate_otp
+from benchmarks.common import bench_database, Timer, report
+
+
+# ---- previous implementation, kept here for comparison ----
+
+async def legacy_create_otp(identifier, otp_type, purpose, user_data=None, otp_code=None):
+    otps = get_otps_collection()
+    await otps.delete_many({"identifier": identifier, "purpose": purpose.value})
+    if otp_code is None:
+        otp_code = generate_otp(settings.OTP_LENGTH)
+    await otps.insert_one({
+        "identifier": identifier,
+        "otp_type": otp_type.value,
+        "purpose": purpose.value,
+        "otp_code": otp_code,
+        "is_verified": False,
+        "attempts": 0,
+        "max_attempts": 3,
+        "created_at": datetime.utcnow(),
+        "expires_at": datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRE_MINUTES),
+        "user_data": user_data
+    })
+    return otp_code
+
+
+async def legacy_verify_otp(identifier, otp_code, purpose):
+    otps = get_otps_collection()
+    otp_doc = await otps.find_one({"identifier": identifier, "purpose": purpose.value, "is_verified": False})
+    if not otp_doc:
+        return {"valid": False}
+    if datetime.utcnow() > otp_doc["expires_at"]:
+        await otps.delete_one({"_id": otp_doc["_id"]})
+        return {"valid": False}
+    if otp_doc["attempts"] >= otp_doc["max_attempts"]:
+        await otps.delete_one({"_id": otp_doc["_id"]})
+        return {"valid": False}
+    if otp_doc["otp_code"] != otp_code:
+        await otps.update_one({"_id": otp_doc["_id"]}, {"$inc": {"attempts": 1}})
+        return {"valid": False}
+    await otps.update_one({"_id": otp_doc["_id"]}, {"$set": {"is_verified": True}})
+    return {"valid": True, "user_data": otp_doc.get("user_data")}
+
+
+# ---- benchmark ----
+
+async def gather_bounded(coros, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def run_variant(label, create, verify, counter, otps, concurrency):
+    identifiers = [f"bench{i}@example.com" for i in range(otps)]
+    purpose = OTPPurpose.LOGIN
+
+    with Timer(counter) as timer:
+        codes = await gather_bounded(
+            [create(ident, OTPType.EMAIL, purpose) for ident in identifiers],
+            concurrency
+        )
+    report(f"{label} create", otps, timer)
+
+    attempts = []
+    for ident, code in zip(identifiers, codes):
+        wrong = str((int(code) + 1) % 10 ** len(code)).zfill(len(code))
+        attempts.extend([(ident, wrong), (ident, wrong), (ident, code)])
+
+    with Timer(counter) as timer:
+        # Attempts for one identifier must run in order; identifiers run in parallel
+        async def attempt_all(ident_attempts):
+            return [await verify(ident, code, purpose) for ident, code in ident_attempts]
+
+        grouped = [attempts[i:i + 3] for i in range(0, len(attempts), 3)]
+        results = await gather_bounded([attempt_all(g) for g in grouped], concurrency)
+    report(f"{label} verify", len(attempts), timer)
+
+    valid = sum(1 for group in results for r in group if r["valid"])
+    assert valid == otps, f"{label}: expected {otps} successful verifications, got {valid}"
+
+
+async def main(otps: int, concurrency: int):
+    async with bench_database("otp") as counter:
+        await get_otps_collection().create_index([("identifier", 1), ("purpose", 1)])
+        await run_variant("before", legacy_create_otp, legacy_verify_otp, counter, otps, concurrency)
+        await get_otps_collection().delete_many({})
+        await run_variant("after", create_otp, verify_otp, counter, otps, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--otps", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.otps, args.concurrency))
@@ -0,0 +1,164 @@
+"""
+Professional search: trigram fuzzy index vs the four-field $regex
+
+    python -m benchmarks.professional_search [--professionals 20000] [--queries 300] [--mongo]
+
+Generates synthetic professionals and queries in three flavours - exact
+words, one-typo words ("electrican") and typed-so-far prefixes ("elec") -
+and reports recall against the intended word plus latency for both paths.
+In-process, the regex path is evaluated with Python's re over the same
+four fields; --mongo also times the real $regex query on a throwaway
+database.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+import tracemalloc
+
+from bson import ObjectId
+
+from app.database import db
+from app.services.fuzzy import FuzzyCorpus, VISIBLE_PROFESSIONALS
+from app.services.search import words
+from benchmarks.common import bench_database, Timer, report
+
+FIRST = ["Rahul", "Amit", "Sourav", "Priya", "Ankit", "Neha", "Rohan", "Sneha", "Arjun", "Pooja",
+         "Vikram", "Kavya", "Suresh", "Meera", "Deepak", "Ritika", "Manoj", "Ishita", "Sanjay", "Tanvi"]
+LAST = ["Das", "Kumar", "Sharma", "Ghosh", "Banerjee", "Singh", "Mukherjee", "Patel", "Roy", "Chatterjee"]
+PROFESSIONS = {
+    "Electrician": ["wiring", "inverter", "switchboard", "lighting", "earthing"],
+    "Plumber": ["pipeline", "leakage", "bathroom", "geyser", "drainage"],
+    "Carpenter": ["furniture", "wardrobe", "polishing", "cabinet", "doors"],
+    "Painter": ["waterproofing", "texture", "enamel", "primer", "stencil"],
+    "Mechanic": ["engine", "brakes", "clutch", "servicing", "battery"],
+    "Technician": ["refrigerator", "microwave", "television", "washing", "airconditioner"],
+}
+FILLER = ("experienced reliable certified professional available weekends emergency visits "
+          "residential commercial projects customers satisfied quality work affordable").split()
+
+
+def generate(count: int, rng: random.Random) -> list:
+    professionals = []
+    for _ in range(count):
+        profession = rng.choice(list(PROFESSIONS))
+        skills = rng.sample(PROFESSIONS[profession], 3)
+        professionals.append({
+            "_id": ObjectId(),
+            **VISIBLE_PROFESSIONALS,
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "approval_data": {
+                "profession": profession,
+                "skills": [skill.title() for skill in skills],
+                "bio": " ".join(rng.choices(FILLER, k=12) + [profession.lower(), rng.choice(skills)]),
+            },
+        })
+    return professionals
+
+
+def typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("delete", "substitute", "transpose", "insert"))
+    if edit == "delete":
+        return word[:i] + word[i + 1:]
+    if edit == "substitute":
+        return word[:i] + rng.choice("aeioulnrst".replace(word[i], "")) + word[i + 1:]
+    if edit == "transpose":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice("aeioulnrst") + word[i:]
+
+
+def make_queries(count: int, rng: random.Random) -> list:
+    vocabulary = [p.lower() for p in PROFESSIONS] + [s for skills in PROFESSIONS.values() for s in skills]
+    vocabulary += [name.lower() for name in LAST if len(name) >= 5]
+    queries = []
+    for i in range(count):
+        word = rng.choice(vocabulary)
+        flavour = ("exact", "typo", "prefix")[i % 3]
+        text = {"exact": word, "typo": typo(word, rng), "prefix": word[:4]}[flavour]
+        queries.append((flavour, word, text))
+    return queries
+
+
+def searchable(professional: dict) -> list:
+    data = professional["approval_data"]
+    return [professional["name"], data["profession"], " ".join(data["skills"]), data["bio"]]
+
+
+def regex_search(professionals: list, text: str) -> list:
+    pattern = re.compile(text, re.IGNORECASE)
+    return [str(p["_id"]) for p in professionals if any(pattern.search(field) for field in searchable(p))]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_in_process(professionals: list, queries: list):
+    # Ground truth: professionals whose fields contain the intended word
+    word_sets = {str(p["_id"]): set(words(" ".join(searchable(p)))) for p in professionals}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    corpus = FuzzyCorpus.build(professionals)
+    build = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"fuzzy index build     {len(professionals):>7} professionals  {build:7.3f}s  "
+          f"{len(corpus.vocabulary)} words  {size / 1024 / 1024:.1f} MB retained")
+
+    for label, search in (
+        ("$regex x4 (re)", lambda text: regex_search(professionals, text)),
+        ("trigram fuzzy", lambda text: [pid for pid, _ in corpus.search(text, len(professionals))]),
+    ):
+        latencies, recall = [], {"exact": [], "typo": [], "prefix": []}
+        for flavour, word, text in queries:
+            started = time.perf_counter()
+            found = set(search(text))
+            latencies.append((time.perf_counter() - started) * 1000)
+            truth = {pid for pid, terms in word_sets.items() if word in terms}
+            if truth:
+                recall[flavour].append(len(found & truth) / len(truth))
+        summary = "  ".join(f"{flavour} {sum(values) / len(values):6.1%}" for flavour, values in recall.items() if values)
+        print(f"{label:<20} p50 {percentile(latencies, 0.5):7.2f}ms  p95 {percentile(latencies, 0.95):7.2f}ms  "
+              f"recall: {summary}")
+
+
+async def bench_mongo(professionals: list, queries: list):
+    async with bench_database("professional_search") as counter:
+        await db.db.users.insert_many(professionals)
+        with Timer(counter) as timer:
+            for _, _, text in queries:
+                await db.db.users.find({**VISIBLE_PROFESSIONALS, "$or": [
+                    {field: {"$regex": text, "$options": "i"}}
+                    for field in ("name", "approval_data.profession", "approval_data.skills", "approval_data.bio")
+                ]}).limit(20).to_list(None)
+        report("$regex x4 (MongoDB)", len(queries), timer)
+
+        corpus = FuzzyCorpus.build(professionals)
+        with Timer(counter) as timer:
+            for _, _, text in queries:
+                ids = [ObjectId(pid) for pid, _ in corpus.search(text, 20)]
+                await db.db.users.find({**VISIBLE_PROFESSIONALS, "_id": {"$in": ids}}).to_list(None)
+        report("fuzzy index + $in fetch", len(queries), timer)
+
+
+async def main(count: int, query_count: int, mongo: bool):
+    rng = random.Random(7)
+    professionals = generate(count, rng)
+    queries = make_queries(query_count, rng)
+    bench_in_process(professionals, queries)
+    if mongo:
+        await bench_mongo(professionals, queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--professionals", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.professionals, args.queries, args.mongo))
@@ -0,0 +1,69 @@
+"""
+Search autocomplete: trie lookups with interleaved change events
+
+    python -m benchmarks.search_suggest [--suggestions 50000] [--lookups 20000] [--bump-every 10]
+
+Builds the suggest index from synthetic labels (no MongoDB needed), then
+times prefix lookups of 1-6 characters while applying a popularity change
+every --bump-every lookups, and reports p50/p99/max latency.
+"""
+
+import argparse
+import random
+import time
+
+from app.services.suggest import SuggestIndex, normalize
+
+KINDS = ("service", "category", "profession", "skill", "city")
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def generate(count: int, rng: random.Random):
+    vocabulary = ["".join(rng.choices(LETTERS, k=rng.randint(3, 10))) for _ in range(count // 10 + 50)]
+    counts, labels = {}, {}
+    while len(counts) < count:
+        label = " ".join(rng.sample(vocabulary, rng.randint(1, 4))).title()
+        key = (rng.choice(KINDS), normalize(label))
+        counts[key] = rng.paretovariate(1.2) * 10
+        labels[key] = label
+    return vocabulary, counts, labels
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main(suggestions: int, lookups: int, bump_every: int, limit: int):
+    rng = random.Random(7)
+    vocabulary, counts, labels = generate(suggestions, rng)
+
+    index = SuggestIndex()
+    started = time.perf_counter()
+    index.apply_counts(counts, labels)
+    print(f"build                 {suggestions:>7} suggestions  {time.perf_counter() - started:8.3f}s")
+
+    keys = list(labels)
+    prefixes = [word[:rng.randint(1, 6)] for word in rng.choices(vocabulary, k=lookups)]
+    latencies, bumps = [], 0
+    for i, prefix in enumerate(prefixes):
+        if bump_every and i % bump_every == 0:
+            kind, _ = key = rng.choice(keys)
+            index.bump(kind, labels[key], rng.choice((-1, 1, 5)))
+            bumps += 1
+        started = time.perf_counter()
+        index.suggest(prefix, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"suggest               {lookups:>7} lookups      p50 {percentile(latencies, 0.5):7.3f}ms  "
+          f"p99 {percentile(latencies, 0.99):7.3f}ms  max {max(latencies):7.3f}ms  ({bumps} change events)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suggestions", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--bump-every", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+    main(args.suggestions, args.lookups, args.bump_every, args.limit)
@@ -0,0 +1,141 @@
+"""
+Service search: BM25 inverted index vs unanchored $regex
+
+    python -m benchmarks.service_search [--services 100000] [--queries 500] [--mongo]
+
+Generates a synthetic catalog, builds the in-process index and reports
+build time, memory footprint and per-query latency (p50/p95/p99). With
+--mongo it also seeds a throwaway database and times the old four-field
+$regex catalog query against index lookup + $in fetch.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.database import db
+from app.services.search import SearchCorpus, ServiceSearchIndex
+from benchmarks.common import bench_database, Timer, report
+
+CATEGORIES = ["Appliance Repair", "Plumbing", "Electrician", "Cleaning", "Painting",
+              "Carpentry", "Pest Control", "Salon at Home", "AC Service", "Laptop Repair"]
+ITEMS = ["ac", "fridge", "washing machine", "geyser", "tap", "pipe", "fan", "switchboard", "sofa",
+         "kitchen", "bathroom", "wall", "door", "bed", "laptop", "tv", "microwave", "ro purifier"]
+ACTIONS = ["repair", "installation", "servicing", "cleaning", "deep cleaning", "replacement",
+           "inspection", "painting", "fitting", "uninstallation"]
+FILLER = ("expert trained verified professional doorstep same day warranty genuine spare parts "
+          "affordable quick reliable safe hygienic tools included emergency visit charges apply "
+          "brands models home office apartment villa thorough checkup gas refill leak fix").split()
+QUERIES = ["ac repair", "washing machine", "deep cleaning bathroom", "geyser install", "plumb",
+           "laptop", "sofa clean", "pest", "switchboard fitting", "emergency tap leak", "ro",
+           "kitchen painting", "fridge gas refill", "door", "tv wall mount"]
+
+
+def generate(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    services = []
+    for i in range(count):
+        item, action = rng.choice(ITEMS), rng.choice(ACTIONS)
+        services.append({
+            "_id": f"{i:024x}",
+            "name": f"{item.title()} {action.title()}",
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(ITEMS, 2) + [action],
+            "description": " ".join(rng.choices(FILLER, k=rng.randint(15, 60))),
+            "price": rng.randint(99, 4999),
+            "is_active": True,
+            "professional_active": True,
+            "rating": round(rng.uniform(3, 5), 1),
+            "bookings_count": rng.randint(0, 500),
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        })
+    return services
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_corpus(services: list, queries: int, limit: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    corpus = SearchCorpus()
+    for service in services:
+        corpus.add(service["_id"], service)
+    corpus.reweight()
+    build = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"index build                  {len(services):>7} services  {build:8.3f}s  "
+          f"{len(corpus.postings)} terms  peak {peak / 1024 / 1024:.1f} MB")
+
+    latencies, hits = [], 0
+    for i in range(queries):
+        started = time.perf_counter()
+        hits += len(corpus.search(QUERIES[i % len(QUERIES)], limit))
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"index search                 {queries:>7} queries   p50 {percentile(latencies, 0.5):7.2f}ms  "
+          f"p95 {percentile(latencies, 0.95):7.2f}ms  p99 {percentile(latencies, 0.99):7.2f}ms  "
+          f"{hits / queries:.0f} hits/query")
+
+    # Incremental maintenance (what create/update/delete cost the index)
+    started = time.perf_counter()
+    for service in services[:1000]:
+        corpus.add(service["_id"], {**service, "name": service["name"] + " pro"})
+    for service in services[:1000]:
+        corpus.remove(service["_id"])
+    print(f"index update+delete          {2000:>7} ops       {(time.perf_counter() - started) * 1000 / 2000:7.3f}ms/op")
+
+
+def regex_query(search: str) -> dict:
+    return {"is_active": True, "professional_active": True, "$or": [
+        {field: {"$regex": search, "$options": "i"}} for field in ("name", "description", "category", "tags")
+    ]}
+
+
+async def bench_mongo(services: list, queries: int, limit: int):
+    async with bench_database("search") as counter:
+        for start in range(0, len(services), 10000):
+            await db.db.services.insert_many(services[start:start + 10000])
+        await db.db.services.create_index("updated_at")
+
+        with Timer(counter) as timer:
+            for i in range(queries):
+                await db.db.services.find(regex_query(QUERIES[i % len(QUERIES)])).limit(limit).to_list(None)
+        report("$regex x4 (collection scan)", queries, timer)
+
+        index = ServiceSearchIndex()
+        with Timer(counter) as timer:
+            await index.ensure_fresh()
+        report("index build from MongoDB", 1, timer)
+
+        with Timer(counter) as timer:
+            for i in range(queries):
+                ranked = await index.search(QUERIES[i % len(QUERIES)])
+                ids = [service_id for service_id, _ in ranked[:limit]]
+                await db.db.services.find(
+                    {"_id": {"$in": ids}, "is_active": True, "professional_active": True}
+                ).to_list(None)
+        report("BM25 index + $in fetch", queries, timer)
+
+
+async def main(count: int, queries: int, limit: int, mongo: bool):
+    services = generate(count)
+    bench_corpus(services, queries, limit)
+    if mongo:
+        await bench_mongo(services, queries, limit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.services, args.queries, args.limit, args.mongo))
@@ -3,24 +3,57 @@ Electronics Authentication Backend
 FastAPI with MongoDB, JWT, OAuth, OTP, RBAC, and Real-time Notifications
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from pathlib import Path
+import time
 import socketio
 
-from app.database import connect_to_mongo, close_mongo_connection
+from app.database import db, connect_to_mongo, close_mongo_connection, get_token_revocations_collection
 from app.routes import auth, users, oauth, vacancies, applications, verifications, upload, subscriptions
-from app.routes import services, offers, favorites, professionals, notifications, bookings, messages
+from app.routes import services, offers, favorites, professionals, notifications, bookings, messages, search
 from app.socket_manager import sio
+from app.utils.security import user_cache, token_cache, token_revocations, password_executor
+from app.middleware.rate_limit import rate_limiter
+from app.middleware.rbac import require_roles
+from app.models.user import UserRole
+from app.middleware.db_metrics import DBMetricsMiddleware, route_query_totals
+from app.services.email_outbox import email_outbox
+from app.services.availability import availability_index
+from app.services.scheduler import scheduler
+from app.services.search import service_search
+from app.services.suggest import suggest_index
+from app.services.fuzzy import professional_fuzzy
+from app.utils.http_client import connect_http_client, close_http_client, http_client_stats
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle - connect/disconnect from MongoDB"""
+    started = time.perf_counter()
     await connect_to_mongo()
+    await connect_http_client()
+    await token_revocations.start(get_token_revocations_collection())
+    await email_outbox.start()
+    await scheduler.start()
+    await availability_index.start()
+    await service_search.start()
+    await suggest_index.start()
+    await professional_fuzzy.start()
+    db.startup["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Startup complete in {db.startup['total_ms']}ms")
     yield
+    await professional_fuzzy.stop()
+    await suggest_index.stop()
+    await service_search.stop()
+    await availability_index.stop()
+    await scheduler.stop()
+    await email_outbox.stop()
+    await token_revocations.stop()
+    await close_http_client()
+    password_executor.shutdown()
     await close_mongo_connection()
 
 
@@ -47,6 +80,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Per-request MongoDB query counts (X-DB-Queries / X-DB-Time)
+app.add_middleware(DBMetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -63,6 +99,7 @@ app.include_router(professionals.router, prefix="/api", tags=["Professionals"])
 app.include_router(notifications.router, prefix="/api", tags=["Notifications"])
 app.include_router(bookings.router, prefix="/api/bookings", tags=["Bookings"])
 app.include_router(messages.router, prefix="/api/messages", tags=["Messages"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
 # Mount static files for uploads
 uploads_dir = Path("uploads")
@@ -80,5 +117,32 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/metrics", dependencies=[Depends(require_roles([UserRole.ADMIN], claims_only=True))])
+async def health_metrics():
+    """
+    In-process cache and worker pool statistics for this worker (admin only:
+    it exposes lease owners, per-route query counts and pool state).
+    /health stays the public liveness probe.
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "token_revocations": token_revocations.stats(),
+        "booking_counts_cache": bookings.status_counts_cache.stats(),
+        "catalog_facets_cache": services.catalog_facets_cache.stats(),
+        "availability_index": availability_index.stats(),
+        "scheduler": scheduler.stats(),
+        "service_search": service_search.stats(),
+        "suggest_index": suggest_index.stats(),
+        "professional_search": professional_fuzzy.stats(),
+        "password_pool": password_executor.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "email_outbox": email_outbox.stats(),
+        "http_client": http_client_stats(),
+        "db_queries": route_query_totals.stats(),
+        "startup": db.startup,
+    }
+
+
 # Create combined ASGI app with Socket.IO
 socket_app = socketio.ASGIApp(sio, other_asgi_app=app)
@@ -0,0 +1,76 @@
+"""
+The pending-booking sweep never cancels a booking accepted in the meantime
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.services import booking_state
+
+
+class FakeBookings:
+    """find_one_and_update / find_one over a dict, matching _id and status $in"""
+
+    def __init__(self, *bookings):
+        self.documents = {booking["_id"]: booking for booking in bookings}
+
+    def _matches(self, booking, query):
+        return all(
+            booking.get(key) in value["$in"] if isinstance(value, dict) else booking.get(key) == value
+            for key, value in query.items()
+        )
+
+    async def find_one_and_update(self, query, pipeline, return_document=None):
+        booking = self.documents.get(query["_id"])
+        if booking is None or not self._matches(booking, query):
+            return None
+        for stage in pipeline:
+            for key, value in stage.get("$set", {}).items():
+                booking[key] = value["$literal"]
+            if "$unset" in stage:
+                booking.pop(stage["$unset"], None)
+        return dict(booking)
+
+    async def find_one(self, query, projection=None):
+        return self.documents.get(query["_id"])
+
+
+@pytest.fixture
+def bookings(monkeypatch):
+    def install(*documents):
+        collection = FakeBookings(*documents)
+        monkeypatch.setattr(booking_state, "db", SimpleNamespace(db=SimpleNamespace(bookings=collection)))
+        monkeypatch.setattr(booking_state, "availability_index", SimpleNamespace(booking_removed=lambda booking: None))
+        return collection
+    return install
+
+
+def test_expire_cancels_a_pending_booking(bookings):
+    booking_id = ObjectId()
+    collection = bookings({"_id": booking_id, "status": "pending", "slot_key": "2024-01-01T10:00"})
+
+    booking = asyncio.run(booking_state.apply_transition(str(booking_id), "expire", None))
+
+    assert booking["status"] == "cancelled"
+    assert "slot_key" not in collection.documents[booking_id]
+
+
+def test_expire_skips_a_booking_accepted_after_the_sweep_found_it(bookings):
+    booking_id = ObjectId()
+    collection = bookings({"_id": booking_id, "status": "pending", "professional_id": "pro"})
+
+    async def race():
+        # The sweep read the booking as pending; the professional accepts first
+        await booking_state.apply_transition(str(booking_id), "accept", "pro")
+        await booking_state.apply_transition(str(booking_id), "expire", None)
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(race())
+
+    assert rejected.value.status_code == 400
+    assert collection.documents[booking_id]["status"] == "accepted"
+    assert "cancelled_by" not in collection.documents[booking_id]
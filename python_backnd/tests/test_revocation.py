@@ -0,0 +1,62 @@
+"""
+Token revocations survive restarts and reach other workers
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.utils.revocation import RevocationSet
+
+
+class FakeCollection:
+    """The two token_revocations calls RevocationSet makes"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def update_one(self, query, update, upsert=False):
+        document = self.documents.setdefault(query["_id"], {"_id": query["_id"]})
+        for key, value in update["$max"].items():
+            document[key] = max(document.get(key, value), value)
+
+    def find(self, query):
+        cutoff = query["expires_at"]["$gt"]
+        live = [document for document in self.documents.values() if document["expires_at"] > cutoff]
+
+        class Cursor:
+            async def to_list(self, length):
+                return live
+
+        return Cursor()
+
+
+def test_fresh_set_rejects_token_revoked_before_restart():
+    collection = FakeCollection()
+
+    async def scenario():
+        before = RevocationSet(retention_seconds=1800)
+        await before.start(collection)
+        await before.record("user-1", 3)
+        await before.stop()
+
+        # A new worker (or the same one after a restart) starts empty
+        after = RevocationSet(retention_seconds=1800)
+        assert not after.is_revoked("user-1", 2)
+        await after.start(collection)
+        await after.stop()
+        return after
+
+    after = asyncio.run(scenario())
+    assert after.is_revoked("user-1", 2)
+    assert not after.is_revoked("user-1", 3)
+    assert not after.is_revoked("user-2", 0)
+
+
+def test_expired_revocations_are_not_loaded():
+    revocations = RevocationSet(retention_seconds=1800)
+    revocations.load([
+        {"_id": "user-1", "min_epoch": 5, "expires_at": datetime.utcnow() - timedelta(seconds=1)},
+        {"_id": "user-2", "min_epoch": 5, "expires_at": datetime.utcnow() + timedelta(minutes=5)},
+    ])
+    assert not revocations.is_revoked("user-1", 0)
+    assert revocations.is_revoked("user-2", 4)